@@ -27,7 +27,7 @@ class DepartmentAdmin(admin.ModelAdmin):
 
 @admin.register(Category)
 class CategoryAdmin(admin.ModelAdmin):
-    list_display  = ("name", "code")
+    list_display  = ("name", "code", "depreciation_method", "useful_life_years")
     search_fields = ("name", "code")
 
 
@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class AssetmanagementConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'assetmanagement'
+
+    def ready(self):
+        # connect signal receivers
+        from . import caching, changelog, counters, events, media, metrics, rollups, search  # noqa: F401
+        metrics.instrument_serializers()
@@ -0,0 +1,96 @@
+# backend/assetmanagement/archive.py
+"""Archival of old transfer history.
+
+Transfer lists, the dashboard and keyset pages only ever read recent
+transfers, so ``archive()`` moves transfers older than
+``TRANSFER_ARCHIVE_DAYS`` into ``ArchivedTransfer`` (same ids and
+columns) and keeps the hot table small. Each batch is its own short
+transaction: lock the oldest ``batch_size`` rows, copy them, delete them.
+The delete skips model signals on purpose: an archived transfer still
+counts towards its asset's transfer counters, keeps its image reference
+and is not a deletion for ``/api/sync/`` clients.
+
+The asset timeline reads both tables in one ``UNION ALL`` query through
+``history_values``; the transfer export streams the archive and then the
+hot table (the filters in filters.py work on either model).
+"""
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connections, router, transaction
+from django.utils import timezone
+
+from .models import ArchivedTransfer, AssetTransfer
+
+TRANSFER_ARCHIVE_DAYS = 365
+ARCHIVE_BATCH_SIZE = 1000
+# columns copied as they are
+COPIED_FIELDS = (
+    'id', 'asset_id', 'from_department_id', 'to_department_id', 'transfer_date',
+    'notes', 'transferred_by_id', 'price', 'image',
+)
+
+
+def horizon(days=None):
+    """Transfers made before this moment belong in the archive."""
+    if days is None:
+        days = getattr(settings, 'TRANSFER_ARCHIVE_DAYS', TRANSFER_ARCHIVE_DAYS)
+    return timezone.now() - timedelta(days=days)
+
+
+def due(cutoff):
+    return AssetTransfer.objects.filter(transfer_date__lt=cutoff)
+
+
+def archive_batch(cutoff, batch_size=ARCHIVE_BATCH_SIZE):
+    """Move up to ``batch_size`` of the oldest transfers before ``cutoff``; returns the count."""
+    alias = router.db_for_write(AssetTransfer)
+    with transaction.atomic(using=alias):
+        ids = list(
+            due(cutoff).using(alias).select_for_update()
+            .order_by('transfer_date', 'id').values_list('pk', flat=True)[:batch_size]
+        )
+        if not ids:
+            return 0
+        rows = AssetTransfer.objects.using(alias).filter(pk__in=ids).values(*COPIED_FIELDS)
+        ArchivedTransfer.objects.using(alias).bulk_create(
+            [ArchivedTransfer(**row) for row in rows], batch_size=batch_size
+        )
+        _delete_rows(alias, ids)
+    return len(ids)
+
+
+def _delete_rows(alias, ids):
+    # a plain DELETE: no post_delete signals (counters, media, change log)
+    connection = connections[alias]
+    table = connection.ops.quote_name(AssetTransfer._meta.db_table)
+    placeholders = ', '.join(['%s'] * len(ids))
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {table} WHERE id IN ({placeholders})', ids)
+
+
+def archive(days=None, batch_size=ARCHIVE_BATCH_SIZE, pause=0, stdout=None):
+    """Archive every due transfer in batches, sleeping ``pause`` seconds between them."""
+    cutoff = horizon(days)
+    total = 0
+    while True:
+        moved = archive_batch(cutoff, batch_size)
+        total += moved
+        if stdout is not None and moved:
+            stdout.write(f'  archived {total} transfers')
+        if moved < batch_size:
+            return total
+        if pause:
+            time.sleep(pause)
+
+
+# --------------------
+# Reading both tables
+# --------------------
+
+def history_values(reader, **filters):
+    """Rows of ``reader`` (a fastread.ValuesReader) for both tables, in transfer date order."""
+    hot = reader.values(AssetTransfer.objects.filter(**filters))
+    archived = reader.values(ArchivedTransfer.objects.filter(**filters))
+    return archived.union(hot, all=True).order_by('transfer_date', 'id')
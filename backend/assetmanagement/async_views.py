@@ -0,0 +1,213 @@
+# backend/assetmanagement/async_views.py
+"""Async read endpoints of the dashboard, and its event stream.
+
+Under an ASGI server (``config/asgi.py``) these views wait on the
+database without holding a worker thread per request. Independent queries
+run concurrently through ``gather``: each one on a thread of a small pool
+(``ASYNC_GATHER_WORKERS``) with that thread's own connection, so a
+dashboard request costs the slowest query rather than the sum of them.
+The pool threads keep their connections between requests for
+``CONN_MAX_AGE`` like request threads do, so the parallelism costs at most
+``ASYNC_GATHER_WORKERS`` extra connections per process and no connection
+setup per request; opening a fresh MySQL connection for each query would
+cost about as much as the overlap saves. Responses are the same JSON the DRF versions
+returned; authentication still goes through the DRF authenticators.
+"""
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import close_old_connections, connection
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_GET, require_POST
+from rest_framework import exceptions, status
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from . import events, fastread, metrics
+from .models import AssetRollup, AssetTransfer, Department, User
+from .serializers import AssetTransferSerializer
+
+RECENT_TRANSFERS_DEFAULT = 5
+RECENT_TRANSFERS_MAX = 100
+ASYNC_GATHER_WORKERS = 4
+
+_gather_executor = None
+_gather_lock = threading.Lock()
+
+
+def _executor():
+    global _gather_executor
+    with _gather_lock:
+        if _gather_executor is None:
+            _gather_executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'ASYNC_GATHER_WORKERS', ASYNC_GATHER_WORKERS),
+                thread_name_prefix='gather',
+            )
+        return _gather_executor
+
+
+def _on_own_connection(query):
+    def run():
+        # no request_started/finished on pool threads: reuse the thread's
+        # connection unless it is broken or past CONN_MAX_AGE
+        close_old_connections()
+        try:
+            with metrics.recording_queries():
+                return query()
+        finally:
+            close_old_connections()
+    return run
+
+
+def _on_request_connection(query):
+    def run():
+        with metrics.recording_queries():
+            return query()
+    return run
+
+
+async def gather(*queries):
+    """Run blocking query callables concurrently and return their results in order.
+
+    Inside a transaction (tests, ``ATOMIC_REQUESTS``) other connections
+    cannot see its rows, so the queries then run one by one on the
+    request's connection instead.
+    """
+    in_transaction = await sync_to_async(lambda: connection.in_atomic_block)()
+    if in_transaction:
+        return [await sync_to_async(_on_request_connection(q))() for q in queries]
+    executor = _executor()
+    return await asyncio.gather(*(
+        sync_to_async(_on_own_connection(q), thread_sensitive=False, executor=executor)() for q in queries
+    ))
+
+
+def _authenticate(request):
+    drf_request = Request(
+        request, authenticators=[auth() for auth in api_settings.DEFAULT_AUTHENTICATION_CLASSES]
+    )
+    user = drf_request.user
+    if not (user and user.is_authenticated):
+        raise exceptions.NotAuthenticated()
+    return drf_request
+
+
+async def authenticate(request):
+    """The DRF request for ``request``, or a 401 JsonResponse."""
+    try:
+        return await sync_to_async(_authenticate)(request), None
+    except exceptions.APIException as e:
+        response = JsonResponse({'detail': e.detail}, status=status.HTTP_401_UNAUTHORIZED)
+        response['WWW-Authenticate'] = 'Bearer realm="api"'
+        return None, response
+
+
+def json_response(data):
+    return JsonResponse(data, safe=False, encoder=DjangoJSONEncoder, json_dumps_params={'ensure_ascii': False})
+
+
+def _recent_transfers_query(limit):
+    # values() rows rendered by fastread: same JSON as AssetTransferSerializer
+    reader = fastread.reader_for(AssetTransferSerializer())
+    return reader, reader.values(AssetTransfer.objects.order_by('-transfer_date'))[:limit]
+
+
+def _recent_transfers(limit):
+    reader, rows = _recent_transfers_query(limit)
+    return reader.render(rows)
+
+
+# --------------------
+# Dashboard
+# --------------------
+
+@require_GET
+async def dashboard_stats(request):
+    _, error = await authenticate(request)
+    if error is not None:
+        return error
+
+    # served from AssetRollup (see rollups.py): three independent queries
+    rows, recent, departments = await gather(
+        lambda: list(AssetRollup.objects.values_list('dimension', 'key', 'count')),
+        lambda: _recent_transfers(RECENT_TRANSFERS_DEFAULT),
+        lambda: list(Department.objects.values_list('id', 'name')),
+    )
+    rollup = {(dimension, key): count for dimension, key, count in rows}
+    stats = {
+        'total_assets': rollup.get(('total', 'assets'), 0),
+        'active_assets': rollup.get(('status', 'active'), 0),
+        'total_departments': rollup.get(('model', 'department'), 0),
+        'total_categories': rollup.get(('model', 'category'), 0),
+        'recent_transfers': recent,
+        'assets_by_department': {},
+        "total_brands": rollup.get(('model', 'brand'), 0),
+    }
+    for dept_id, dept_name in departments:
+        stats['assets_by_department'][dept_name] = rollup.get(('department', str(dept_id)), 0)
+    return json_response(stats)
+
+
+@require_GET
+async def recent_transfers(request):
+    _, error = await authenticate(request)
+    if error is not None:
+        return error
+
+    try:
+        limit = int(request.GET.get('limit', RECENT_TRANSFERS_DEFAULT))
+    except (ValueError, TypeError):
+        limit = RECENT_TRANSFERS_DEFAULT
+    limit = max(0, min(limit, RECENT_TRANSFERS_MAX))
+    # a single query: the async ORM awaits it without a dedicated thread
+    reader, rows = _recent_transfers_query(limit)
+    return json_response(reader.render([row async for row in rows]))
+
+
+# --------------------
+# Events
+# --------------------
+
+@require_POST
+async def event_ticket(request):
+    drf_request, error = await authenticate(request)
+    if error is not None:
+        return error
+    # the stream ends when the access token used here does
+    ticket = events.issue_ticket(drf_request.user, drf_request.auth['exp'])
+    return json_response({
+        'ticket': ticket,
+        'expires_in': getattr(settings, 'EVENT_TICKET_SECONDS', events.EVENT_TICKET_SECONDS),
+    })
+
+
+@require_GET
+async def event_stream(request):
+    # EventSource cannot send headers: a short-lived ticket from event_ticket, never the access token
+    ticket = events.read_ticket(request.GET.get('ticket', ''))
+    if ticket is None or not await User.objects.filter(pk=ticket[0], is_active=True).aexists():
+        return JsonResponse({'detail': 'A valid stream ticket is required.'}, status=status.HTTP_401_UNAUTHORIZED)
+    _, expires_at = ticket
+
+    try:
+        departments = [int(d) for d in request.GET.get('department', '').split(',') if d.strip()]
+    except ValueError:
+        return JsonResponse({'error': 'department must be a comma separated list of ids.'},
+                            status=status.HTTP_400_BAD_REQUEST)
+    if not isinstance(request, ASGIRequest):
+        # WSGI would buffer the endless stream in a worker thread
+        return JsonResponse({'error': 'The event stream needs the ASGI server.'},
+                            status=status.HTTP_501_NOT_IMPLEMENTED)
+    subscription = events.get_bus().subscribe(departments)
+    response = StreamingHttpResponse(
+        events.frames(subscription, until=expires_at), content_type='text/event-stream'
+    )
+    response['Cache-Control'] = 'no-cache'
+    # keep nginx from buffering the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
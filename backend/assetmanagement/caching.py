@@ -0,0 +1,152 @@
+# backend/assetmanagement/caching.py
+"""Versioned response cache for reference data (departments, categories,
+brands, usecases).
+
+Every cached model has a ``CacheVersion`` row that save/delete signals bump.
+Cache keys and ETags embed that version, so a write makes every cached
+page of the model unreachable at once: nothing is ever invalidated key by
+key. A request costs one primary-key lookup of the version; if the
+client's ``If-None-Match`` already names it the answer is a bodiless 304,
+otherwise the serialized data comes from the cache when present.
+
+The store is any Django cache alias (``settings.REFERENCE_CACHE_ALIAS``):
+local memory or file based for a single node, Redis/Memcached when shared.
+"""
+import hashlib
+import threading
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import F
+from django.db.models.signals import post_save, post_delete, pre_save
+from django.dispatch import receiver
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import Brand, CacheVersion, Category, Department, UseCase, User
+
+CACHE_TIMEOUT = 24 * 60 * 60
+
+
+class CacheStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counts = {}
+
+    def incr(self, name, outcome):
+        with self._lock:
+            key = (name, outcome)
+            self.counts[key] = self.counts.get(key, 0) + 1
+
+    def snapshot(self):
+        with self._lock:
+            result = {}
+            for (name, outcome), count in self.counts.items():
+                result.setdefault(name, {'hit': 0, 'miss': 0, 'not_modified': 0})[outcome] = count
+            return result
+
+
+stats = CacheStats()
+
+
+def get_cache():
+    return caches[getattr(settings, 'REFERENCE_CACHE_ALIAS', 'default')]
+
+
+def get_version(name):
+    version = CacheVersion.objects.filter(name=name).values_list('version', flat=True).first()
+    return version or 1
+
+
+def bump_version(name):
+    if not CacheVersion.objects.filter(name=name).update(version=F('version') + 1):
+        CacheVersion.objects.get_or_create(name=name, defaults={'version': 2})
+
+
+def cached_response(request, name, build):
+    """Serve ``build()`` (a DRF Response) through the versioned cache.
+
+    Only 200 responses are stored; the key covers the full URL, so every
+    page and filter combination is cached separately.
+    """
+    version = get_version(name)
+    url = request.build_absolute_uri()
+    digest = hashlib.sha1(f'{name}:{version}:{url}'.encode('utf-8')).hexdigest()
+    etag = f'"{name}-{version}-{digest[:16]}"'
+
+    if etag in [tag.strip() for tag in request.headers.get('If-None-Match', '').split(',')]:
+        stats.incr(name, 'not_modified')
+        return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+
+    cache = get_cache()
+    key = f'refdata:{digest}'
+    data = cache.get(key)
+    if data is not None:
+        stats.incr(name, 'hit')
+        return Response(data, headers={'ETag': etag})
+
+    stats.incr(name, 'miss')
+    response = build()
+    if response.status_code == status.HTTP_200_OK:
+        cache.set(key, response.data, CACHE_TIMEOUT)
+        response['ETag'] = etag
+    return response
+
+
+class VersionedCacheMixin:
+    """Serve ``list()`` of a generic view through ``cached_response``."""
+    cache_name = None
+
+    def list(self, request, *args, **kwargs):
+        build = super().list
+        return cached_response(request, self.cache_name, lambda: build(request, *args, **kwargs))
+
+
+# --------------------
+# Version bumps
+# --------------------
+
+@receiver(post_save, sender=Department)
+@receiver(post_delete, sender=Department)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Brand)
+@receiver(post_delete, sender=Brand)
+@receiver(post_save, sender=UseCase)
+@receiver(post_delete, sender=UseCase)
+def bump_cached_model_version(sender, **kwargs):
+    bump_version(sender._meta.model_name)
+
+
+# User columns shown in department rows: manager_name, ?expand=manager
+MANAGER_FIELDS = ('username', 'email', 'first_name', 'last_name', 'role', 'department_id', 'phone')
+_MANAGER_FIELD_NAMES = {f.removesuffix('_id') for f in MANAGER_FIELDS}
+
+
+@receiver(pre_save, sender=User)
+def remember_manager_fields(sender, instance, update_fields=None, **kwargs):
+    # logins (last_login) and password changes leave department rows alone;
+    # so does any user who manages no department
+    instance._manager_fields = None
+    if instance.pk is None:
+        return
+    if update_fields is not None and _MANAGER_FIELD_NAMES.isdisjoint(f.removesuffix('_id') for f in update_fields):
+        return
+    instance._manager_fields = (
+        Department.objects.filter(manager_id=instance.pk)
+        .values_list(*(f'manager__{f}' for f in MANAGER_FIELDS))
+        .first()
+    )
+
+
+@receiver(post_save, sender=User)
+def bump_department_version(sender, instance, **kwargs):
+    old = getattr(instance, '_manager_fields', None)
+    if old is not None and old != tuple(getattr(instance, f) for f in MANAGER_FIELDS):
+        bump_version('department')
+
+
+@receiver(post_delete, sender=User)
+def bump_department_version_on_delete(sender, **kwargs):
+    # the manager column goes NULL through an UPDATE without signals
+    bump_version('department')
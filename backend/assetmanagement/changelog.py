@@ -0,0 +1,226 @@
+# backend/assetmanagement/changelog.py
+"""Change log behind the ``/api/sync/`` delta feed.
+
+Every save or delete of an asset, transfer, department, category, brand
+or usecase appends a ``ChangeLogEntry`` in the same transaction (see
+``SyncedModel``). Entry ids only grow, so the last id a client has seen
+is its sync token: ``changes_since(token)`` returns the current state of
+every row changed after it and the ids of the rows deleted since.
+
+Ids are handed out when a transaction inserts, not when it commits, so a
+long transaction can commit an entry below a token already served. The
+token therefore also lists those gaps: ids missing below it whose
+neighbours were written within ``SYNC_REDELIVERY_SECONDS`` (``"1234"``,
+or ``"1234.1230-1718000000"`` for a gap at id 1230 watched until that
+Unix time). The next request sends the gap ids that have appeared since
+and keeps watching the rest until they expire (rolled back). A page
+carries at most ``SYNC_MAX_GAPS`` of them, so nothing is re-sent beyond
+the rows that actually committed late. Writes that bypass model signals
+(``bulk_create``, ``QuerySet.update``) must call ``record`` themselves.
+``manage.py prune_changelog`` drops old entries; a token older than the
+log gets a 410 and the client reloads in full.
+"""
+import time
+from datetime import timedelta
+from itertools import islice
+
+from django.conf import settings
+from django.db.models import Max, Min
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import fastread
+from .models import Asset, AssetTransfer, Brand, Category, ChangeLogEntry, Department, UseCase
+from .serializers import (
+    AssetSerializer, AssetTransferSerializer, BrandSerializer, CategorySerializer,
+    DepartmentSerializer, UseCaseSerializer,
+)
+
+SYNC_PAGE_SIZE = 500
+SYNC_MAX_PAGE_SIZE = 5000
+SYNC_REDELIVERY_SECONDS = 60
+SYNC_MAX_GAPS = 100
+# how far below the newest id a fresh token looks for transactions in flight
+SYNC_GAP_SCAN = 1000
+RECORD_BATCH_SIZE = 2000
+
+# feed key -> (model, serializer, queryset the rows are read from)
+SYNCED = {
+    'asset': (Asset, AssetSerializer, lambda: Asset.objects.for_read()),
+    'transfer': (AssetTransfer, AssetTransferSerializer, lambda: AssetTransfer.objects.with_related()),
+    'department': (Department, DepartmentSerializer, lambda: Department.objects.select_related('manager')),
+    'category': (Category, CategorySerializer, lambda: Category.objects.all()),
+    'brand': (Brand, BrandSerializer, lambda: Brand.objects.all()),
+    'usecase': (UseCase, UseCaseSerializer, lambda: UseCase.objects.all()),
+}
+KEYS = {model: key for key, (model, _, _) in SYNCED.items()}
+
+
+class TokenExpired(Exception):
+    pass
+
+
+def record(key, ids, deleted=False):
+    """Log a change of the ``key`` rows ``ids``."""
+    ChangeLogEntry.objects.bulk_create(
+        [ChangeLogEntry(model=key, object_id=pk, deleted=deleted) for pk in ids],
+        batch_size=RECORD_BATCH_SIZE,
+    )
+
+
+def newest_id():
+    return ChangeLogEntry.objects.order_by('-pk').values_list('pk', flat=True).first() or 0
+
+
+def parse_token(token):
+    """(id, {gap id: expiry}) of a token; raises ValueError for a malformed one."""
+    since, *gaps = token.split('.')
+    watched = {}
+    for gap in gaps[:SYNC_MAX_GAPS]:
+        pk, expires = gap.split('-')
+        watched[int(pk)] = int(expires)
+    since = int(since)
+    if since < 0:
+        raise ValueError(token)
+    return since, watched
+
+
+def format_token(since, gaps):
+    return '.'.join([str(since), *(f'{pk}-{expires}' for pk, expires in sorted(gaps.items()))])
+
+
+def _window():
+    return getattr(settings, 'SYNC_REDELIVERY_SECONDS', SYNC_REDELIVERY_SECONDS)
+
+
+def _find_gaps(rows, since, gaps):
+    """Add to ``gaps`` the ids missing between ``since`` and ``rows``
+    ((pk, changed_at) in pk order) next to entries inside the window."""
+    window = _window()
+    if window <= 0:
+        return gaps
+    cutoff = timezone.now() - timedelta(seconds=window)
+    expires = int(time.time()) + window
+    previous = since
+    for pk, changed_at in rows:
+        if pk > previous + 1 and changed_at >= cutoff:
+            room = SYNC_MAX_GAPS - len(gaps)
+            gaps.update((gap, expires) for gap in islice(range(previous + 1, pk), max(room, 0)))
+        previous = pk
+    return gaps
+
+
+def current_token():
+    """Token of the log as it is now, for a client about to load in full."""
+    newest = newest_id()
+    since = max(newest - SYNC_GAP_SCAN, 0)
+    rows = ChangeLogEntry.objects.filter(pk__gt=since).order_by('pk').values_list('pk', 'changed_at')
+    return format_token(newest, _find_gaps(rows, since, {}))
+
+
+def _entries(since, gaps, limit):
+    """(late entries, new entries, more, gaps still watched) after the token."""
+    bounds = ChangeLogEntry.objects.aggregate(oldest=Min('pk'), newest=Max('pk'))
+    if since and (bounds['newest'] is None or not bounds['oldest'] - 1 <= since <= bounds['newest']):
+        # pruned past the token, or a token this log never issued
+        raise TokenExpired()
+
+    columns = ('pk', 'model', 'object_id', 'deleted', 'changed_at')
+    late = []
+    if gaps:
+        late = list(ChangeLogEntry.objects.filter(pk__in=list(gaps)).order_by('pk').values_list(*columns))
+        now = int(time.time())
+        arrived = {entry[0] for entry in late}
+        gaps = {pk: expires for pk, expires in gaps.items() if pk not in arrived and expires > now}
+
+    new = list(ChangeLogEntry.objects.filter(pk__gt=since).order_by('pk').values_list(*columns)[:limit + 1])
+    more = len(new) > limit
+    new = new[:limit]
+    _find_gaps([(entry[0], entry[4]) for entry in new], since, gaps)
+    return late, new, more, gaps
+
+
+def changes_since(token, limit=SYNC_PAGE_SIZE, context=None):
+    """The feed page after ``token``; raises TokenExpired if the log no longer reaches back to it
+    and ValueError for a malformed token."""
+    since, gaps = parse_token(token)
+    late, new, more, gaps = _entries(since, gaps, limit)
+    if new:
+        since = new[-1][0]
+
+    # the latest entry of each row wins
+    latest = {}
+    for _, key, object_id, deleted, _ in sorted(late + new):
+        latest[(key, object_id)] = deleted
+
+    changes = {}
+    for key, (model, serializer_class, queryset) in SYNCED.items():
+        saved = sorted(pk for (k, pk), deleted in latest.items() if k == key and not deleted)
+        gone = {pk for (k, pk), deleted in latest.items() if k == key and deleted}
+        if not (saved or gone):
+            continue
+        rows = _serialize(serializer_class, queryset().filter(pk__in=saved).order_by('pk'), context or {})
+        # saved rows deleted after this page are reported as deleted now
+        gone.update(set(saved) - {row['id'] for row in rows})
+        changes[key] = {'saved': rows, 'deleted': sorted(gone)}
+    return {'token': format_token(since, gaps), 'more': more, 'changes': changes}
+
+
+def _serialize(serializer_class, queryset, context):
+    reader = fastread.reader_for(serializer_class(context=context))
+    if reader is None:
+        return serializer_class(queryset, many=True, context=context).data
+    return reader.render(reader.values(queryset))
+
+
+def prune(days):
+    """Delete entries older than ``days``, always keeping the newest one; returns the count."""
+    newest = newest_id()
+    cutoff = timezone.now() - timedelta(days=days)
+    deleted, _ = ChangeLogEntry.objects.filter(changed_at__lt=cutoff, pk__lt=newest).delete()
+    return deleted
+
+
+# --------------------
+# Signal receivers
+# --------------------
+
+@receiver(post_save, sender=Asset)
+@receiver(post_save, sender=AssetTransfer)
+@receiver(post_save, sender=Department)
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=Brand)
+@receiver(post_save, sender=UseCase)
+def log_saved_row(sender, instance, **kwargs):
+    record(KEYS[sender], [instance.pk])
+    if sender is AssetTransfer:
+        _log_counted_assets(instance)
+
+
+@receiver(post_delete, sender=Asset)
+@receiver(post_delete, sender=AssetTransfer)
+@receiver(post_delete, sender=Department)
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=Brand)
+@receiver(post_delete, sender=UseCase)
+def log_deleted_row(sender, instance, **kwargs):
+    record(KEYS[sender], [instance.pk], deleted=True)
+    if sender is AssetTransfer:
+        _log_counted_assets(instance)
+
+
+@receiver(pre_delete, sender=Department)
+@receiver(pre_delete, sender=Category)
+@receiver(pre_delete, sender=UseCase)
+def log_orphaned_assets(sender, instance, **kwargs):
+    # SET_NULL clears these assets' FK with one UPDATE and no signals
+    field = {Department: 'current_department', Category: 'category', UseCase: 'usecase'}[sender]
+    record('asset', list(Asset.objects.filter(**{field: instance}).values_list('pk', flat=True)))
+
+
+def _log_counted_assets(transfer):
+    # counters.py updated the transfer counters of these assets
+    old = getattr(transfer, '_counter_old', None)
+    ids = {transfer.asset_id} | ({old['asset_id']} if old else set())
+    record('asset', sorted(ids))
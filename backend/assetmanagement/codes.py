@@ -0,0 +1,67 @@
+# backend/assetmanagement/codes.py
+"""Collision-free code allocation backed by the CodeSequence table.
+
+Each series (``asset``, ``brand``, ``usecase``) is one row holding the last
+number handed out. Allocating locks that row, bumps it by the number of
+codes requested and returns the block: one indexed UPDATE whatever the
+table size, and concurrent workers are serialized by the row lock so no
+two of them ever see the same number. Numbers are never reused, even
+after deletes. The lock lives as long as the caller's transaction, so a
+rolled-back insert gives its numbers back together with its rows.
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+from .models import Asset, Brand, CodeSequence, UseCase
+
+# series -> (model, prefix, zero padding)
+SERIES = {
+    'asset': (Asset, 'AS-', 6),
+    'brand': (Brand, 'BR', 4),
+    'usecase': (UseCase, 'UC', 4),
+}
+
+
+def format_code(series, value):
+    _, prefix, width = SERIES[series]
+    return prefix + str(value).zfill(width)
+
+
+def _highest_existing(series):
+    # first use of a series: continue after codes created before it existed
+    model, prefix, _ = SERIES[series]
+    numbers = [
+        int(code[len(prefix):])
+        for code in model.objects.filter(code__startswith=prefix).values_list('code', flat=True)
+        if code[len(prefix):].isdigit()
+    ]
+    return max(numbers, default=0)
+
+
+def allocate(series, count=1):
+    """Reserve ``count`` consecutive numbers of ``series`` and return them as a range."""
+    if series not in SERIES:
+        raise ValueError(f'Unknown code series "{series}"')
+    if count < 1:
+        raise ValueError('count must be at least 1')
+    with transaction.atomic():
+        # the UPDATE takes the row lock; it is held until the transaction ends
+        rows = CodeSequence.objects.filter(name=series)
+        if not rows.update(last_value=F('last_value') + count):
+            try:
+                with transaction.atomic():
+                    CodeSequence.objects.create(name=series, last_value=_highest_existing(series) + count)
+            except IntegrityError:
+                # another worker created the row first
+                rows.update(last_value=F('last_value') + count)
+        last = rows.values_list('last_value', flat=True).get()
+    return range(last - count + 1, last + 1)
+
+
+def next_code(series):
+    return format_code(series, allocate(series)[0])
+
+
+def code_block(series, count):
+    """``count`` fresh codes for bulk inserts (hi-lo: one round trip per block)."""
+    return [format_code(series, value) for value in allocate(series, count)]
@@ -0,0 +1,142 @@
+# backend/assetmanagement/conditional.py
+"""Conditional requests on the asset endpoints.
+
+Validators come from a small probe that runs before the main query:
+
+* one asset: its ``updated_at`` plus the columns that change without
+  touching it (transfer counters, ``current_value``);
+* a filtered asset list: ``COUNT``, ``MAX(updated_at)``,
+  ``MAX(last_transfer_at)`` and the sums of the same columns over the
+  filtered rows. Keyset (cursor) pages skip it, since it scans every
+  filtered row.
+
+Both ETags also cover the ``CacheVersion`` of the reference models whose
+names the rows show, and the query string for the representation
+(sparse fieldsets, page, filters). A GET whose ``If-None-Match`` or
+``If-Modified-Since`` still holds gets a bodiless 304; a write whose
+``If-Match`` names an older ETag gets 412 instead of overwriting someone
+else's change. The check and the write run in one transaction with the
+asset row locked, so two writers holding the same ETag cannot both pass
+it. Last-Modified ignores revaluations and reference renames,
+so clients should prefer the ETag (browsers send both and the ETag wins).
+"""
+import hashlib
+
+from django.db import transaction
+from django.db.models import Count, Max, Subquery, Sum
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+from rest_framework.permissions import SAFE_METHODS
+
+from .fieldsets import EXPAND_PARAM, FIELDS_PARAM, OMIT_PARAM
+from .models import Asset, CacheVersion
+
+# CacheVersion names (see caching.py) of models shown inside asset rows;
+# user renames bump 'department'
+REFERENCE_NAMES = ('category', 'department', 'usecase')
+# columns an asset row can change without updating updated_at
+UNTRACKED_FIELDS = ('transfer_count', 'total_transfer_cost', 'last_transfer_at', 'current_value')
+
+
+def reference_versions():
+    return sorted(CacheVersion.objects.filter(name__in=REFERENCE_NAMES).values_list('name', 'version'))
+
+
+def _version_columns():
+    # the same versions as subqueries, to fold them into a probe query
+    return {
+        f'{name}_version': Subquery(CacheVersion.objects.filter(name=name).values('version')[:1])
+        for name in REFERENCE_NAMES
+    }
+
+
+def make_etag(kind, *state):
+    digest = hashlib.sha1(repr(state).encode('utf-8')).hexdigest()
+    return f'"{kind}-{digest[:20]}"'
+
+
+def _timestamp(*moments):
+    moments = [m for m in moments if m is not None]
+    return int(max(moments).timestamp()) if moments else None
+
+
+def lock_asset(pk):
+    # only the asset row: locking the CacheVersion rows the probe reads
+    # would serialize every asset write
+    list(Asset.objects.select_for_update().filter(pk=pk).values_list('pk'))
+
+
+def asset_validators(request, pk):
+    """(ETag, Last-Modified timestamp) of one asset, or (None, None) if it does not exist.
+
+    For writes the row is locked first; call it inside a transaction.
+    """
+    if request.method not in SAFE_METHODS:
+        lock_asset(pk)
+    versions = _version_columns()
+    row = (
+        Asset.objects.filter(pk=pk).annotate(**versions)
+        .values_list('updated_at', *UNTRACKED_FIELDS, *versions).first()
+    )
+    if row is None:
+        return None, None
+    # writes always answer with the full representation
+    safe = request.method in SAFE_METHODS
+    params = [request.query_params.get(key) if safe else None for key in (FIELDS_PARAM, OMIT_PARAM, EXPAND_PARAM)]
+    etag = make_etag(f'asset-{pk}', row, params)
+    return etag, _timestamp(row[0], row[3])
+
+
+def asset_list_validators(request, queryset):
+    """(ETag, Last-Modified timestamp) of the rows ``queryset`` selects."""
+    probe = queryset.order_by().aggregate(
+        count=Count('pk'),
+        updated_at=Max('updated_at'),
+        last_transfer_at=Max('last_transfer_at'),
+        transfer_count=Sum('transfer_count'),
+        total_transfer_cost=Sum('total_transfer_cost'),
+        current_value=Sum('current_value'),
+    )
+    etag = make_etag('assets', sorted(probe.items()), reference_versions(), request.get_full_path())
+    return etag, _timestamp(probe['updated_at'], probe['last_transfer_at'])
+
+
+def set_validators(response, etag, last_modified):
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
+    # let browsers keep the body but revalidate it on every use
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def respond(request, validators, handler, *args, **kwargs):
+    """Run ``handler`` unless the request's preconditions answer it with a 304 or 412.
+
+    ``validators()`` returns (ETag, Last-Modified timestamp); an ETag of
+    None (missing object) lets the handler answer, e.g. with a 404.
+    Successful responses carry the validators of the new state. Writes
+    run the check and ``handler`` in one transaction.
+    """
+    if request.method in SAFE_METHODS:
+        return _respond(request, validators, handler, *args, **kwargs)
+    with transaction.atomic():
+        return _respond(request, validators, handler, *args, **kwargs)
+
+
+def _respond(request, validators, handler, *args, **kwargs):
+    etag, last_modified = validators()
+    if etag is not None:
+        headers = set_validators(HttpResponse(), etag, last_modified)
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified, response=headers)
+        if response is not headers:
+            return response
+
+    response = handler(request, *args, **kwargs)
+    if response.status_code == 200:
+        if request.method not in SAFE_METHODS:
+            etag, last_modified = validators()
+        if etag is not None:
+            set_validators(response, etag, last_modified)
+    return response
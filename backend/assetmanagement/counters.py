@@ -0,0 +1,138 @@
+# backend/assetmanagement/counters.py
+"""Per-asset transfer counters stored on the Asset row.
+
+``transfer_count``, ``total_transfer_cost`` and ``last_transfer_at`` are
+bumped with a single ``F()`` UPDATE whenever a transfer is created or
+deleted, so lists can show and sort by them without touching the transfer
+table. ``Asset.save()`` never writes these columns, so an instance loaded
+before the UPDATE cannot overwrite it. Writes that bypass model signals
+(``bulk_create``) must call ``record_transfers`` themselves;
+``manage.py reconcile_transfer_counters`` repairs drift. Archived
+transfers (archive.py) still count.
+"""
+from decimal import Decimal
+
+from django.apps import apps as global_apps
+from django.db import models
+from django.db.models import Case, Count, ExpressionWrapper, F, Max, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce, Greatest
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from .models import Asset, AssetTransfer
+
+COST_FIELD = models.DecimalField(max_digits=14, decimal_places=2)
+
+
+def record_transfers(asset_ids, price, transfer_date, **changes):
+    """Count one new transfer of ``price`` made at ``transfer_date`` on each asset.
+
+    Extra ``changes`` are applied in the same UPDATE.
+    """
+    return Asset.objects.filter(pk__in=asset_ids).update(
+        **changes,
+        transfer_count=F('transfer_count') + 1,
+        total_transfer_cost=F('total_transfer_cost') + Value(Decimal(price or 0), output_field=COST_FIELD),
+        last_transfer_at=Case(
+            When(last_transfer_at__gt=transfer_date, then=F('last_transfer_at')),
+            default=Value(transfer_date),
+        ),
+    )
+
+
+def _aggregates(transfer_model):
+    rows = transfer_model.objects.filter(asset=OuterRef('pk')).order_by().values('asset')
+    return (
+        Coalesce(Subquery(rows.annotate(n=Count('id')).values('n')), Value(0)),
+        Coalesce(
+            Subquery(rows.annotate(total=Sum('price')).values('total'), output_field=COST_FIELD),
+            Value(Decimal('0'), output_field=COST_FIELD),
+        ),
+        Subquery(rows.annotate(last=Max('transfer_date')).values('last')),
+    )
+
+
+def actual_values(apps=global_apps):
+    """Expressions recomputing every counter from the transfer table and its archive."""
+    count, cost, last = _aggregates(apps.get_model('assetmanagement', 'AssetTransfer'))
+    try:
+        archived_model = apps.get_model('assetmanagement', 'ArchivedTransfer')
+    except LookupError:
+        # migrations that run before the archive existed
+        return {'transfer_count': count, 'total_transfer_cost': cost, 'last_transfer_at': last}
+    archived_count, archived_cost, archived_last = _aggregates(archived_model)
+    return {
+        'transfer_count': count + archived_count,
+        'total_transfer_cost': ExpressionWrapper(cost + archived_cost, output_field=COST_FIELD),
+        # GREATEST is NULL if either side is
+        'last_transfer_at': Greatest(Coalesce(last, archived_last), Coalesce(archived_last, last)),
+    }
+
+
+def refresh(asset_ids, apps=global_apps):
+    """Recompute the counters of ``asset_ids`` exactly, in one UPDATE."""
+    asset_model = apps.get_model('assetmanagement', 'Asset')
+    return asset_model.objects.filter(pk__in=asset_ids).update(**actual_values(apps))
+
+
+# --------------------
+# Signal receivers
+# --------------------
+
+@receiver(pre_save, sender=AssetTransfer)
+def remember_transfer_state(sender, instance, **kwargs):
+    instance._counter_old = None
+    if not instance._state.adding and instance.pk is not None:
+        instance._counter_old = (
+            AssetTransfer.objects.filter(pk=instance.pk).values('asset_id', 'price').first()
+        )
+
+
+@receiver(post_save, sender=AssetTransfer)
+def count_saved_transfer(sender, instance, created, **kwargs):
+    if created:
+        record_transfers([instance.asset_id], instance.price, instance.transfer_date)
+        return
+    old = getattr(instance, '_counter_old', None)
+    if old is not None and (old['asset_id'], old['price']) != (instance.asset_id, instance.price):
+        refresh({old['asset_id'], instance.asset_id})
+
+
+@receiver(post_delete, sender=AssetTransfer)
+def count_deleted_transfer(sender, instance, **kwargs):
+    # the row is gone, so the subquery finds the previous transfer
+    last = actual_values()['last_transfer_at']
+    Asset.objects.filter(pk=instance.asset_id).update(
+        transfer_count=F('transfer_count') - 1,
+        total_transfer_cost=F('total_transfer_cost') - Value(Decimal(instance.price or 0), output_field=COST_FIELD),
+        last_transfer_at=last,
+    )
+
+
+# --------------------
+# Reconcile
+# --------------------
+
+def verify(apps=global_apps):
+    """List of (asset id, stored, expected) counter tuples for every drifted asset."""
+    asset_model = apps.get_model('assetmanagement', 'Asset')
+    expected = {f'_{name}': expr for name, expr in actual_values(apps).items()}
+    rows = asset_model.objects.annotate(**expected).order_by('pk').values_list(
+        'pk', *Asset.COUNTER_FIELDS, *expected
+    )
+    drift = []
+    for row in rows.iterator(chunk_size=2000):
+        have, want = row[1:4], row[4:7]
+        want = (want[0], Decimal(want[1]), want[2])
+        if tuple(have) != want:
+            drift.append((row[0], have, want))
+    return drift
+
+
+def reconcile(apps=global_apps, batch_size=1000):
+    """Repair every drifted asset; returns the drift that was found."""
+    drift = verify(apps)
+    ids = [pk for pk, _, _ in drift]
+    for start in range(0, len(ids), batch_size):
+        refresh(ids[start:start + batch_size], apps)
+    return drift
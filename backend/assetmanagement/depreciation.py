@@ -0,0 +1,171 @@
+# backend/assetmanagement/depreciation.py
+"""Batch depreciation engine that writes ``Asset.current_value``.
+
+Each category picks a method (``Category.depreciation_method``):
+
+* straight line: the price minus salvage is written off evenly over
+  ``useful_life_years`` and never goes below salvage;
+* declining balance: ``price * (1 - rate) ** age``, floored at salvage,
+  with ``rate`` defaulting to double declining (``2 / useful life``);
+* none: the value stays at the purchase price.
+
+Age runs from ``purchase_date`` to the ``as_of`` date. Disposed assets are
+worth 0, and assets without a category keep their price. Assets are read
+in primary-key chunks as NumPy arrays and valued in one vectorized pass
+per chunk. Only rows whose value changed are written back, as one
+multi-row UPDATE per batch, together with the matching
+``total_current_value`` rollup deltas and sync change log entries.
+
+An incremental run only revalues assets (or categories) edited since the
+previous run started. Values also change as assets age, so schedule a
+full run at least as often as the books need.
+"""
+from datetime import date
+
+import numpy as np
+from django.db import connections, router, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from . import changelog, rollups
+from .models import Asset, Category, RevaluationRun
+
+CHUNK_SIZE = 20000
+WRITE_BATCH_SIZE = 5000
+DAYS_PER_YEAR = 365.25
+METHODS = {'none': 0, 'straight_line': 1, 'declining_balance': 2}
+FIELDS = ('pk', 'category_id', 'purchase_date', 'purchase_price', 'status', 'current_value', 'current_department_id')
+
+
+def category_parameters():
+    """Sorted category ids and, per id, method code, life, salvage fraction and rate.
+
+    A leading id -1 stands for "no category" and keeps the purchase price.
+    """
+    rows = [(-1, 'none', 1, 0, 0)] + sorted(Category.objects.values_list(
+        'pk', 'depreciation_method', 'useful_life_years', 'salvage_percent', 'declining_rate'
+    ))
+    ids = np.array([row[0] for row in rows], dtype=np.int64)
+    method = np.array([METHODS.get(row[1], 0) for row in rows], dtype=np.int8)
+    life = np.array([max(row[2] or 0, 1) for row in rows], dtype=np.float64)
+    salvage = np.array([float(row[3] or 0) / 100 for row in rows], dtype=np.float64)
+    rate = np.array([2 / years if row[4] is None else float(row[4]) for row, years in zip(rows, life)],
+                    dtype=np.float64)
+    return ids, method, life, salvage, np.clip(rate, 0, 1)
+
+
+def compute_values(prices, ages, method, life, salvage, rate, disposed):
+    """Book values (int64) for equally long arrays of per-asset inputs."""
+    ages = np.maximum(ages, 0)
+    floor = prices * salvage
+    straight = prices - (prices - floor) * np.minimum(ages / life, 1)
+    declining = np.maximum(prices * np.power(1 - rate, ages), floor)
+    values = np.select([method == 1, method == 2], [straight, declining], default=prices)
+    values = np.where(disposed, 0, values)
+    return np.rint(values).astype(np.int64)
+
+
+def value_chunk(rows, params, as_of):
+    """(ids, old values, new values, rollup key arrays) for one chunk of FIELDS tuples."""
+    cat_ids, method, life, salvage, rate = params
+    ids = np.array([row[0] for row in rows], dtype=np.int64)
+    categories = np.array([-1 if row[1] is None else row[1] for row in rows], dtype=np.int64)
+    dates = np.array([row[2] for row in rows], dtype='datetime64[D]')
+    prices = np.array([float(row[3] or 0) for row in rows], dtype=np.float64)
+    statuses = np.array([row[4] for row in rows])
+    old = np.array([row[5] or 0 for row in rows], dtype=np.int64)
+    departments = np.array([-1 if row[6] is None else row[6] for row in rows], dtype=np.int64)
+
+    # category_id -> row of the parameter arrays (FKs guarantee every id is present)
+    position = np.searchsorted(cat_ids, categories)
+
+    ages = (np.datetime64(as_of, 'D') - dates).astype(np.float64) / DAYS_PER_YEAR
+    new = compute_values(
+        prices, ages, method[position], life[position], salvage[position], rate[position],
+        statuses == 'disposed',
+    )
+    keys = {'status': statuses, 'department': departments, 'category': categories}
+    return ids, old, new, keys
+
+
+def rollup_deltas(keys, diff):
+    """total_current_value deltas for the changed rows, grouped without a Python loop per row."""
+    deltas = rollups.new_deltas()
+    deltas[('total', 'assets')][2] += int(diff.sum())
+    for dimension, values in keys.items():
+        unique, inverse = np.unique(values, return_inverse=True)
+        sums = np.zeros(len(unique), dtype=np.int64)
+        np.add.at(sums, inverse, diff)
+        for key, total in zip(unique.tolist(), sums.tolist()):
+            if dimension != 'status':
+                key = '' if key == -1 else str(key)
+            deltas[(dimension, key)][2] += total
+    return deltas
+
+
+def write_values(ids, values):
+    """Set current_value for (ids, values) arrays with one UPDATE per batch."""
+    alias = router.db_for_write(Asset)
+    connection = connections[alias]
+    qn = connection.ops.quote_name
+    table, pk, column = qn(Asset._meta.db_table), qn(Asset._meta.pk.column), qn('current_value')
+    for start in range(0, len(ids), WRITE_BATCH_SIZE):
+        batch_ids = ids[start:start + WRITE_BATCH_SIZE].tolist()
+        batch_values = values[start:start + WRITE_BATCH_SIZE].tolist()
+        params = [p for pair in zip(batch_ids, batch_values) for p in pair]
+        if connection.vendor == 'postgresql':
+            rows = ', '.join(['(%s, %s)'] * len(batch_ids))
+            sql = (f'UPDATE {table} SET {column} = v.value FROM (VALUES {rows}) AS v(id, value) '
+                   f'WHERE {table}.{pk} = v.id')
+        elif connection.vendor == 'mysql':
+            rows = ' UNION ALL '.join(['SELECT %s AS id, %s AS value'] + ['SELECT %s, %s'] * (len(batch_ids) - 1))
+            sql = f'UPDATE {table} JOIN ({rows}) AS v ON {table}.{pk} = v.id SET {table}.{column} = v.value'
+        else:
+            Asset.objects.using(alias).bulk_update(
+                [Asset(pk=i, current_value=v) for i, v in zip(batch_ids, batch_values)],
+                ['current_value'],
+            )
+            continue
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+
+
+def revalue(as_of=None, incremental=False, chunk_size=CHUNK_SIZE, progress=None):
+    """Revalue the inventory (or, incrementally, what changed since the last run)."""
+    as_of = as_of or date.today()
+    run = RevaluationRun(started_at=timezone.now(), as_of=as_of, incremental=incremental)
+    queryset = Asset.objects.all()
+    if incremental:
+        last = RevaluationRun.objects.filter(finished_at__isnull=False).order_by('-started_at').first()
+        if last is not None:
+            queryset = queryset.filter(
+                Q(updated_at__gte=last.started_at) | Q(category__updated_at__gte=last.started_at)
+            )
+    queryset = queryset.order_by('pk').values_list(*FIELDS)
+    params = category_parameters()
+
+    last_pk = None
+    while True:
+        page = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+        rows = list(page[:chunk_size])
+        if not rows:
+            break
+        ids, old, new, keys = value_chunk(rows, params, as_of)
+        changed = old != new
+        with transaction.atomic():
+            write_values(ids[changed], new[changed])
+            changelog.record('asset', ids[changed].tolist())
+            rollups.apply_deltas(rollup_deltas(
+                {name: values[changed] for name, values in keys.items()}, (new - old)[changed]
+            ))
+        run.assets_seen += len(rows)
+        run.assets_changed += int(changed.sum())
+        if progress is not None:
+            progress(run)
+        if len(rows) < chunk_size:
+            break
+        last_pk = rows[-1][0]
+
+    run.finished_at = timezone.now()
+    run.save()
+    return run
@@ -0,0 +1,242 @@
+# backend/assetmanagement/events.py
+"""Server push of transfers and asset status changes.
+
+``GET /api/events/?ticket=...`` (``async_views.event_stream``) is a
+Server-Sent Events stream, optionally limited to ``?department=1,2``.
+EventSource cannot send an Authorization header, and a URL ends up in
+access logs and browser history, so the stream takes a ticket rather than
+the access token: ``POST /api/events/ticket/`` (with the usual bearer
+token) returns one, signed for this purpose only and valid for
+``EVENT_TICKET_SECONDS``. The stream ends with an ``expired`` event when
+the access token behind the ticket does; clients fetch a new ticket and
+reconnect. Under ASGI
+(``config/asgi.py``) each open stream is one coroutine waiting on its own
+bounded queue, with no thread or database connection held, so a process
+keeps thousands of idle subscribers; a comment line every
+``EVENT_HEARTBEAT_SECONDS`` stops proxies from closing them.
+
+Writes publish once their transaction commits. Each event is encoded
+once and handed to the matching subscribers through their event loop, so
+publishers may run on any thread. A subscriber that falls
+``EVENT_QUEUE_SIZE`` events behind gets a ``reset`` event and is dropped;
+clients reconnect and catch up through ``/api/sync/``.
+
+The default ``LocalBus`` only reaches subscribers of the same process.
+With several server processes, point ``EVENT_BUS`` at a class with the
+same ``subscribe``/``publish``/``has_subscribers`` methods backed by a
+shared broker.
+"""
+import asyncio
+import json
+import threading
+import time
+
+from django.conf import settings
+from django.core import signing
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+from . import fastread
+from .models import Asset, AssetTransfer
+from .serializers import AssetTransferSerializer
+
+EVENT_QUEUE_SIZE = 100
+EVENT_HEARTBEAT_SECONDS = 20
+EVENT_TICKET_SECONDS = 30
+TICKET_SALT = 'assetmanagement.events.ticket'
+HEARTBEAT = b': ping\n\n'
+EXPIRED = b'event: expired\ndata: {}\n\n'
+
+
+class Event:
+    __slots__ = ('name', 'departments', 'frame')
+
+    def __init__(self, name, departments, data):
+        self.name = name
+        self.departments = frozenset(d for d in departments if d is not None)
+        payload = json.dumps(data, cls=DjangoJSONEncoder, ensure_ascii=False)
+        self.frame = f'event: {name}\ndata: {payload}\n\n'.encode('utf-8')
+
+
+RESET = Event('reset', (), {'reason': 'too far behind, resync'})
+
+
+class Subscription:
+    def __init__(self, bus, departments=None):
+        self.bus = bus
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(getattr(settings, 'EVENT_QUEUE_SIZE', EVENT_QUEUE_SIZE))
+        self.departments = frozenset(departments) if departments else None
+
+    def wants(self, event):
+        return self.departments is None or not self.departments.isdisjoint(event.departments)
+
+    def deliver(self, event):
+        # the queue belongs to the subscriber's loop
+        try:
+            self.loop.call_soon_threadsafe(self._put, event)
+        except RuntimeError:
+            self.close()
+
+    def _put(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.close()
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(RESET)
+
+    async def get(self, timeout):
+        """The next event, or None after ``timeout`` seconds without one."""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self):
+        self.bus.unsubscribe(self)
+
+
+class LocalBus:
+    """In-process fan-out to the subscribers of this process."""
+
+    def __init__(self):
+        self.subscribers = set()
+        self.lock = threading.Lock()
+
+    def has_subscribers(self):
+        return bool(self.subscribers)
+
+    def subscribe(self, departments=None):
+        """A Subscription for the running event loop."""
+        subscription = Subscription(self, departments)
+        with self.lock:
+            self.subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            self.subscribers.discard(subscription)
+
+    def publish(self, event):
+        with self.lock:
+            subscribers = list(self.subscribers)
+        for subscription in subscribers:
+            if subscription.wants(event):
+                subscription.deliver(event)
+
+
+_bus = None
+_bus_lock = threading.Lock()
+
+
+def get_bus():
+    global _bus
+    with _bus_lock:
+        if _bus is None:
+            _bus = import_string(getattr(settings, 'EVENT_BUS', 'assetmanagement.events.LocalBus'))()
+        return _bus
+
+
+# --------------------
+# Tickets
+# --------------------
+
+def issue_ticket(user, expires_at):
+    """A ticket for the stream of ``user``, whose access ends at ``expires_at`` (epoch seconds)."""
+    return signing.dumps({'user': user.pk, 'exp': int(expires_at)}, salt=TICKET_SALT)
+
+
+def read_ticket(ticket):
+    """(user pk, access expiry) of a valid ticket, or None."""
+    try:
+        data = signing.loads(
+            ticket, salt=TICKET_SALT, max_age=getattr(settings, 'EVENT_TICKET_SECONDS', EVENT_TICKET_SECONDS)
+        )
+    except signing.BadSignature:
+        return None
+    if data['exp'] <= time.time():
+        return None
+    return data['user'], data['exp']
+
+
+async def frames(subscription, heartbeat=None, until=None):
+    """SSE frames for ``subscription`` until the epoch time ``until``; closes it when the client goes away."""
+    heartbeat = heartbeat or getattr(settings, 'EVENT_HEARTBEAT_SECONDS', EVENT_HEARTBEAT_SECONDS)
+    try:
+        yield b'retry: 5000\nevent: ready\ndata: {}\n\n'
+        while True:
+            wait = heartbeat
+            if until is not None:
+                wait = min(wait, until - time.time())
+                if wait <= 0:
+                    yield EXPIRED
+                    return
+            event = await subscription.get(wait)
+            if event is None:
+                if until is None or time.time() < until:
+                    yield HEARTBEAT
+                continue
+            yield event.frame
+            if event is RESET:
+                return
+    finally:
+        subscription.close()
+
+
+# --------------------
+# Publishing
+# --------------------
+
+def transfers_created(ids):
+    """Publish the transfers ``ids`` once the current transaction commits."""
+    ids = list(ids)
+    transaction.on_commit(lambda: _publish_transfers(ids), robust=True)
+
+
+def _publish_transfers(ids):
+    bus = get_bus()
+    if not (ids and bus.has_subscribers()):
+        return
+    # the rows /api/transfers/recent/ returns
+    reader = fastread.reader_for(AssetTransferSerializer())
+    rows = reader.render(reader.values(AssetTransfer.objects.filter(pk__in=ids).order_by('transfer_date', 'pk')))
+    for row in rows:
+        bus.publish(Event('transfer', (row['from_department'], row['to_department']), row))
+
+
+def asset_status_changed(asset, previous):
+    if not get_bus().has_subscribers():
+        return
+    data = {
+        'id': asset.pk,
+        'asset_code': asset.asset_code,
+        'name': asset.name,
+        'status': asset.status,
+        'previous_status': previous,
+        'current_department': asset.current_department_id,
+    }
+    event = Event('asset.status', (asset.current_department_id,), data)
+    transaction.on_commit(lambda: get_bus().publish(event), robust=True)
+
+
+# --------------------
+# Signal receivers
+# --------------------
+
+@receiver(post_save, sender=AssetTransfer)
+def publish_saved_transfer(sender, instance, created, **kwargs):
+    if created:
+        transfers_created([instance.pk])
+
+
+@receiver(post_save, sender=Asset)
+def publish_status_change(sender, instance, created, **kwargs):
+    # rollups.py loaded the previous values before the save
+    old = getattr(instance, '_rollup_old', None)
+    if old is not None and old['status'] != instance.status:
+        asset_status_changed(instance, old['status'])
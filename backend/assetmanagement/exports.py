@@ -0,0 +1,118 @@
+# backend/assetmanagement/exports.py
+"""Streaming CSV / JSON Lines exports of assets and transfer history.
+
+Rows are read as plain ``values_list`` tuples in primary-key chunks
+(``WHERE id > last ORDER BY id LIMIT n``) rather than with ``iterator()``:
+the MySQL driver buffers a whole result set client-side, so chunking by
+key is what keeps memory flat for million-row exports on every backend.
+"""
+import csv
+import json
+from itertools import chain
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Value
+from django.db.models.functions import Concat, Trim
+
+from .models import Asset, AssetTransfer
+
+CHUNK_SIZE = 2000
+FORMATS = {
+    'csv': ('text/csv; charset=utf-8', 'csv'),
+    'jsonl': ('application/x-ndjson', 'jsonl'),
+}
+
+
+def full_name(prefix):
+    # same value as User.get_full_name(), computed in SQL
+    return Trim(Concat(f'{prefix}__first_name', Value(' '), f'{prefix}__last_name'))
+
+
+# header -> values() expression
+ASSET_COLUMNS = {
+    'id': 'id',
+    'code': 'code',
+    'name': 'name',
+    'asset_code': 'asset_code',
+    'serial_number': 'serial_number',
+    'brand': 'brand',
+    'model': 'model',
+    'status': 'status',
+    'category': 'category__name',
+    'department': 'department__name',
+    'current_department': 'current_department__name',
+    'usecase': 'usecase__name',
+    'purchase_date': 'purchase_date',
+    'purchase_price': 'purchase_price',
+    'current_value': 'current_value',
+    'created_by': full_name('created_by'),
+    'created_at': 'created_at',
+    'updated_at': 'updated_at',
+}
+
+TRANSFER_COLUMNS = {
+    'id': 'id',
+    'asset_id': 'asset_id',
+    'asset_name': 'asset__name',
+    'asset_code': 'asset__asset_code',
+    'from_department': 'from_department__name',
+    'to_department': 'to_department__name',
+    'transfer_date': 'transfer_date',
+    'transferred_by': full_name('transferred_by'),
+    'price': 'price',
+    'notes': 'notes',
+}
+
+EXPORTS = {
+    'assets': (Asset, ASSET_COLUMNS),
+    'transfers': (AssetTransfer, TRANSFER_COLUMNS),
+}
+
+
+def export_rows(queryset, columns, chunk_size=CHUNK_SIZE):
+    """Yield one tuple per row, in id order, holding at most one chunk in memory."""
+    lookups = {f'_{name}': expr for name, expr in columns.items() if not isinstance(expr, str)}
+    fields = [expr if isinstance(expr, str) else f'_{name}' for name, expr in columns.items()]
+    queryset = queryset.annotate(**lookups).order_by('pk').values_list('pk', *fields)
+    last = None
+    while True:
+        page = queryset if last is None else queryset.filter(pk__gt=last)
+        chunk = list(page[:chunk_size])
+        for row in chunk:
+            yield row[1:]
+        if len(chunk) < chunk_size:
+            return
+        last = chunk[-1][0]
+
+
+class _Echo:
+    def write(self, value):
+        return value
+
+
+def csv_lines(headers, rows):
+    writer = csv.writer(_Echo())
+    # BOM so Excel opens the Persian text as UTF-8
+    yield '\ufeff' + writer.writerow(headers)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def jsonl_lines(headers, rows):
+    for row in rows:
+        yield json.dumps(dict(zip(headers, row)), cls=DjangoJSONEncoder, ensure_ascii=False) + '\n'
+
+
+def stream(kind, queryset, output='csv', archived=None):
+    """Iterator of text lines for ``kind`` ('assets' or 'transfers') in ``output`` format.
+
+    ``archived`` (ArchivedTransfer rows) is streamed ahead of ``queryset``.
+    """
+    _, columns = EXPORTS[kind]
+    headers = list(columns)
+    rows = export_rows(queryset, columns)
+    if archived is not None:
+        rows = chain(export_rows(archived, columns), rows)
+    if output == 'jsonl':
+        return jsonl_lines(headers, rows)
+    return csv_lines(headers, rows)
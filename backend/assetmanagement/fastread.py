@@ -0,0 +1,199 @@
+# backend/assetmanagement/fastread.py
+"""Fast read path for large list responses.
+
+``ValuesReader`` compiles a serializer's fields once per request into
+plain getters over ``.values()`` rows: no model instances, no
+``get_attribute`` walks, no per-row field dispatch. Each value is still
+converted by the serializer's own field (``to_representation``), so the
+rendered JSON is byte-identical to the serializer's.
+
+Supported fields are model fields (also through forward relations, e.g.
+``category.name``), file fields, model methods of a related object whose
+inputs are listed in ``Meta.field_sources`` (``created_by.get_full_name``)
+and method fields likewise declared there. A method field may also read
+the annotations ``Meta.field_annotations`` names ({field: {alias:
+expression factory}}); the reader adds them to the queryset. Anything
+else, such as the nested serializers of ``?expand=``, makes
+``reader_for`` return None and the view falls back to the serializer.
+"""
+from types import SimpleNamespace
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import FileField
+from rest_framework import serializers
+from rest_framework.fields import empty
+from rest_framework.relations import RelatedField
+from rest_framework.response import Response
+
+# getter result for fields the serializer leaves out of the row
+SKIP = object()
+
+
+class Unsupported(Exception):
+    pass
+
+
+class ValuesReader:
+    def __init__(self, serializer):
+        self.serializer = serializer
+        self.model = serializer.Meta.model
+        self.paths = {}
+        self.annotations = {}
+        self.getters = [
+            (name, self.compile(field)) for name, field in serializer.fields.items() if not field.write_only
+        ]
+
+    def column(self, path):
+        # values() key of a column, kept in first-use order
+        return self.paths.setdefault(path, path)
+
+    # compilation
+
+    def compile(self, field):
+        if isinstance(field, serializers.BaseSerializer):
+            raise Unsupported(field.field_name)
+        if isinstance(field, serializers.SerializerMethodField):
+            return self.compile_method_field(field)
+        if field.source == '*' or field.default is not empty:
+            raise Unsupported(field.field_name)
+
+        model, guards, prefix = self.model, [], ''
+        attrs = field.source_attrs
+        for attr in attrs[:-1]:
+            relation = self.model_field(model, attr, field)
+            if not relation.is_relation or relation.many_to_many or relation.one_to_many:
+                raise Unsupported(field.field_name)
+            guards.append(self.column(prefix + relation.name))
+            prefix += relation.name + '__'
+            model = relation.related_model
+        try:
+            model_field = model._meta.get_field(attrs[-1])
+        except FieldDoesNotExist:
+            getter = self.compile_model_method(field, model, attrs[-1], prefix)
+        else:
+            getter = self.compile_model_field(field, model_field, prefix)
+        return self.guarded(field, guards, getter) if guards else getter
+
+    def model_field(self, model, attr, field):
+        try:
+            return model._meta.get_field(attr)
+        except FieldDoesNotExist:
+            raise Unsupported(field.field_name)
+
+    def compile_model_field(self, field, model_field, prefix):
+        if not model_field.concrete or model_field.many_to_many:
+            raise Unsupported(field.field_name)
+        key = self.column(prefix + model_field.name)
+        if isinstance(model_field, FileField):
+            make_file = self.file_maker(model_field)
+            return lambda row: field.to_representation(make_file(row[key]))
+        if isinstance(field, RelatedField):
+            # PrimaryKeyRelatedField renders the raw id
+            if getattr(field, 'pk_field', None) is not None:
+                raise Unsupported(field.field_name)
+            return lambda row: row[key]
+        to_representation = field.to_representation
+        return lambda row: None if row[key] is None else to_representation(row[key])
+
+    def compile_model_method(self, field, model, name, prefix):
+        method = getattr(model, name, None)
+        sources = getattr(self.serializer.Meta, 'field_sources', {}).get(field.field_name)
+        if not callable(method) or sources is None:
+            raise Unsupported(field.field_name)
+        attrs = self.namespace_attrs(field, sources, prefix)
+        to_representation = field.to_representation
+
+        def get(row):
+            value = method(SimpleNamespace(**{attr: row[key] for attr, key in attrs}))
+            return None if value is None else to_representation(value)
+        return get
+
+    def compile_method_field(self, field):
+        sources = getattr(self.serializer.Meta, 'field_sources', {}).get(field.field_name)
+        if sources is None:
+            raise Unsupported(field.field_name)
+        attrs, files = [], {}
+        for path in sources:
+            if '__' in path:
+                raise Unsupported(field.field_name)
+            model_field = self.model_field(self.model, path, field)
+            attrs.append((model_field.attname, self.column(model_field.name)))
+            if isinstance(model_field, FileField):
+                files[model_field.attname] = self.file_maker(model_field)
+        annotations = getattr(self.serializer.Meta, 'field_annotations', {}).get(field.field_name, {})
+        for alias, expression in annotations.items():
+            self.annotations[alias] = expression
+            attrs.append((alias, self.column(alias)))
+        method = getattr(self.serializer, field.method_name)
+
+        def get(row):
+            values = {attr: files[attr](row[key]) if attr in files else row[key] for attr, key in attrs}
+            return method(SimpleNamespace(**values))
+        return get
+
+    def namespace_attrs(self, field, sources, prefix):
+        attrs = []
+        for path in sources:
+            if not path.startswith(prefix) or '__' in path[len(prefix):]:
+                raise Unsupported(field.field_name)
+            attrs.append((path[len(prefix):], self.column(path)))
+        return attrs
+
+    def file_maker(self, model_field):
+        attr_class = model_field.attr_class
+        return lambda name: attr_class(None, model_field, name)
+
+    def guarded(self, field, guards, getter):
+        # the serializer skips (or nulls) a field whose relation is missing
+        if field.allow_null:
+            missing = None
+        elif not field.required:
+            missing = SKIP
+        else:
+            raise Unsupported(field.field_name)
+        return lambda row: missing if any(row[key] is None for key in guards) else getter(row)
+
+    # reading
+
+    def values(self, queryset, keep=()):
+        """``queryset`` as dict rows holding every column the getters read, plus ``keep``."""
+        for name in keep:
+            self.column(name)
+        annotations = {alias: expression() for alias, expression in self.annotations.items()}
+        return queryset.annotate(**annotations).values(*self.paths)
+
+    def render(self, rows):
+        getters = self.getters
+        data = []
+        for row in rows:
+            item = {}
+            for name, get in getters:
+                value = get(row)
+                if value is not SKIP:
+                    item[name] = value
+            data.append(item)
+        return data
+
+
+def reader_for(serializer):
+    """A ValuesReader for ``serializer``, or None if one of its fields is unsupported."""
+    try:
+        return ValuesReader(serializer)
+    except Unsupported:
+        return None
+
+
+class FastListMixin:
+    """List view mixin serving GET lists through a ValuesReader when possible."""
+
+    def list(self, request, *args, **kwargs):
+        reader = reader_for(self.get_serializer())
+        if reader is None:
+            return super().list(request, *args, **kwargs)
+        ordering = getattr(self.paginator, 'ordering', None) or ()
+        rows = reader.values(self.filter_queryset(self.get_queryset()), [f.lstrip('-') for f in ordering])
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(reader.render(page))
+        return Response(reader.render(rows))
+
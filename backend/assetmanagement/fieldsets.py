@@ -0,0 +1,144 @@
+# backend/assetmanagement/fieldsets.py
+"""Sparse fieldsets for read endpoints.
+
+``?fields=id,name,code`` keeps only the listed fields, ``?omit=image,notes``
+drops fields, and ``?expand=category,current_department`` replaces a
+foreign key's id with the related object (as serialized by its own
+serializer). Names are top-level and comma separated; unknown names are
+ignored.
+
+``SparseFieldsMixin`` applies the parameters to a serializer on safe
+requests. ``SparseQuerysetMixin`` then trims the view's queryset to what
+the remaining fields read: ``only()`` on the needed columns and
+``select_related()`` on the needed joins, so a dropdown asking for
+``id,name`` neither joins nor fetches anything else.
+"""
+import sys
+
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+
+FIELDS_PARAM = 'fields'
+OMIT_PARAM = 'omit'
+EXPAND_PARAM = 'expand'
+
+
+def _names(params, key):
+    return [name.strip() for name in params.get(key, '').split(',') if name.strip()]
+
+
+class SparseFieldsMixin:
+    """Serializer mixin honouring ``?fields=``, ``?omit=`` and ``?expand=``.
+
+    ``Meta.expandable_fields`` maps a field to the name of the serializer
+    (in the same module) used when it is expanded. ``Meta.field_sources``
+    lists the model paths read by fields whose ``source`` does not say,
+    such as method fields and ``get_full_name``.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.sparse = False
+        # only the top-level serializer of a read sees the request here
+        request = self.context.get('request')
+        if request is None or request.method not in SAFE_METHODS:
+            return
+        params = request.query_params
+        fields, omit, expand = (_names(params, key) for key in (FIELDS_PARAM, OMIT_PARAM, EXPAND_PARAM))
+        if not (fields or omit or expand):
+            return
+
+        self.sparse = True
+        keep = set(fields) if fields else set(self.fields)
+        for name in list(self.fields):
+            if name not in keep or name in omit:
+                self.fields.pop(name)
+        module = sys.modules[type(self).__module__]
+        for name, serializer_name in getattr(self.Meta, 'expandable_fields', {}).items():
+            if name in expand and name in self.fields:
+                self.fields[name] = getattr(module, serializer_name)(read_only=True)
+
+
+def _resolve(model, path, prefix):
+    """(joins, columns) needed to read the ``__`` separated ``path`` of ``model``.
+
+    Returns None when the path is not made of forward model fields
+    (reverse relations, properties); the caller then leaves the queryset alone.
+    """
+    joins, columns = set(), set()
+    parts = path.split('__')
+    done = []
+    for i, part in enumerate(parts):
+        try:
+            field = model._meta.get_field(part)
+        except FieldDoesNotExist:
+            if i == 0:
+                return None
+            # a method of the related object, e.g. created_by.get_full_name
+            columns.update(prefix + '__'.join(done + [f.name]) for f in model._meta.concrete_fields)
+            return joins, columns
+        if not field.concrete or field.many_to_many:
+            return None
+        done.append(field.name)
+        if i == len(parts) - 1:
+            columns.add(prefix + '__'.join(done))
+        elif field.is_relation:
+            joins.add(prefix + '__'.join(done))
+            columns.add(prefix + '__'.join(done))
+            model = field.related_model
+        else:
+            return None
+    return joins, columns
+
+
+def read_paths(serializer, prefix=''):
+    """(select_related paths, only() paths) read by the fields of ``serializer``."""
+    model = serializer.Meta.model
+    joins, columns = set(), {prefix + model._meta.pk.name}
+    sources = getattr(serializer.Meta, 'field_sources', {})
+    for name, field in serializer.fields.items():
+        if isinstance(field, serializers.BaseSerializer):
+            path = field.source.replace('.', '__')
+            nested = read_paths(field, prefix + path + '__')
+            resolved = _resolve(model, path, prefix)
+            if nested is None or resolved is None:
+                return None
+            joins |= nested[0] | resolved[0] | {prefix + path}
+            columns |= nested[1] | resolved[1]
+            continue
+        paths = sources[name] if name in sources else [field.source.replace('.', '__')]
+        for path in paths:
+            resolved = _resolve(model, path, prefix)
+            if resolved is None:
+                return None
+            joins |= resolved[0]
+            columns |= resolved[1]
+    return joins, columns
+
+
+def prune(queryset, serializer, keep=()):
+    """``queryset`` limited to the columns and joins ``serializer`` reads.
+
+    ``keep`` names extra columns that must be loaded (e.g. the keyset
+    pagination cursor). Full serializers return the queryset unchanged.
+    """
+    if not getattr(serializer, 'sparse', False):
+        return queryset
+    paths = read_paths(serializer)
+    if paths is None:
+        return queryset
+    joins, columns = paths
+    queryset = queryset.select_related(None)
+    if joins:
+        queryset = queryset.select_related(*sorted(joins))
+    return queryset.only(*sorted(columns | set(keep)))
+
+
+class SparseQuerysetMixin:
+    """View mixin pruning ``get_queryset()`` to the requested fields."""
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        ordering = getattr(self.paginator, 'ordering', None) or ()
+        return prune(queryset, self.get_serializer(), [f.lstrip('-') for f in ordering])
@@ -0,0 +1,38 @@
+# backend/assetmanagement/filters.py
+"""Query-string filters shared by the list views, batch transfers and exports."""
+from .search import search_assets
+
+# ?ordering= values for the page-number asset list (prefix "-" for descending)
+ASSET_ORDERINGS = ('created_at', 'transfer_count', 'total_transfer_cost', 'last_transfer_at')
+
+
+def filter_assets(queryset, params):
+    """Apply the asset list filters (search, department, category, ordering) from ``params``."""
+    search = params.get('search', None)
+    department = params.get('department', None)
+    category = params.get('category', None)
+
+    if search:
+        queryset = search_assets(queryset, search)
+
+    if department:
+        queryset = queryset.filter(current_department__id=department)
+
+    if category:
+        queryset = queryset.filter(category__id=category)
+
+    ordering = params.get('ordering', None)
+    if ordering and ordering.lstrip('-') in ASSET_ORDERINGS:
+        queryset = queryset.order_by(ordering, '-id' if ordering.startswith('-') else 'id')
+
+    return queryset
+
+
+def filter_transfers(queryset, params):
+    """Apply the transfer list filters (asset) from ``params``."""
+    asset_id = params.get('asset', None)
+
+    if asset_id:
+        queryset = queryset.filter(asset__id=asset_id)
+
+    return queryset
@@ -0,0 +1,223 @@
+# backend/assetmanagement/importer.py
+"""Bulk asset import from CSV or XLSX.
+
+Rows are read lazily, validated in batches against lookup tables loaded
+once per run, given a block of asset codes from one sequence allocation,
+and written with ``bulk_create`` one transaction per batch.
+Rows that fail validation are skipped and reported with their line number;
+valid rows in the same batch are still imported. A file that cannot be read
+at all (CSV not in UTF-8, a damaged workbook) is rejected with
+``ImportFormatError``; the CSV encoding is checked before the first batch.
+
+Recognised columns (header row, case-insensitive): name, description,
+category, department, current_department, usecase (all by code), status,
+purchase_date (YYYY-MM-DD), purchase_price, serial_number, asset_code,
+brand, model.
+"""
+import codecs
+import csv
+import zlib
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+from zipfile import BadZipFile
+
+from django.db import transaction
+from openpyxl import load_workbook
+from openpyxl.utils.exceptions import InvalidFileException
+
+from . import changelog, rollups, search
+from .codes import code_block
+from .models import Asset, Category, Department, UseCase
+
+DEFAULT_BATCH_SIZE = 1000
+CHECK_CHUNK_SIZE = 64 * 1024
+MAX_REPORTED_ERRORS = 1000
+TEXT_FIELDS = {
+    'name': 200, 'description': None, 'serial_number': 100,
+    'asset_code': 100, 'brand': 100, 'model': 100,
+}
+STATUSES = {value for value, _ in Asset.STATUS_CHOICES}
+
+
+class ImportFormatError(ValueError):
+    pass
+
+
+# --------------------
+# Readers
+# --------------------
+
+def check_utf8(fileobj, chunk_size=CHECK_CHUNK_SIZE):
+    # a whole pass before the first batch: a file that stops decoding halfway
+    # must not leave the batches before the bad byte imported
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    try:
+        for chunk in iter(lambda: fileobj.read(chunk_size), b''):
+            decoder.decode(chunk)
+        decoder.decode(b'', final=True)
+    except UnicodeDecodeError:
+        raise ImportFormatError('The CSV file is not UTF-8 encoded; save it as "CSV UTF-8"')
+    finally:
+        fileobj.seek(0)
+
+
+def read_csv(fileobj):
+    check_utf8(fileobj)
+    reader = csv.reader(codecs.iterdecode(fileobj, 'utf-8-sig'))
+    try:
+        yield from _as_dicts(reader)
+    except csv.Error as e:
+        raise ImportFormatError(f'The CSV file is malformed: {e}')
+
+
+def read_xlsx(fileobj):
+    try:
+        workbook = load_workbook(fileobj, read_only=True, data_only=True)
+    except (BadZipFile, InvalidFileException, KeyError, OSError) as e:
+        raise ImportFormatError(f'The file is not a valid XLSX workbook: {e}')
+    try:
+        yield from _as_dicts(workbook.active.iter_rows(values_only=True))
+    except (BadZipFile, zlib.error, KeyError) as e:
+        raise ImportFormatError(f'The XLSX workbook is damaged: {e}')
+    finally:
+        workbook.close()
+
+
+def _as_dicts(rows):
+    rows = iter(rows)
+    header = next(rows, None)
+    if not header:
+        raise ImportFormatError('The file has no header row')
+    columns = [str(c or '').strip().lower() for c in header]
+    if 'name' not in columns:
+        raise ImportFormatError('The header row has no "name" column')
+    for row in rows:
+        # blank rows keep their place so reported line numbers stay right
+        yield dict(zip(columns, row)) if any(v not in (None, '') for v in row) else None
+
+
+def read_rows(fileobj, filename):
+    if filename.lower().endswith(('.xlsx', '.xlsm')):
+        return read_xlsx(fileobj)
+    if filename.lower().endswith('.csv'):
+        return read_csv(fileobj)
+    raise ImportFormatError('Only .csv and .xlsx files can be imported')
+
+
+# --------------------
+# Importer
+# --------------------
+
+class AssetImporter:
+    def __init__(self, user, batch_size=DEFAULT_BATCH_SIZE, dry_run=False):
+        self.user = user
+        self.batch_size = max(1, batch_size)
+        self.dry_run = dry_run
+        self.departments = {d.code.lower(): d.pk for d in Department.objects.only('pk', 'code')}
+        self.categories = {c.code.lower(): c.pk for c in Category.objects.only('pk', 'code')}
+        self.usecases = {u.code.lower(): u.pk for u in UseCase.objects.only('pk', 'code')}
+        self.report = {'total_rows': 0, 'created': 0, 'failed': 0, 'errors': []}
+
+    def run(self, rows):
+        # data rows start on line 2, below the header
+        numbered = enumerate(rows, start=2)
+        while True:
+            batch = list(islice(numbered, self.batch_size))
+            if not batch:
+                break
+            self.import_batch(batch)
+        return self.report
+
+    def import_batch(self, batch):
+        assets = []
+        for line, row in batch:
+            if row is None:
+                continue
+            self.report['total_rows'] += 1
+            asset, errors = self.build(row)
+            if errors:
+                self.report['failed'] += 1
+                if len(self.report['errors']) < MAX_REPORTED_ERRORS:
+                    self.report['errors'].append({'row': line, 'errors': errors})
+            else:
+                assets.append(asset)
+        if not assets:
+            return
+        if self.dry_run:
+            self.report['created'] += len(assets)
+            return
+        with transaction.atomic():
+            self.assign_codes(assets)
+            Asset.objects.bulk_create(assets, batch_size=self.batch_size)
+            self.after_insert(assets)
+        self.report['created'] += len(assets)
+
+    def build(self, row):
+        errors = {}
+        values = {}
+
+        for field, max_length in TEXT_FIELDS.items():
+            value = str(row.get(field) or '').strip()
+            if max_length and len(value) > max_length:
+                errors[field] = f'Ensure this field has no more than {max_length} characters.'
+            values[field] = value
+        if not values['name']:
+            errors['name'] = 'This field is required.'
+
+        for field, table in (('department', self.departments), ('current_department', self.departments),
+                             ('category', self.categories), ('usecase', self.usecases)):
+            code = str(row.get(field) or '').strip().lower()
+            if not code:
+                values[field + '_id'] = None
+            elif code in table:
+                values[field + '_id'] = table[code]
+            else:
+                errors[field] = f'Unknown {field.replace("_", " ")} code "{code}".'
+        if not values.get('department_id') and 'department' not in errors:
+            errors['department'] = 'This field is required.'
+        values['current_department_id'] = values.get('current_department_id') or values.get('department_id')
+
+        status = str(row.get('status') or 'active').strip()
+        if status not in STATUSES:
+            errors['status'] = f'"{status}" is not a valid choice.'
+        values['status'] = status
+
+        purchase_date = row.get('purchase_date')
+        try:
+            if isinstance(purchase_date, datetime):
+                purchase_date = purchase_date.date()
+            if not isinstance(purchase_date, date):
+                purchase_date = date.fromisoformat(str(purchase_date or '').strip())
+            values['purchase_date'] = purchase_date
+        except ValueError:
+            errors['purchase_date'] = 'Date has wrong format. Use YYYY-MM-DD.'
+
+        try:
+            price = Decimal(str(row.get('purchase_price') or '').strip().replace(',', ''))
+            if not price.is_finite() or price < 0 or price.as_tuple().exponent < -2 or abs(price) >= 10 ** 10:
+                raise InvalidOperation
+            values['purchase_price'] = price
+        except InvalidOperation:
+            errors['purchase_price'] = 'A valid number with at most 2 decimal places is required.'
+
+        if errors:
+            return None, errors
+        return Asset(created_by=self.user, **values), None
+
+    def assign_codes(self, assets):
+        for asset, code in zip(assets, code_block('asset', len(assets))):
+            asset.code = code
+
+    def after_insert(self, assets):
+        # bulk_create skips model signals: index, log and count the batch here
+        if any(asset.pk is None for asset in assets):
+            ids = dict(Asset.objects.filter(code__in=[a.code for a in assets]).values_list('code', 'id'))
+            for asset in assets:
+                asset.pk = ids[asset.code]
+        search.index_assets(assets)
+        changelog.record('asset', [asset.pk for asset in assets])
+        deltas = rollups.new_deltas()
+        for asset in assets:
+            rollups.add_asset(deltas, rollups.asset_values(asset))
+        rollups.apply_deltas(deltas)
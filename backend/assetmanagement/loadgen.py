@@ -0,0 +1,200 @@
+# backend/assetmanagement/loadgen.py
+"""Synthetic, reproducible data at production scale.
+
+``generate()`` fills the database with users, departments, categories,
+brands, usecases, assets and multi-year transfer histories using
+``bulk_create`` in fixed-size batches, so a million assets never sit in
+memory at once. The same seed always produces the same rows. Reference
+rows are matched by code or name and reused, so running it again only
+adds assets. Per-asset counters, the search index and the dashboard
+rollups are filled in as well, the way the signals would have. The sync
+change log is not: clients reload in full after a load.
+"""
+import random
+from contextlib import contextmanager
+from datetime import datetime, time as dt_time, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+
+from . import rollups, search
+from .codes import code_block
+from .models import Asset, AssetTransfer, Brand, Category, Department, UseCase, User
+
+DEFAULTS = {
+    'users': 50,
+    'departments': 30,
+    'categories': 20,
+    'brands': 50,
+    'usecases': 20,
+    'assets': 1000,
+    'transfers_per_asset': 3,
+    'years': 5,
+    'seed': 42,
+    'batch_size': 2000,
+}
+LOAD_PASSWORD = 'load-test'
+STATUS_WEIGHTS = {'active': 70, 'inactive': 10, 'under_maintenance': 15, 'disposed': 5}
+WORDS = (
+    'Laptop', 'Monitor', 'Printer', 'Scanner', 'Router', 'Switch', 'Server', 'Desk',
+    'Chair', 'Projector', 'Camera', 'Phone', 'Tablet', 'Ventilator', 'Pump',
+    'لپ‌تاپ', 'چاپگر', 'مانیتور', 'اسکنر', 'سرور', 'صندلی',
+)
+
+
+@contextmanager
+def explicit_timestamps(*fields):
+    """Let bulk_create keep the values set on auto_now/auto_now_add fields."""
+    saved = [(f, f.auto_now, f.auto_now_add) for f in fields]
+    for field, _, _ in saved:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def _ensure(model, key, rows, batch_size):
+    """Create the rows whose ``key`` value is missing; returns every matching pk."""
+    wanted = [row[key] for row in rows]
+    existing = set(model.objects.filter(**{f'{key}__in': wanted}).values_list(key, flat=True))
+    missing = [model(**row) for row in rows if row[key] not in existing]
+    model.objects.bulk_create(missing, batch_size=batch_size)
+    return list(model.objects.filter(**{f'{key}__in': wanted}).order_by('pk').values_list('pk', flat=True))
+
+
+def reference_data(options):
+    """Users, departments, categories, brands and usecases; returns their pks."""
+    size = options['batch_size']
+    password = make_password(LOAD_PASSWORD)
+    departments = _ensure(Department, 'code', [
+        {'code': f'LD{i:05d}', 'name': f'Load Department {i}',
+         'type': 'maintenance' if i % 10 == 0 else 'hospital'}
+        for i in range(options['departments'])
+    ], size)
+    users = _ensure(User, 'username', [
+        {'username': f'load_user_{i}', 'password': password, 'first_name': 'Load',
+         'last_name': f'User {i}', 'role': 'admin' if i == 0 else 'user'}
+        for i in range(options['users'])
+    ], size)
+    categories = _ensure(Category, 'code', [
+        {'code': f'LC{i:05d}', 'name': f'Load Category {i}'} for i in range(options['categories'])
+    ], size)
+
+    brand_names = [f'Load Brand {i}' for i in range(options['brands'])]
+    new_brands = sorted(set(brand_names) - set(Brand.objects.filter(name__in=brand_names).values_list('name', flat=True)))
+    if new_brands:
+        Brand.objects.bulk_create([
+            Brand(name=name, code=code) for name, code in zip(new_brands, code_block('brand', len(new_brands)))
+        ])
+    usecase_names = [f'Load Usecase {i}' for i in range(options['usecases'])]
+    new_usecases = sorted(set(usecase_names) - set(UseCase.objects.filter(name__in=usecase_names).values_list('name', flat=True)))
+    if new_usecases:
+        UseCase.objects.bulk_create([
+            UseCase(name=name, code=code) for name, code in zip(new_usecases, code_block('usecase', len(new_usecases)))
+        ])
+    usecases = list(UseCase.objects.filter(name__in=usecase_names).order_by('pk').values_list('pk', flat=True))
+    return {
+        'users': users, 'departments': departments, 'categories': categories,
+        'brands': brand_names, 'usecases': usecases,
+    }
+
+
+def _aware(day, rng):
+    moment = datetime.combine(day, dt_time(rng.randrange(8, 18), rng.randrange(60), rng.randrange(60)))
+    return timezone.make_aware(moment) if timezone.is_naive(moment) else moment
+
+
+def build_asset(rng, ref, now, years, transfers_per_asset):
+    """One unsaved asset and its unsaved transfers, counters already filled in."""
+    purchased = (now - timedelta(days=rng.randrange(1, 365 * years))).date()
+    created_at = _aware(purchased, rng)
+    home = rng.choice(ref['departments'])
+    price = Decimal(rng.randrange(50_00, 5_000_000_00)) / 100
+    asset = Asset(
+        name=f'{rng.choice(WORDS)} {rng.choice(WORDS)} {rng.randrange(10_000)}',
+        description='',
+        category_id=rng.choice(ref['categories']),
+        usecase_id=rng.choice(ref['usecases']) if ref['usecases'] else None,
+        department_id=home,
+        status=rng.choices(list(STATUS_WEIGHTS), weights=list(STATUS_WEIGHTS.values()))[0],
+        purchase_date=purchased,
+        purchase_price=price,
+        serial_number=f'SN{rng.randrange(10 ** 9):09d}',
+        asset_code=f'AC{rng.randrange(10 ** 7):07d}',
+        brand=rng.choice(ref['brands']) if ref['brands'] else '',
+        model=f'M-{rng.randrange(1000)}',
+        created_by_id=rng.choice(ref['users']),
+        created_at=created_at,
+        updated_at=created_at,
+    )
+
+    transfers = []
+    location = home
+    span = (now - created_at).total_seconds()
+    moves = rng.randint(0, 2 * transfers_per_asset)
+    for offset in sorted(rng.random() * span for _ in range(moves)):
+        target = rng.choice(ref['departments'])
+        if target == location:
+            continue
+        cost = Decimal(rng.randrange(0, 500_000)) / 100 if rng.random() < 0.6 else None
+        transfers.append(AssetTransfer(
+            from_department_id=location,
+            to_department_id=target,
+            transferred_by_id=rng.choice(ref['users']),
+            transfer_date=created_at + timedelta(seconds=offset),
+            price=cost,
+            notes='',
+        ))
+        location = target
+
+    asset.current_department_id = location
+    asset.transfer_count = len(transfers)
+    asset.total_transfer_cost = sum((t.price or 0 for t in transfers), Decimal('0'))
+    asset.last_transfer_at = transfers[-1].transfer_date if transfers else None
+    return asset, transfers
+
+
+def generate(stdout=None, **options):
+    """Insert ``options['assets']`` new assets (plus reference data); returns row counts."""
+    options = {**DEFAULTS, **{k: v for k, v in options.items() if v is not None}}
+    rng = random.Random(options['seed'])
+    now = timezone.now()
+    ref = reference_data(options)
+    if not ref['users'] or not ref['departments']:
+        raise ValueError('At least one user and one department are needed')
+
+    created = {'assets': 0, 'transfers': 0}
+    size = options['batch_size']
+    stamps = [Asset._meta.get_field('created_at'), Asset._meta.get_field('updated_at'),
+              AssetTransfer._meta.get_field('transfer_date')]
+    with explicit_timestamps(*stamps):
+        while created['assets'] < options['assets']:
+            count = min(size, options['assets'] - created['assets'])
+            pairs = [build_asset(rng, ref, now, options['years'], options['transfers_per_asset']) for _ in range(count)]
+            assets = [asset for asset, _ in pairs]
+            with transaction.atomic():
+                for asset, code in zip(assets, code_block('asset', count)):
+                    asset.code = code
+                Asset.objects.bulk_create(assets, batch_size=size)
+                if any(asset.pk is None for asset in assets):
+                    ids = dict(Asset.objects.filter(code__in=[a.code for a in assets]).values_list('code', 'id'))
+                    for asset in assets:
+                        asset.pk = ids[asset.code]
+                transfers = []
+                for asset, history in pairs:
+                    for transfer in history:
+                        transfer.asset_id = asset.pk
+                        transfers.append(transfer)
+                AssetTransfer.objects.bulk_create(transfers, batch_size=size)
+                search.index_assets(assets)
+            created['assets'] += count
+            created['transfers'] += len(transfers)
+            if stdout is not None:
+                stdout.write(f'{created["assets"]}/{options["assets"]} assets')
+
+    rollups.rebuild()
+    return created
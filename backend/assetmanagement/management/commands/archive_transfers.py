@@ -0,0 +1,37 @@
+# backend/assetmanagement/management/commands/archive_transfers.py
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from assetmanagement import archive
+
+
+class Command(BaseCommand):
+    help = ('Move transfers older than --days into the archive table, in small batches '
+            'that each lock only the rows they move')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int,
+                            default=getattr(settings, 'TRANSFER_ARCHIVE_DAYS', archive.TRANSFER_ARCHIVE_DAYS))
+        parser.add_argument('--batch-size', type=int, default=archive.ARCHIVE_BATCH_SIZE)
+        parser.add_argument('--pause', type=float, default=0,
+                            help='Seconds to sleep between batches, to leave room for other writers')
+        parser.add_argument('--dry-run', action='store_true', help='Only count the transfers due')
+
+    def handle(self, *args, **options):
+        if options['days'] < 1 or options['batch_size'] < 1 or options['pause'] < 0:
+            raise CommandError('--days and --batch-size must be at least 1, --pause not negative')
+        if options['dry_run']:
+            due = archive.due(archive.horizon(options['days'])).count()
+            self.stdout.write(f'{due} transfers are older than {options["days"]} days')
+            return
+
+        start = time.perf_counter()
+        moved = archive.archive(
+            days=options['days'], batch_size=options['batch_size'],
+            pause=options['pause'], stdout=self.stdout,
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Archived {moved} transfers in {time.perf_counter() - start:.1f}s'
+        ))
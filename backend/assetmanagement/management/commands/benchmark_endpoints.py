@@ -0,0 +1,175 @@
+# backend/assetmanagement/management/commands/benchmark_endpoints.py
+import json
+import os
+import statistics
+import subprocess
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from assetmanagement import loadgen, urls
+from assetmanagement.models import Asset, Brand, Category, Department, UseCase, User
+
+# first path segment -> model whose pk fills <int:pk>
+ROUTE_MODELS = {
+    'assets': Asset,
+    'departments': Department,
+    'categories': Category,
+    'brands': Brand,
+    'usecases': UseCase,
+}
+# extra query strings benchmarked besides the bare route
+VARIANTS = {
+    'asset-list': ['?search=Laptop', '?pagination=cursor', '?ordering=-transfer_count'],
+    'transfer-list': ['?pagination=cursor'],
+    'department-assets': ['?per_department=5'],
+}
+# routes that never finish a response
+SKIPPED = {'events'}
+REGRESSION_RATIO = 1.2
+
+
+class Command(BaseCommand):
+    help = ('Measure latency and SQL query counts of every GET route in assetmanagement/urls.py, '
+            'optionally at several data scales, and store the results as JSON')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', type=int, action='append',
+                            help='Asset count to benchmark at (repeatable, e.g. 1000 100000 1000000)')
+        parser.add_argument('--generate', action='store_true',
+                            help='Top the database up with generate_load_data rows to reach each --scale')
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--output', default=os.path.join(settings.BASE_DIR, 'benchmarks'))
+        parser.add_argument('--label', help='Result file name (default: current git commit)')
+        parser.add_argument('--compare', help='Earlier result file to compare against')
+
+    def handle(self, *args, **options):
+        if options['repeat'] < 1:
+            raise CommandError('--repeat must be at least 1')
+        user, _ = User.objects.get_or_create(username='benchmark', defaults={'role': 'admin'})
+        client = APIClient(HTTP_HOST=settings.ALLOWED_HOSTS[0] if settings.ALLOWED_HOSTS else 'localhost')
+        client.force_authenticate(user)
+
+        results = {}
+        for scale in sorted(options['scale'] or [Asset.objects.count()]):
+            current = Asset.objects.count()
+            if current < scale:
+                if not options['generate']:
+                    raise CommandError(f'The database has {current} assets; pass --generate to reach {scale}')
+                self.stdout.write(f'Generating {scale - current} assets...')
+                loadgen.generate(assets=scale - current, seed=loadgen.DEFAULTS['seed'] + current)
+            self.stdout.write(self.style.MIGRATE_HEADING(f'{Asset.objects.count()} assets'))
+            results[str(scale)] = self.run_scale(client, options['repeat'])
+
+        label = options['label'] or git_revision() or timezone.now().strftime('%Y%m%d-%H%M%S')
+        os.makedirs(options['output'], exist_ok=True)
+        path = os.path.join(options['output'], f'{label}.json')
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'label': label,
+                'created_at': timezone.now().isoformat(),
+                'database': connection.vendor,
+                'repeat': options['repeat'],
+                'results': results,
+            }, f, indent=2)
+        self.stdout.write(self.style.SUCCESS(f'Results written to {path}'))
+
+        if options['compare']:
+            with open(options['compare'], encoding='utf-8') as f:
+                self.compare(json.load(f)['results'], results)
+
+    def cases(self):
+        samples = {
+            prefix: model.objects.order_by('pk').values_list('pk', flat=True).first()
+            for prefix, model in ROUTE_MODELS.items()
+        }
+        for pattern in urls.urlpatterns:
+            name = pattern.name
+            if name in SKIPPED:
+                continue
+            route = str(pattern.pattern)
+            kwargs = {}
+            if '<int:pk>' in route:
+                pk = samples.get(route.split('/')[0])
+                if pk is None:
+                    continue
+                kwargs['pk'] = pk
+            path = reverse(name, kwargs=kwargs)
+            yield name, path
+            for query in VARIANTS.get(name, []):
+                yield f'{name}{query}', path + query
+
+    def run_scale(self, client, repeat):
+        measured = {}
+        for case, path in self.cases():
+            if case in measured:
+                continue
+            response = fetch(client, path)[0]
+            if response.status_code == 405:
+                continue
+            timings = []
+            for _ in range(repeat):
+                with CaptureQueriesContext(connection) as ctx:
+                    start = time.perf_counter()
+                    response, size = fetch(client, path)
+                    timings.append((time.perf_counter() - start) * 1000)
+            timings.sort()
+            measured[case] = {
+                'status': response.status_code,
+                'median_ms': round(statistics.median(timings), 2),
+                'p95_ms': round(timings[min(len(timings) - 1, int(len(timings) * 0.95))], 2),
+                'min_ms': round(timings[0], 2),
+                'queries': len(ctx.captured_queries),
+                'bytes': size,
+            }
+            row = measured[case]
+            self.stdout.write(
+                f'  {case:<45} {row["status"]} {row["median_ms"]:>9.2f} ms {row["queries"]:>4} queries'
+            )
+        return measured
+
+    def compare(self, before, after):
+        self.stdout.write(self.style.MIGRATE_HEADING('Compared with the earlier run'))
+        regressions = 0
+        for scale, cases in after.items():
+            for case, row in cases.items():
+                old = before.get(scale, {}).get(case)
+                if old is None:
+                    continue
+                slower = row['median_ms'] > old['median_ms'] * REGRESSION_RATIO
+                more_sql = row['queries'] > old['queries']
+                line = (f'  {scale:>8} {case:<45} {old["median_ms"]:>9.2f} -> {row["median_ms"]:>9.2f} ms  '
+                        f'{old["queries"]:>4} -> {row["queries"]:>4} queries')
+                if slower or more_sql:
+                    regressions += 1
+                    self.stdout.write(self.style.WARNING(line))
+                else:
+                    self.stdout.write(line)
+        style = self.style.WARNING if regressions else self.style.SUCCESS
+        self.stdout.write(style(f'{regressions} regressions'))
+
+
+def fetch(client, path):
+    response = client.get(path)
+    if response.streaming:
+        size = sum(len(chunk) for chunk in response.streaming_content)
+    else:
+        size = len(response.content)
+    return response, size
+
+
+def git_revision():
+    try:
+        result = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=settings.BASE_DIR, capture_output=True, text=True, timeout=5,
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return result.stdout.strip() or None
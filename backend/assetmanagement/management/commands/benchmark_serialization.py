@@ -0,0 +1,69 @@
+# backend/assetmanagement/management/commands/benchmark_serialization.py
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from assetmanagement import fastread
+from assetmanagement.models import Asset, AssetTransfer
+from assetmanagement.serializers import AssetSerializer, AssetTransferSerializer
+
+# name -> (serializer class, queryset used by the list view)
+CASES = {
+    'assets': (AssetSerializer, lambda: Asset.objects.for_read().order_by('-created_at', 'id')),
+    'transfers': (AssetTransferSerializer, lambda: AssetTransfer.objects.with_related().order_by('-transfer_date', 'id')),
+}
+
+
+class Command(BaseCommand):
+    help = ('Compare rows/sec of the DRF serializers with the values() fast read path '
+            '(query, serialization and JSON rendering) and check both render the same bytes')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1000, help='Rows per run')
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        if options['rows'] < 1 or options['repeat'] < 1:
+            raise CommandError('--rows and --repeat must be at least 1')
+        host = settings.ALLOWED_HOSTS[0] if settings.ALLOWED_HOSTS else 'localhost'
+        request = Request(APIRequestFactory().get('/api/', HTTP_HOST=host))
+        renderer = JSONRenderer()
+
+        for name, (serializer_class, queryset) in CASES.items():
+            context = {'request': request}
+
+            def serializer_path():
+                rows = list(queryset()[:options['rows']])
+                return renderer.render(serializer_class(rows, many=True, context=context).data)
+
+            def fast_path():
+                reader = fastread.reader_for(serializer_class(context=context))
+                return renderer.render(reader.render(reader.values(queryset())[:options['rows']]))
+
+            expected, actual = serializer_path(), fast_path()
+            if expected != actual:
+                raise CommandError(f'{name}: the fast read path renders different JSON')
+            count = queryset()[:options['rows']].count()
+            if not count:
+                self.stdout.write(f'{name}: no rows to benchmark')
+                continue
+
+            slow, fast = best_of(serializer_path, options['repeat']), best_of(fast_path, options['repeat'])
+            self.stdout.write(
+                f'{name:<10} {count} rows  serializer {count / slow:>10.0f} rows/s  '
+                f'values {count / fast:>10.0f} rows/s  ({slow / fast:.1f}x)'
+            )
+        self.stdout.write(self.style.SUCCESS('Both paths render identical JSON'))
+
+
+def best_of(run, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
@@ -0,0 +1,32 @@
+# backend/assetmanagement/management/commands/build_media_variants.py
+from django.core.management.base import BaseCommand
+
+from assetmanagement import media
+from assetmanagement.models import ArchivedTransfer, Asset, AssetTransfer, MediaBlob
+
+
+class Command(BaseCommand):
+    help = 'Render thumbnail/web variants for every stored asset and transfer image'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--missing-only', action='store_true',
+                            help='Skip images whose variants are already recorded')
+
+    def handle(self, *args, **options):
+        names = set()
+        for model in (Asset, AssetTransfer, ArchivedTransfer):
+            names.update(
+                model.objects.exclude(image='').exclude(image__isnull=True)
+                .values_list('image', flat=True).iterator()
+            )
+        if options['missing_only']:
+            built = dict(MediaBlob.objects.filter(name__in=names).values_list('name', 'variants'))
+            names = {
+                name for name in names
+                if not set(media.VARIANTS) <= set(built.get(name, '').split())
+            }
+
+        for name in sorted(names):
+            media.submit(media.build_variants, name)
+        media.wait()
+        self.stdout.write(self.style.SUCCESS(f'Built variants for {len(names)} images'))
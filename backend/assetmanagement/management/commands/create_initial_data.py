@@ -76,14 +76,14 @@ class Command(BaseCommand):
             else:
                 self.stdout.write(f'Category {cat_data["name"]} already exists')
 
+        # کد برند از جدول CodeSequence گرفته می‌شود
         brand_data = {
             'name': 'HP',
-            'code': 'BR0001',
             'description': 'اچ پی'
         }
         brand, created = Brand.objects.get_or_create(
-            code=brand_data['code'],
-            defaults={'name': brand_data['name'], 'description': brand_data['description']}
+            name=brand_data['name'],
+            defaults={'description': brand_data['description']}
         )
         if created:
             self.stdout.write(self.style.SUCCESS(f'Brand {brand_data["name"]} created!'))
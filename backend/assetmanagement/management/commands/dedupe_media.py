@@ -0,0 +1,77 @@
+# backend/assetmanagement/management/commands/dedupe_media.py
+import os
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+
+from assetmanagement import changelog, media
+from assetmanagement.models import ArchivedTransfer, Asset, AssetTransfer, MediaBlob
+from assetmanagement.storage import BLOB_DIR, blob_name, content_addressed_storage, file_digest
+
+
+class Command(BaseCommand):
+    help = 'Move images uploaded before content addressing into blobs/ and rebuild reference counts'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Only report how much space deduplication would save')
+
+    def handle(self, *args, **options):
+        storage = content_addressed_storage
+        legacy = set()
+        for model in (Asset, AssetTransfer, ArchivedTransfer):
+            legacy.update(
+                model.objects.exclude(image='').exclude(image__isnull=True)
+                .exclude(image__startswith=f'{BLOB_DIR}/')
+                .values_list('image', flat=True).iterator()
+            )
+
+        moves, missing, saved = {}, 0, 0
+        seen = {}
+        for name in sorted(legacy):
+            if not storage.exists(name):
+                missing += 1
+                continue
+            with storage.open(name, 'rb') as f:
+                target = blob_name(file_digest(f), os.path.splitext(name)[1])
+            if target in seen or storage.exists(target):
+                saved += storage.size(name)
+            seen[target] = name
+            moves[name] = target
+
+        if missing:
+            self.stdout.write(self.style.WARNING(f'{missing} referenced files are missing on disk'))
+        if options['dry_run']:
+            self.stdout.write(
+                f'{len(moves)} files would move into {len(set(moves.values()))} blobs, saving {saved} bytes'
+            )
+            return
+
+        for name, target in moves.items():
+            storage.store_existing(name)
+            with transaction.atomic():
+                for key, model in (('asset', Asset), ('transfer', AssetTransfer)):
+                    rows = model.objects.filter(image=name)
+                    changelog.record(key, list(rows.values_list('pk', flat=True)))
+                    rows.update(image=target)
+                ArchivedTransfer.objects.filter(image=name).update(image=target)
+            for variant in media.VARIANTS:
+                storage.delete(media.variant_name(name, variant))
+            if not all(storage.exists(media.variant_name(target, v)) for v in media.VARIANTS):
+                media.submit(media.build_variants, target)
+
+        with transaction.atomic():
+            counts = {}
+            for model in (Asset, AssetTransfer, ArchivedTransfer):
+                rows = model.objects.exclude(image='').exclude(image__isnull=True)
+                for row in rows.values('image').annotate(n=Count('id')):
+                    counts[row['image']] = counts.get(row['image'], 0) + row['n']
+            MediaBlob.objects.all().delete()
+            MediaBlob.objects.bulk_create(
+                [MediaBlob(name=name, ref_count=n) for name, n in counts.items()], batch_size=1000
+            )
+        media.wait()
+        self.stdout.write(self.style.SUCCESS(
+            f'Moved {len(moves)} files into {len(set(moves.values()))} blobs, saved {saved} bytes'
+        ))
@@ -0,0 +1,45 @@
+# backend/assetmanagement/management/commands/export_data.py
+from django.core.management.base import BaseCommand
+
+from assetmanagement import exports
+from assetmanagement.models import ArchivedTransfer
+from assetmanagement.filters import filter_assets, filter_transfers
+
+
+class Command(BaseCommand):
+    help = 'Stream assets or transfer history to CSV or JSON Lines'
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=sorted(exports.EXPORTS))
+        parser.add_argument('--output', choices=sorted(exports.FORMATS), default='csv')
+        parser.add_argument('--file', help='Write here instead of stdout')
+        parser.add_argument('--search')
+        parser.add_argument('--department', type=int)
+        parser.add_argument('--category', type=int)
+        parser.add_argument('--asset', type=int, help='Transfers of one asset only')
+        parser.add_argument('--no-archived', action='store_true',
+                            help='Leave out archived transfers (the API export includes them)')
+
+    def handle(self, *args, **options):
+        model, _ = exports.EXPORTS[options['kind']]
+        params = {k: options[k] for k in ('search', 'department', 'category', 'asset') if options[k]}
+        archived = None
+        if options['kind'] == 'assets':
+            queryset = filter_assets(model.objects.all(), params)
+        else:
+            queryset = filter_transfers(model.objects.all(), params)
+            if not options['no_archived']:
+                archived = filter_transfers(ArchivedTransfer.objects.all(), params)
+
+        lines = exports.stream(options['kind'], queryset, options['output'], archived)
+        if not options['file']:
+            for line in lines:
+                self.stdout.write(line, ending='')
+            return
+
+        count = 0
+        with open(options['file'], 'w', encoding='utf-8', newline='') as f:
+            for line in lines:
+                f.write(line)
+                count += 1
+        self.stderr.write(self.style.SUCCESS(f'Wrote {count} lines to {options["file"]}'))
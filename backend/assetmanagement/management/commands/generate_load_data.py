@@ -0,0 +1,27 @@
+# backend/assetmanagement/management/commands/generate_load_data.py
+from django.core.management.base import BaseCommand, CommandError
+
+from assetmanagement import loadgen
+
+
+class Command(BaseCommand):
+    help = 'Bulk-insert reproducible synthetic users, reference data, assets and transfer histories'
+
+    def add_arguments(self, parser):
+        for name, default in loadgen.DEFAULTS.items():
+            parser.add_argument(f'--{name.replace("_", "-")}', type=int, default=default,
+                                help=f'default: {default}')
+
+    def handle(self, *args, **options):
+        values = {name: options[name] for name in loadgen.DEFAULTS}
+        if any(value < 0 for value in values.values()):
+            raise CommandError('Counts must not be negative')
+        if values['batch_size'] < 1 or values['years'] < 1:
+            raise CommandError('--batch-size and --years must be at least 1')
+        try:
+            created = loadgen.generate(stdout=self.stdout, **values)
+        except ValueError as e:
+            raise CommandError(str(e))
+        self.stdout.write(self.style.SUCCESS(
+            f'Created {created["assets"]} assets and {created["transfers"]} transfers'
+        ))
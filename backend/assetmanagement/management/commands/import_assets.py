@@ -0,0 +1,44 @@
+# backend/assetmanagement/management/commands/import_assets.py
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from assetmanagement.importer import AssetImporter, ImportFormatError, DEFAULT_BATCH_SIZE, read_rows
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Bulk import assets from a CSV or XLSX file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV or XLSX file with a header row')
+        parser.add_argument('--user', default='admin', help='Username recorded as created_by')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+        parser.add_argument('--dry-run', action='store_true', help='Validate only, write nothing')
+        parser.add_argument('--report', help='Write the per-row error report to this JSON file')
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['user'])
+        except User.DoesNotExist:
+            raise CommandError(f'User "{options["user"]}" does not exist')
+
+        importer = AssetImporter(user, batch_size=options['batch_size'], dry_run=options['dry_run'])
+        try:
+            with open(options['path'], 'rb') as f:
+                report = importer.run(read_rows(f, options['path']))
+        except (OSError, ImportFormatError) as e:
+            raise CommandError(str(e))
+
+        for error in report['errors'][:20]:
+            self.stdout.write(self.style.WARNING(f'row {error["row"]}: {error["errors"]}'))
+        if options['report']:
+            with open(options['report'], 'w', encoding='utf-8') as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+
+        verb = 'Validated' if options['dry_run'] else 'Imported'
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} {report["created"]} of {report["total_rows"]} rows ({report["failed"]} failed)'
+        ))
@@ -0,0 +1,18 @@
+# backend/assetmanagement/management/commands/prune_changelog.py
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from assetmanagement import changelog
+
+
+class Command(BaseCommand):
+    help = 'Delete sync change log entries older than --days; clients with older tokens reload in full'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=getattr(settings, 'SYNC_RETENTION_DAYS', 30))
+
+    def handle(self, *args, **options):
+        if options['days'] < 1:
+            raise CommandError('--days must be at least 1')
+        deleted = changelog.prune(options['days'])
+        self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} change log entries'))
@@ -0,0 +1,30 @@
+# backend/assetmanagement/management/commands/rebuild_rollups.py
+from django.core.management.base import BaseCommand, CommandError
+
+from assetmanagement import rollups
+
+
+class Command(BaseCommand):
+    help = 'Rebuild (or with --verify, check) the dashboard rollup table from the Asset table'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verify', action='store_true',
+            help='Only compare stored rollups with a fresh recount; fail on drift',
+        )
+
+    def handle(self, *args, **options):
+        drift = rollups.verify()
+        for dimension, key, have, want in drift:
+            self.stdout.write(self.style.WARNING(
+                f'{dimension}:{key or "-"} stored {have} expected {want}'
+            ))
+
+        if options['verify']:
+            if drift:
+                raise CommandError(f'{len(drift)} rollup rows have drifted')
+            self.stdout.write(self.style.SUCCESS('Rollups are consistent'))
+            return
+
+        count = rollups.rebuild()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {count} rollup rows'))
@@ -0,0 +1,15 @@
+# backend/assetmanagement/management/commands/rebuild_search_index.py
+from django.core.management.base import BaseCommand
+
+from assetmanagement import search
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the asset search documents (and token index where FULLTEXT is unavailable)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        count = search.reindex(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Indexed {count} assets'))
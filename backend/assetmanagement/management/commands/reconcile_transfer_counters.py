@@ -0,0 +1,35 @@
+# backend/assetmanagement/management/commands/reconcile_transfer_counters.py
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from assetmanagement import changelog, counters
+
+
+class Command(BaseCommand):
+    help = 'Recompute (or with --verify, check) the transfer counters stored on each asset'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verify', action='store_true',
+            help='Only compare stored counters with a fresh recount; fail on drift',
+        )
+
+    def handle(self, *args, **options):
+        if options['verify']:
+            drift = counters.verify()
+        else:
+            with transaction.atomic():
+                drift = counters.reconcile()
+                changelog.record('asset', [pk for pk, _, _ in drift])
+        for pk, have, want in drift:
+            self.stdout.write(self.style.WARNING(
+                f'asset {pk}: stored {have} expected {want}'
+            ))
+
+        if options['verify']:
+            if drift:
+                raise CommandError(f'{len(drift)} assets have drifted counters')
+            self.stdout.write(self.style.SUCCESS('Transfer counters are consistent'))
+            return
+
+        self.stdout.write(self.style.SUCCESS(f'Repaired {len(drift)} assets'))
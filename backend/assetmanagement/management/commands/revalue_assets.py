@@ -0,0 +1,37 @@
+# backend/assetmanagement/management/commands/revalue_assets.py
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from assetmanagement import depreciation
+
+
+class Command(BaseCommand):
+    help = 'Recompute Asset.current_value with the depreciation method of each category'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--as-of', help='Valuation date, YYYY-MM-DD (default: today)')
+        parser.add_argument('--incremental', action='store_true',
+                            help='Only revalue assets and categories edited since the last run')
+        parser.add_argument('--chunk-size', type=int, default=depreciation.CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        try:
+            as_of = date.fromisoformat(options['as_of']) if options['as_of'] else None
+        except ValueError:
+            raise CommandError('--as-of must be a date in YYYY-MM-DD format')
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size must be at least 1')
+
+        start = time.perf_counter()
+        run = depreciation.revalue(
+            as_of=as_of,
+            incremental=options['incremental'],
+            chunk_size=options['chunk_size'],
+            progress=lambda run: self.stdout.write(f'{run.assets_seen} assets valued'),
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Revalued {run.assets_seen} assets as of {run.as_of}: {run.assets_changed} changed '
+            f'in {time.perf_counter() - start:.1f}s'
+        ))
@@ -0,0 +1,258 @@
+# backend/assetmanagement/media.py
+"""Background media pipeline for asset and transfer images.
+
+After an upload commits, a small thread pool renders resized variants
+(``thumb`` for lists, ``web`` for detail views) next to the original under
+``variants/<name>/`` and records them on the file's ``MediaBlob``. Read
+querysets annotate that record (``models.built_variants``) and serializers
+turn it into URLs through ``variant_urls`` without asking the storage,
+falling back to the original until a variant is recorded. Deleting a row
+queues its files instead of unlinking them in the request; a pool worker
+removes everything queued in one pass.
+
+Originals are content addressed (storage.py), so several rows may share
+one file. ``MediaBlob`` counts the rows using each name; variants are only
+rendered for the first reference and files are only deleted with the last.
+"""
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait as wait_futures
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import IntegrityError, close_old_connections, transaction
+from django.db.models import F
+from django.db.models.signals import post_init, pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from .models import ArchivedTransfer, Asset, AssetTransfer, MediaBlob
+
+logger = logging.getLogger(__name__)
+
+# name -> bounding box in pixels
+VARIANTS = getattr(settings, 'MEDIA_VARIANTS', {
+    'thumb': (240, 240),
+    'web': (1280, 1280),
+})
+VARIANT_QUALITY = 82
+
+_executor = None
+_executor_lock = threading.Lock()
+_pending = set()
+_delete_queue = []
+_delete_lock = threading.Lock()
+_delete_scheduled = False
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'MEDIA_WORKERS', 2),
+                thread_name_prefix='media',
+            )
+        return _executor
+
+
+def submit(fn, *args):
+    future = get_executor().submit(fn, *args)
+    with _executor_lock:
+        _pending.add(future)
+    future.add_done_callback(_forget)
+    return future
+
+
+def _forget(future):
+    with _executor_lock:
+        _pending.discard(future)
+
+
+def wait():
+    """Block until every queued media job has finished (tests, shutdown)."""
+    while True:
+        with _executor_lock:
+            pending = list(_pending)
+        if not pending:
+            return
+        wait_futures(pending)
+
+
+def variant_name(name, variant):
+    stem, _ = os.path.splitext(name)
+    return f'variants/{variant}/{stem}.jpg'
+
+
+def variant_urls(fieldfile, request=None, built=None):
+    """{variant: url} for an image field, using the original until a variant is in ``built``.
+
+    ``built`` is the file's ``MediaBlob.variants`` (the ``image_variants_built``
+    annotation of the read querysets).
+    """
+    if not fieldfile:
+        return None
+    built = (built or '').split()
+    urls = {}
+    for variant in VARIANTS:
+        if variant in built:
+            url = default_storage.url(variant_name(fieldfile.name, variant))
+        else:
+            url = fieldfile.url
+        urls[variant] = request.build_absolute_uri(url) if request is not None else url
+    return urls
+
+
+# --------------------
+# Variant generation
+# --------------------
+
+def build_variants(name):
+    from PIL import Image, ImageOps
+
+    try:
+        with default_storage.open(name, 'rb') as f:
+            original = Image.open(f)
+            original.load()
+    except (OSError, ValueError) as e:
+        logger.warning('Cannot build variants of %s: %s', name, e)
+        return
+    original = ImageOps.exif_transpose(original).convert('RGB')
+    for variant, size in VARIANTS.items():
+        image = original.copy()
+        image.thumbnail(size)
+        buffer = BytesIO()
+        image.save(buffer, 'JPEG', quality=VARIANT_QUALITY, optimize=True)
+        target = variant_name(name, variant)
+        if default_storage.exists(target):
+            default_storage.delete(target)
+        default_storage.save(target, ContentFile(buffer.getvalue()))
+    record_variants(name, VARIANTS)
+
+
+def record_variants(name, variants):
+    # pool threads get no request_started/finished to recycle their connection
+    close_old_connections()
+    try:
+        MediaBlob.objects.filter(name=name).update(variants=' '.join(variants))
+    finally:
+        close_old_connections()
+
+
+def schedule_variants(name):
+    transaction.on_commit(lambda: submit(build_variants, name))
+
+
+# --------------------
+# Batched deletion
+# --------------------
+
+def _flush_deletes():
+    global _delete_scheduled
+    with _delete_lock:
+        names, _delete_queue[:] = list(_delete_queue), []
+        _delete_scheduled = False
+    for name in names:
+        try:
+            default_storage.delete(name)
+        except OSError as e:
+            logger.warning('Could not delete %s: %s', name, e)
+    if names:
+        logger.info('Deleted %d media files', len(names))
+
+
+def _enqueue_deletes(names):
+    global _delete_scheduled
+    with _delete_lock:
+        _delete_queue.extend(names)
+        if _delete_scheduled:
+            return
+        _delete_scheduled = True
+    submit(_flush_deletes)
+
+
+def _delete_if_unreferenced(names):
+    if not MediaBlob.objects.filter(name=names[0], ref_count__gt=0).exists():
+        _enqueue_deletes(names)
+
+
+def schedule_delete(name):
+    """Delete an image and its variants once the current transaction commits.
+
+    Skipped when the name was referenced again before the commit.
+    """
+    names = [name] + [variant_name(name, variant) for variant in VARIANTS]
+    transaction.on_commit(lambda: _delete_if_unreferenced(names))
+
+
+# --------------------
+# Reference counting
+# --------------------
+
+def add_reference(name, count=1):
+    """Record ``count`` more rows using ``name``; returns the new reference count."""
+    with transaction.atomic():
+        rows = MediaBlob.objects.filter(name=name)
+        if not rows.update(ref_count=F('ref_count') + count):
+            try:
+                with transaction.atomic():
+                    MediaBlob.objects.create(name=name, ref_count=count)
+            except IntegrityError:
+                rows.update(ref_count=F('ref_count') + count)
+        return rows.values_list('ref_count', flat=True).get()
+
+
+def release_reference(name):
+    """Drop one reference to ``name``; the last one deletes the file."""
+    with transaction.atomic():
+        rows = MediaBlob.objects.filter(name=name)
+        rows.update(ref_count=F('ref_count') - 1)
+        remaining = rows.values_list('ref_count', flat=True).first()
+        if remaining is None or remaining <= 0:
+            rows.delete()
+            schedule_delete(name)
+
+
+# --------------------
+# Signal receivers
+# --------------------
+
+@receiver(post_init, sender=Asset)
+@receiver(post_init, sender=AssetTransfer)
+def remember_stored_image(sender, instance, **kwargs):
+    # the name as loaded from the database, before any new upload is assigned
+    name = instance.__dict__.get('image')
+    instance._stored_image = name if isinstance(name, str) else ''
+
+
+@receiver(pre_save, sender=Asset)
+@receiver(pre_save, sender=AssetTransfer)
+def note_new_upload(sender, instance, **kwargs):
+    # FileField commits the upload during save(), after this signal
+    instance._media_uploaded = bool(instance.image) and not instance.image._committed
+
+
+@receiver(post_save, sender=Asset)
+@receiver(post_save, sender=AssetTransfer)
+def track_image_references(sender, instance, created, **kwargs):
+    old = '' if created else instance._stored_image
+    new = instance.image.name if instance.image else ''
+    if new == old:
+        return
+    if new:
+        references = add_reference(new)
+        if instance._media_uploaded and references == 1:
+            schedule_variants(new)
+    if old:
+        release_reference(old)
+    instance._stored_image = new
+
+
+@receiver(post_delete, sender=Asset)
+@receiver(post_delete, sender=AssetTransfer)
+@receiver(post_delete, sender=ArchivedTransfer)
+def release_image(sender, instance, **kwargs):
+    if instance.image:
+        release_reference(instance.image.name)
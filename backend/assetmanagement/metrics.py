@@ -0,0 +1,257 @@
+# backend/assetmanagement/metrics.py
+"""Per-request performance metrics, exported in the Prometheus text format.
+
+``MetricsMiddleware`` records for every request, labelled by URL name and
+method: latency, SQL query count, time spent in the database, time spent
+in DRF serializers and response size. Everything lives in process memory
+as fixed-bucket histograms and is scraped from ``/api/metrics/``; with
+several workers each process reports its own series.
+
+Requests slower than ``settings.SLOW_REQUEST_THRESHOLD_MS`` are logged
+together with the SQL statements they repeated most (an N+1 shows up as
+one statement run once per row).
+"""
+import contextvars
+import logging
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+SLOW_REQUEST_THRESHOLD_MS = 500
+# statements kept per request for the duplicate report
+MAX_RECORDED_STATEMENTS = 2000
+SKIPPED_URL_NAMES = ('metrics',)
+
+TIME_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+SIZE_BUCKETS = (1024, 10240, 102400, 1048576, 10485760)
+
+# name -> (help text, buckets)
+HISTOGRAMS = {
+    'http_request_duration_seconds': ('Request latency', TIME_BUCKETS),
+    'http_request_db_queries': ('SQL queries per request', COUNT_BUCKETS),
+    'http_request_db_duration_seconds': ('Time spent in SQL per request', TIME_BUCKETS),
+    'http_request_serializer_duration_seconds': ('Time spent in DRF serializers per request', TIME_BUCKETS),
+    'http_response_size_bytes': ('Response body size (streamed bodies are not counted)', SIZE_BUCKETS),
+}
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0
+        self.count = 0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+        self.total += value
+        self.count += 1
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.histograms = {}
+        self.requests = Counter()
+
+    def observe(self, name, labels, value):
+        with self._lock:
+            key = (name, labels)
+            if key not in self.histograms:
+                self.histograms[key] = Histogram(HISTOGRAMS[name][1])
+            self.histograms[key].observe(value)
+
+    def count_request(self, labels):
+        with self._lock:
+            self.requests[labels] += 1
+
+    def reset(self):
+        with self._lock:
+            self.histograms.clear()
+            self.requests.clear()
+
+    def render(self):
+        """The registry in the Prometheus text exposition format."""
+        with self._lock:
+            lines = [
+                '# HELP http_requests_total Requests handled',
+                '# TYPE http_requests_total counter',
+            ]
+            for labels, count in sorted(self.requests.items()):
+                lines.append(f'http_requests_total{_labels(labels)} {count}')
+            for name, (help_text, _) in HISTOGRAMS.items():
+                lines += [f'# HELP {name} {help_text}', f'# TYPE {name} histogram']
+                for (metric, labels), histogram in sorted(self.histograms.items()):
+                    if metric != name:
+                        continue
+                    for bound, count in zip(histogram.buckets, histogram.counts):
+                        lines.append(f'{name}_bucket{_labels(labels, le=bound)} {count}')
+                    lines.append(f'{name}_bucket{_labels(labels, le="+Inf")} {histogram.count}')
+                    lines.append(f'{name}_sum{_labels(labels)} {histogram.total:.6f}')
+                    lines.append(f'{name}_count{_labels(labels)} {histogram.count}')
+        return '\n'.join(lines) + '\n'
+
+
+def _labels(labels, **extra):
+    pairs = list(labels) + list(extra.items())
+    escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"') for _, v in pairs)
+    return '{' + ','.join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + '}'
+
+
+registry = Registry()
+
+
+# --------------------
+# Per-request collection
+# --------------------
+
+class RequestStats:
+    def __init__(self):
+        # async views may run queries on several threads at once
+        self._lock = threading.Lock()
+        self.queries = 0
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+        self.serializer_depth = 0
+        self.statements = []
+
+    def __call__(self, execute, sql, params, many, context):
+        # connection.execute_wrapper hook
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.db_time += elapsed
+                self.queries += 1
+                if len(self.statements) < MAX_RECORDED_STATEMENTS:
+                    self.statements.append(sql)
+
+    def duplicated_statements(self, limit=3):
+        counts = Counter(normalize_sql(sql) for sql in self.statements)
+        return [(sql, n) for sql, n in counts.most_common(limit) if n > 1]
+
+
+_current = contextvars.ContextVar('request_stats', default=None)
+
+
+@contextmanager
+def recording_queries():
+    """Count this thread's queries towards the current request, if any.
+
+    Connections are per thread: code that queries from another thread
+    (``async_views.gather``) wraps its work in this as well.
+    """
+    stats = _current.get()
+    with ExitStack() as stack:
+        if stats is not None:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(stats))
+        yield
+
+
+def normalize_sql(sql):
+    sql = re.sub(r"'(?:[^']|'')*'", '?', sql)
+    sql = re.sub(r'\b\d+\b', '?', sql)
+    return re.sub(r'\(\s*\?(?:\s*,\s*\?)*\s*\)', '(...)', sql)
+
+
+def instrument_serializers():
+    """Time top-level DRF serialization of each request (nested fields count once)."""
+    from rest_framework.serializers import ListSerializer, Serializer
+
+    for cls in (Serializer, ListSerializer):
+        if getattr(cls.to_representation, '_metrics_wrapped', False):
+            continue
+        cls.to_representation = _timed(cls.to_representation)
+
+
+def _timed(method):
+    def to_representation(self, instance):
+        stats = _current.get()
+        if stats is None or stats.serializer_depth:
+            return method(self, instance)
+        stats.serializer_depth += 1
+        start = time.perf_counter()
+        try:
+            return method(self, instance)
+        finally:
+            stats.serializer_depth -= 1
+            stats.serializer_time += time.perf_counter() - start
+    to_representation._metrics_wrapped = True
+    return to_representation
+
+
+class MetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        stats = RequestStats()
+        token = _current.set(stats)
+        start = time.perf_counter()
+        try:
+            with recording_queries():
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        self.finish(request, response, stats, time.perf_counter() - start)
+        return response
+
+    async def __acall__(self, request):
+        stats = RequestStats()
+        token = _current.set(stats)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        self.finish(request, response, stats, time.perf_counter() - start)
+        return response
+
+    def finish(self, request, response, stats, duration):
+        match = getattr(request, 'resolver_match', None)
+        view = (match.url_name or match.view_name) if match else 'unmatched'
+        if view not in SKIPPED_URL_NAMES:
+            self.record(request, response, view, stats, duration)
+
+    def record(self, request, response, view, stats, duration):
+        labels = (('view', view), ('method', request.method))
+        registry.count_request(labels + (('status', response.status_code),))
+        registry.observe('http_request_duration_seconds', labels, duration)
+        registry.observe('http_request_db_queries', labels, stats.queries)
+        registry.observe('http_request_db_duration_seconds', labels, stats.db_time)
+        registry.observe('http_request_serializer_duration_seconds', labels, stats.serializer_time)
+        if not response.streaming:
+            registry.observe('http_response_size_bytes', labels, len(response.content))
+
+        threshold = getattr(settings, 'SLOW_REQUEST_THRESHOLD_MS', SLOW_REQUEST_THRESHOLD_MS)
+        if threshold is not None and duration * 1000 >= threshold:
+            duplicated = ''.join(
+                f'\n  {n}x {sql}' for sql, n in stats.duplicated_statements()
+            )
+            logger.warning(
+                'Slow request %s %s (%s): %.0f ms, %d queries, %.0f ms SQL, %.0f ms serializing%s',
+                request.method, request.get_full_path(), view, duration * 1000,
+                stats.queries, stats.db_time * 1000, stats.serializer_time * 1000, duplicated,
+            )
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.4 on 2026-10-18 17:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assetmanagement', '0002_asset_usecase'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='asset',
+            index=models.Index(fields=['-created_at', 'id'], name='asset_created_keyset_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='assettransfer',
+            index=models.Index(fields=['-transfer_date', 'id'], name='transfer_date_keyset_idx'),
+        ),
+    ]
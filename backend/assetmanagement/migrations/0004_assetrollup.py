@@ -0,0 +1,34 @@
+# Generated by Django 5.2.4 on 2026-10-18 17:39
+
+from django.db import migrations, models
+
+
+def build_rollups(apps, schema_editor):
+    from assetmanagement import rollups
+    rollups.rebuild(apps)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assetmanagement', '0003_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AssetRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dimension', models.CharField(choices=[('total', 'Total'), ('status', 'Status'), ('department', 'Current Department'), ('category', 'Category'), ('model', 'Model Row Count')], max_length=20)),
+                ('key', models.CharField(blank=True, max_length=50)),
+                ('count', models.BigIntegerField(default=0)),
+                ('total_purchase_price', models.DecimalField(decimal_places=2, default=0, max_digits=18)),
+                ('total_current_value', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('dimension', 'key'), name='unique_rollup_dimension_key')],
+            },
+        ),
+        migrations.RunPython(build_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 5.2.4 on 2026-10-18 17:41
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def add_fulltext_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'mysql':
+        return
+    schema_editor.execute(
+        'ALTER TABLE assetmanagement_assetsearchdocument '
+        'ADD FULLTEXT INDEX asset_search_fulltext (document) WITH PARSER ngram'
+    )
+
+
+def drop_fulltext_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'mysql':
+        return
+    schema_editor.execute(
+        'ALTER TABLE assetmanagement_assetsearchdocument DROP INDEX asset_search_fulltext'
+    )
+
+
+def index_existing_assets(apps, schema_editor):
+    from assetmanagement import search
+    search.reindex(apps)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assetmanagement', '0004_assetrollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AssetSearchDocument',
+            fields=[
+                ('asset', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='search_document', serialize=False, to='assetmanagement.asset')),
+                ('document', models.TextField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='AssetSearchToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.CharField(max_length=50)),
+                ('weight', models.PositiveSmallIntegerField(default=1)),
+                ('asset', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_tokens', to='assetmanagement.asset')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['token', 'asset'], name='asset_search_token_idx')],
+                'constraints': [models.UniqueConstraint(fields=('asset', 'token'), name='unique_asset_search_token')],
+            },
+        ),
+        migrations.RunPython(add_fulltext_index, drop_fulltext_index),
+        migrations.RunPython(index_existing_assets, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.4 on 2026-10-18 17:50
+
+import assetmanagement.storage
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def count_references(apps, schema_editor):
+    MediaBlob = apps.get_model('assetmanagement', 'MediaBlob')
+    counts = {}
+    for model_name in ('Asset', 'AssetTransfer'):
+        model = apps.get_model('assetmanagement', model_name)
+        rows = model.objects.exclude(image='').exclude(image__isnull=True)
+        for row in rows.values('image').annotate(n=Count('id')):
+            counts[row['image']] = counts.get(row['image'], 0) + row['n']
+    MediaBlob.objects.bulk_create(
+        [MediaBlob(name=name, ref_count=n) for name, n in counts.items()], batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assetmanagement', '0007_cacheversion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MediaBlob',
+            fields=[
+                ('name', models.CharField(max_length=255, primary_key=True, serialize=False)),
+                ('ref_count', models.IntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='asset',
+            name='image',
+            field=models.ImageField(blank=True, null=True, storage=assetmanagement.storage.image_storage, upload_to='assets/'),
+        ),
+        migrations.AlterField(
+            model_name='assettransfer',
+            name='image',
+            field=models.ImageField(blank=True, null=True, storage=assetmanagement.storage.image_storage, upload_to='asset_transfers/'),
+        ),
+        migrations.RunPython(count_references, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.4 on 2026-10-18 17:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assetmanagement', '0008_content_addressed_media'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='asset',
+            index=models.Index(fields=['status'], name='asset_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='asset',
+            index=models.Index(fields=['current_department', 'status'], name='asset_dept_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='assettransfer',
+            index=models.Index(fields=['asset', 'transfer_date', 'id'], name='transfer_asset_date_idx'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.4 on 2026-10-18 17:53
+
+from django.db import migrations, models
+
+
+def fill_counters(apps, schema_editor):
+    from assetmanagement import counters
+
+    asset_model = apps.get_model('assetmanagement', 'Asset')
+    asset_model.objects.update(**counters.actual_values(apps))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assetmanagement', '0009_hot_path_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='asset',
+            name='last_transfer_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='asset',
+            name='total_transfer_cost',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=14),
+        ),
+        migrations.AddField(
+            model_name='asset',
+            name='transfer_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='asset',
+            index=models.Index(fields=['-last_transfer_at', 'id'], name='asset_last_transfer_idx'),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
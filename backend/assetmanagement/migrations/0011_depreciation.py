@@ -0,0 +1,50 @@
+# Generated by Django 5.2.4 on 2026-10-18 18:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assetmanagement', '0010_asset_transfer_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RevaluationRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('started_at', models.DateTimeField()),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('as_of', models.DateField()),
+                ('incremental', models.BooleanField(default=False)),
+                ('assets_seen', models.IntegerField(default=0)),
+                ('assets_changed', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='declining_rate',
+            field=models.DecimalField(blank=True, decimal_places=4, max_digits=5, null=True),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='depreciation_method',
+            field=models.CharField(choices=[('none', 'No Depreciation'), ('straight_line', 'Straight Line'), ('declining_balance', 'Declining Balance')], default='straight_line', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='salvage_percent',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=5),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='useful_life_years',
+            field=models.PositiveSmallIntegerField(default=5),
+        ),
+        migrations.AlterField(
+            model_name='asset',
+            name='current_value',
+            field=models.BigIntegerField(default=1, editable=False),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.4 on 2026-10-18 18:17
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assetmanagement', '0011_depreciation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChangeLogEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model', models.CharField(choices=[('asset', 'Asset'), ('transfer', 'Asset Transfer'), ('department', 'Department'), ('category', 'Category'), ('brand', 'Brand'), ('usecase', 'Use Case')], max_length=20)),
+                ('object_id', models.BigIntegerField()),
+                ('deleted', models.BooleanField(default=False)),
+                ('changed_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['changed_at'], name='changelog_changed_at_idx')],
+            },
+        ),
+    ]
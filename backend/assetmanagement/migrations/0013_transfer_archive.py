@@ -0,0 +1,35 @@
+# Generated by Django 5.2.4 on 2026-10-18 18:34
+
+import assetmanagement.storage
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assetmanagement', '0012_change_log'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedTransfer',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('transfer_date', models.DateTimeField()),
+                ('notes', models.TextField(blank=True)),
+                ('price', models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True)),
+                ('image', models.ImageField(blank=True, null=True, storage=assetmanagement.storage.image_storage, upload_to='asset_transfers/')),
+                ('archived_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('asset', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_transfers', to='assetmanagement.asset')),
+                ('from_department', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='assetmanagement.department')),
+                ('to_department', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='assetmanagement.department')),
+                ('transferred_by', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['asset', 'transfer_date', 'id'], name='archived_asset_date_idx')],
+            },
+        ),
+    ]
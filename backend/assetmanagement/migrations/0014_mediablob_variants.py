@@ -0,0 +1,35 @@
+# Generated by Django 5.2.4 on 2026-10-18 21:05
+
+import os
+
+from django.core.files.storage import default_storage
+from django.db import migrations, models
+
+# media.VARIANTS at the time of this migration
+VARIANTS = ('thumb', 'web')
+
+
+def record_existing_variants(apps, schema_editor):
+    MediaBlob = apps.get_model('assetmanagement', 'MediaBlob')
+    for blob in MediaBlob.objects.iterator():
+        # the variants build_variants rendered before they were recorded
+        stem, _ = os.path.splitext(blob.name)
+        built = [v for v in VARIANTS if default_storage.exists(f'variants/{v}/{stem}.jpg')]
+        if built:
+            MediaBlob.objects.filter(name=blob.name).update(variants=' '.join(built))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assetmanagement', '0013_transfer_archive'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mediablob',
+            name='variants',
+            field=models.CharField(blank=True, default='', max_length=200),
+        ),
+        migrations.RunPython(record_existing_variants, migrations.RunPython.noop),
+    ]
@@ -1,7 +1,9 @@
 from django.contrib.auth.models import AbstractUser
-from django.db import models
-import uuid
-import os
+from django.db import models, router, transaction
+from django.db.models import OuterRef, Subquery
+from django.utils import timezone
+
+from .storage import image_storage
 #haha models
 
 class User(AbstractUser):
@@ -24,19 +26,41 @@ class User(AbstractUser):
     def __str__(self):
         return f"{self.username} - {self.get_role_display()}"
 
-class UseCase(models.Model):
+class SyncedModel(models.Model):
+    """Rows mirrored by /api/sync/: changelog.py logs every save and delete.
+
+    Saves and deletes run in a transaction so the log entry written by the
+    post_save/post_delete receivers commits or rolls back with the change.
+    """
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        using = kwargs.get('using') or router.db_for_write(type(self), instance=self)
+        with transaction.atomic(using=using, savepoint=False):
+            super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        using = kwargs.get('using') or router.db_for_write(type(self), instance=self)
+        with transaction.atomic(using=using, savepoint=False):
+            return super().delete(*args, **kwargs)
+
+
+class UseCase(SyncedModel):
     name = models.CharField(max_length=100)
     code = models.CharField(max_length=12, unique=True, editable=False)
     description = models.TextField(blank=True)
 
     def save(self, *args, **kwargs):
         if not self.code:
-            self.code = 'UC' + str(UseCase.objects.count() + 1).zfill(4)
+            from .codes import next_code
+            self.code = next_code('usecase')
         super().save(*args, **kwargs)
 
     def __str__(self):
         return self.name
-class Department(models.Model):
+class Department(SyncedModel):
     DEPARTMENT_TYPES = [
         ('hospital', 'Hospital Department'),
         ('maintenance', 'Maintenance Department'),
@@ -59,10 +83,21 @@ class Department(models.Model):
         return self.name
 
 
-class Category(models.Model):
+class Category(SyncedModel):
+    DEPRECIATION_CHOICES = [
+        ('none', 'No Depreciation'),
+        ('straight_line', 'Straight Line'),
+        ('declining_balance', 'Declining Balance'),
+    ]
     name = models.CharField(max_length=100)
     code = models.CharField(max_length=10, unique=True)
     description = models.TextField(blank=True)
+    # used by depreciation.py to compute Asset.current_value
+    depreciation_method = models.CharField(max_length=20, choices=DEPRECIATION_CHOICES, default='straight_line')
+    useful_life_years = models.PositiveSmallIntegerField(default=5)
+    salvage_percent = models.DecimalField(max_digits=5, decimal_places=2, default=0)
+    # yearly rate for declining balance; empty means double declining (2 / useful life)
+    declining_rate = models.DecimalField(max_digits=5, decimal_places=4, null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -73,7 +108,25 @@ class Category(models.Model):
         return self.name
 
 
-class Asset(models.Model):
+def built_variants(field='image'):
+    """Subquery of the variants rendered for the file in ``field`` ('' until there are any)."""
+    return Subquery(MediaBlob.objects.filter(name=OuterRef(field)).values('variants')[:1])
+
+
+class AssetQuerySet(models.QuerySet):
+    def with_related(self):
+        # joins every relation AssetSerializer reads for its *_name fields
+        return self.select_related(
+            'category', 'department', 'current_department', 'created_by'
+        )
+
+    def for_read(self):
+        # transfer totals are stored on the row (counters.py); only the image
+        # variants come from MediaBlob
+        return self.with_related().annotate(image_variants_built=built_variants())
+
+
+class Asset(SyncedModel):
     STATUS_CHOICES = [
         ('active', 'Active'),
         ('inactive', 'Inactive'),
@@ -111,12 +164,13 @@ class Asset(models.Model):
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='active')
     purchase_date = models.DateField()
     purchase_price = models.DecimalField(max_digits=12, decimal_places=2)
-    current_value = models.IntegerField(default=1, editable=False)
+    # depreciated book value, written by depreciation.py (manage.py revalue_assets)
+    current_value = models.BigIntegerField(default=1, editable=False)
     serial_number = models.CharField(max_length=100, blank=True)
     asset_code = models.CharField(max_length=100, blank=True)
     brand = models.CharField(max_length=100, blank=True)
     model = models.CharField(max_length=100, blank=True)
-    image = models.ImageField(upload_to='assets/', blank=True, null=True)
+    image = models.ImageField(upload_to='assets/', storage=image_storage, blank=True, null=True)
 
     created_by = models.ForeignKey(
         User,
@@ -127,21 +181,52 @@ class Asset(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # maintained by counters.py with F() updates; never written by save()
+    transfer_count = models.IntegerField(default=0, editable=False)
+    total_transfer_cost = models.DecimalField(max_digits=14, decimal_places=2, default=0, editable=False)
+    last_transfer_at = models.DateTimeField(null=True, blank=True, editable=False)
+
+    objects = AssetQuerySet.as_manager()
+
+    COUNTER_FIELDS = ('transfer_count', 'total_transfer_cost', 'last_transfer_at')
+
     class Meta:
         verbose_name_plural = "Assets"
+        indexes = [
+            # keyset pagination key for /api/assets/?pagination=cursor
+            models.Index(fields=['-created_at', 'id'], name='asset_created_keyset_idx'),
+            models.Index(fields=['status'], name='asset_status_idx'),
+            # department asset lists and per-department status counts
+            models.Index(fields=['current_department', 'status'], name='asset_dept_status_idx'),
+            models.Index(fields=['-last_transfer_at', 'id'], name='asset_last_transfer_idx'),
+        ]
 
     def save(self, *args, **kwargs):
         if not self.code:
-            self.code = str(uuid.uuid4())[:8].upper()
+            from .codes import next_code
+            self.code = next_code('asset')
         if not self.current_department and self.department:
             self.current_department = self.department
+        if not self._state.adding and kwargs.get('update_fields') is None and not kwargs.get('force_insert'):
+            # an instance loaded before a transfer must not overwrite the counters
+            kwargs['update_fields'] = [
+                f.name for f in self._meta.concrete_fields
+                if not f.primary_key and f.name not in self.COUNTER_FIELDS
+            ]
         super().save(*args, **kwargs)
 
     def __str__(self):
         return f"{self.name} ({self.code})"
 
 
-class AssetTransfer(models.Model):
+class AssetTransferQuerySet(models.QuerySet):
+    def with_related(self):
+        return self.select_related(
+            'asset', 'from_department', 'to_department', 'transferred_by'
+        ).annotate(image_variants_built=built_variants())
+
+
+class AssetTransfer(SyncedModel):
     asset = models.ForeignKey(Asset, on_delete=models.CASCADE)
     from_department = models.ForeignKey(
         Department,
@@ -161,15 +246,46 @@ class AssetTransfer(models.Model):
         related_name='initiated_transfers'
     )
     price = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True)
-    image = models.ImageField(upload_to='asset_transfers/', null=True, blank=True)
+    image = models.ImageField(upload_to='asset_transfers/', storage=image_storage, null=True, blank=True)
+
+    objects = AssetTransferQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # keyset pagination key for /api/transfers/?pagination=cursor
+            models.Index(fields=['-transfer_date', 'id'], name='transfer_date_keyset_idx'),
+            # per-asset history in date order: /api/assets/<pk>/timeline/, ?asset= filter
+            models.Index(fields=['asset', 'transfer_date', 'id'], name='transfer_asset_date_idx'),
+        ]
 
     def __str__(self):
         return f"{self.asset.name} from {self.from_department.name} to {self.to_department.name}"
 
 
+class ArchivedTransfer(models.Model):
+    """An AssetTransfer moved out of the hot table by archive.py; same id and columns."""
+    id = models.BigIntegerField(primary_key=True)
+    asset = models.ForeignKey(Asset, on_delete=models.CASCADE, related_name='archived_transfers')
+    from_department = models.ForeignKey(Department, on_delete=models.CASCADE, related_name='+')
+    to_department = models.ForeignKey(Department, on_delete=models.CASCADE, related_name='+')
+    transfer_date = models.DateTimeField()
+    notes = models.TextField(blank=True)
+    transferred_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    price = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True)
+    image = models.ImageField(upload_to='asset_transfers/', storage=image_storage, null=True, blank=True)
+    archived_at = models.DateTimeField(default=timezone.now)
+
+    objects = AssetTransferQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['asset', 'transfer_date', 'id'], name='archived_asset_date_idx'),
+        ]
+
+
 
 
-class Brand(models.Model):
+class Brand(SyncedModel):
     name = models.CharField(max_length=100)
     code = models.CharField(max_length=12, unique=True, editable=False)  # اتومات جنریت میشه
     description = models.TextField(blank=True)
@@ -177,30 +293,133 @@ class Brand(models.Model):
 
     def save(self, *args, **kwargs):
         if not self.code:
-            # تولید کد منحصر به فرد به طور اتومات (مثلا نام کوتاه+آی‌دی یا ...)
-            self.code = 'BR' + str(Brand.objects.count() + 1).zfill(4)
+            # تولید کد منحصر به فرد به طور اتومات از جدول CodeSequence
+            from .codes import next_code
+            self.code = next_code('brand')
         super().save(*args, **kwargs)
 
     def __str__(self):
         return self.name
 
-from django.db.models.signals import post_delete
-from django.dispatch import receiver
-@receiver(post_delete, sender=AssetTransfer)
-def delete_invoice_image_file(sender, instance, **kwargs):
-    if instance.image:
-        image_path = instance.image.path
-        if os.path.isfile(image_path):
-            try:
-                os.remove(image_path)
-                print(f"DELETED: {image_path}")
-            except Exception as e:
-                print(f"Error deleting {image_path}: {e}")
-        else:
-            print(f"File not found: {image_path}")
-    else:
-        print("No image to delete.")
+
+class AssetRollup(models.Model):
+    """Running asset counts and totals per dimension, kept current by rollups.py."""
+    DIMENSION_CHOICES = [
+        ('total', 'Total'),
+        ('status', 'Status'),
+        ('department', 'Current Department'),
+        ('category', 'Category'),
+        ('model', 'Model Row Count'),
+    ]
+    dimension = models.CharField(max_length=20, choices=DIMENSION_CHOICES)
+    key = models.CharField(max_length=50, blank=True)
+    count = models.BigIntegerField(default=0)
+    total_purchase_price = models.DecimalField(max_digits=18, decimal_places=2, default=0)
+    total_current_value = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['dimension', 'key'], name='unique_rollup_dimension_key'),
+        ]
+
+    def __str__(self):
+        return f"{self.dimension}:{self.key} = {self.count}"
+
+
+class AssetSearchDocument(models.Model):
+    """Normalized search text of one asset; FULLTEXT (ngram) indexed on MySQL."""
+    asset = models.OneToOneField(
+        Asset, on_delete=models.CASCADE, primary_key=True, related_name='search_document'
+    )
+    document = models.TextField()
+
+    def __str__(self):
+        return f"search document for asset {self.asset_id}"
 
 
+class AssetSearchToken(models.Model):
+    """Prefix-searchable token index used where FULLTEXT is unavailable."""
+    asset = models.ForeignKey(Asset, on_delete=models.CASCADE, related_name='search_tokens')
+    token = models.CharField(max_length=50)
+    weight = models.PositiveSmallIntegerField(default=1)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['asset', 'token'], name='unique_asset_search_token'),
+        ]
+        indexes = [
+            models.Index(fields=['token', 'asset'], name='asset_search_token_idx'),
+        ]
+
+    def __str__(self):
+        return self.token
+
+
+class CodeSequence(models.Model):
+    """Last value handed out for one code series (see codes.py)."""
+    name = models.CharField(max_length=50, primary_key=True)
+    last_value = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.name} = {self.last_value}"
 
 
+class CacheVersion(models.Model):
+    """Version counter of one cached model, bumped on every write (see caching.py)."""
+    name = models.CharField(max_length=50, primary_key=True)
+    version = models.BigIntegerField(default=1)
+
+    def __str__(self):
+        return f"{self.name} v{self.version}"
+
+
+class MediaBlob(models.Model):
+    """How many rows reference one stored image file, and which variants of it exist (see media.py)."""
+    name = models.CharField(max_length=255, primary_key=True)
+    ref_count = models.IntegerField(default=0)
+    # space separated names of the rendered variants
+    variants = models.CharField(max_length=200, blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.name} ({self.ref_count} refs)"
+
+
+class RevaluationRun(models.Model):
+    """One run of the depreciation engine; incremental runs start from the last one."""
+    started_at = models.DateTimeField()
+    finished_at = models.DateTimeField(null=True, blank=True)
+    as_of = models.DateField()
+    incremental = models.BooleanField(default=False)
+    assets_seen = models.IntegerField(default=0)
+    assets_changed = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"Revaluation as of {self.as_of} ({self.assets_changed}/{self.assets_seen} changed)"
+
+
+class ChangeLogEntry(models.Model):
+    """One save or delete of a synced row; ids order the /api/sync/ tokens (see changelog.py)."""
+    MODEL_CHOICES = [
+        ('asset', 'Asset'),
+        ('transfer', 'Asset Transfer'),
+        ('department', 'Department'),
+        ('category', 'Category'),
+        ('brand', 'Brand'),
+        ('usecase', 'Use Case'),
+    ]
+    model = models.CharField(max_length=20, choices=MODEL_CHOICES)
+    object_id = models.BigIntegerField()
+    deleted = models.BooleanField(default=False)
+    changed_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            # redelivery window and pruning (the feed itself walks the primary key)
+            models.Index(fields=['changed_at'], name='changelog_changed_at_idx'),
+        ]
+
+    def __str__(self):
+        action = 'deleted' if self.deleted else 'saved'
+        return f"#{self.pk} {self.model} {self.object_id} {action}"
@@ -0,0 +1,208 @@
+# backend/assetmanagement/pagination.py
+import base64
+import json
+from functools import reduce
+from operator import or_
+from types import SimpleNamespace
+
+from django.db import connections
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+def estimate_count(queryset):
+    """Cheap row estimate from table statistics, or None when unavailable.
+
+    Only unfiltered querysets can be estimated; filtered ones return None.
+    """
+    if queryset.query.where:
+        return None
+    connection = connections[queryset.db]
+    table = queryset.model._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == 'mysql':
+            cursor.execute(
+                "SELECT TABLE_ROWS FROM information_schema.TABLES "
+                "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s",
+                [table],
+            )
+        elif connection.vendor == 'postgresql':
+            cursor.execute(
+                "SELECT reltuples::bigint FROM pg_class WHERE relname = %s", [table]
+            )
+        else:
+            return None
+        row = cursor.fetchone()
+    return int(row[0]) if row and row[0] is not None else None
+
+
+class KeysetPagination(BasePagination):
+    """Cursor pagination over a composite, indexed sort key.
+
+    Each page is a single ``WHERE (key) > (cursor) ORDER BY key LIMIT n``
+    query, so page 1000 costs the same as page 1. Cursors are opaque
+    base64 tokens. The total is skipped unless ``?count=exact`` or
+    ``?count=approx`` is passed.
+    """
+    ordering = ('-created_at', 'id')
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.count = self.get_count(queryset, request)
+        self.fields = [queryset.model._meta.get_field(f.lstrip('-')) for f in self.ordering]
+
+        position, reverse = self.decode_cursor(request)
+        ordering = self.get_ordering(reverse)
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(self.after(position, reverse))
+
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+        if reverse:
+            results.reverse()
+
+        if reverse:
+            self.has_next = position is not None
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = position is not None
+        self.page = results
+        return results
+
+    def get_paginated_response(self, data):
+        return Response({
+            'count': self.count,
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'count': {'type': 'integer', 'nullable': True},
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if size <= 0:
+            return self.page_size
+        return min(size, self.max_page_size)
+
+    def get_count(self, queryset, request):
+        mode = request.query_params.get(self.count_query_param)
+        if mode == 'exact':
+            return queryset.count()
+        if mode == 'approx':
+            return estimate_count(queryset)
+        return None
+
+    def get_ordering(self, reverse=False):
+        if not reverse:
+            return list(self.ordering)
+        return [f[1:] if f.startswith('-') else '-' + f for f in self.ordering]
+
+    def after(self, position, reverse):
+        """Q for rows strictly after ``position`` in the (possibly reversed) ordering."""
+        clauses = []
+        for i, field in enumerate(self.get_ordering(reverse)):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            equal = {f.lstrip('-'): position[j] for j, f in enumerate(self.ordering[:i])}
+            clauses.append(Q(**equal, **{f'{name}__{lookup}': position[i]}))
+        return reduce(or_, clauses)
+
+    # cursor encoding
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')))
+            values = payload['p']
+            reverse = bool(payload.get('r'))
+            if len(values) != len(self.ordering):
+                raise ValueError
+            position = [field.to_python(v) for field, v in zip(self.fields, values)]
+        except Exception:
+            raise NotFound(self.invalid_cursor_message)
+        return position, reverse
+
+    def encode_cursor(self, obj, reverse):
+        if isinstance(obj, dict):
+            # a row of a values() queryset (fastread.FastListMixin)
+            obj = SimpleNamespace(**{field.attname: obj[field.name] for field in self.fields})
+        values = [field.value_to_string(obj) for field in self.fields]
+        payload = json.dumps({'p': values, 'r': int(reverse)}, separators=(',', ':'))
+        encoded = base64.urlsafe_b64encode(payload.encode('ascii')).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.page[0], reverse=True)
+
+
+class AssetKeysetPagination(KeysetPagination):
+    ordering = ('-created_at', 'id')
+
+
+class TransferKeysetPagination(KeysetPagination):
+    ordering = ('-transfer_date', 'id')
+
+
+class KeysetPaginationMixin:
+    """Opt-in keyset pagination for list views.
+
+    ``?pagination=cursor`` (or any request carrying a ``cursor``) switches
+    the view from the global page-number paginator to
+    ``keyset_pagination_class``.
+    """
+    keyset_pagination_class = None
+
+    def use_keyset_pagination(self):
+        params = self.request.query_params
+        return self.keyset_pagination_class is not None and (
+            params.get('pagination') == 'cursor' or 'cursor' in params
+        )
+
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator'):
+            if self.use_keyset_pagination():
+                self._paginator = self.keyset_pagination_class()
+            else:
+                self._paginator = None if self.pagination_class is None else self.pagination_class()
+        return self._paginator
@@ -0,0 +1,221 @@
+# backend/assetmanagement/replicas.py
+"""Read replica routing.
+
+``ReplicaMiddleware`` picks one healthy alias from ``DATABASE_REPLICAS``
+for each safe request to a route in ``REPLICA_ROUTES`` (lists, exports,
+dashboard) and ``ReplicaRouter`` sends that request's reads there. The
+whole request reads from the same replica, over that alias's persistent
+connection (``CONN_MAX_AGE``). Everything else, all writes, and any read
+inside a transaction on the primary stay on ``default``.
+
+Read-your-writes: a successful unsafe request pins its bearer token to
+the primary for ``REPLICA_PIN_SECONDS``, so the list reloaded right after
+a transfer shows it. Pins live in the ``REPLICA_PIN_CACHE`` cache, which
+every process serving the API must see: the middleware refuses to start
+with replicas and a per-process backend (LocMem, Dummy). A database cache
+is read from the primary, never from a replica.
+
+Lag: each replica's ``Seconds_Behind_Source`` is checked at most every
+``REPLICA_CHECK_SECONDS``; a replica that lags more than
+``REPLICA_MAX_LAG_SECONDS``, has stopped replicating or cannot be reached
+is skipped until the next check, and with none left reads go to the
+primary.
+"""
+import contextvars
+import hashlib
+import itertools
+import logging
+import threading
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+from django.urls import Resolver404, resolve
+from django.utils.connection import ConnectionDoesNotExist
+
+logger = logging.getLogger(__name__)
+
+REPLICA_ROUTES = (
+    'asset-list', 'asset-export', 'transfer-list', 'transfer-export', 'transfer-recent',
+    'department-assets', 'dashboard_stats',
+)
+REPLICA_PIN_CACHE = 'replica-pins'
+REPLICA_PIN_SECONDS = 10
+REPLICA_MAX_LAG_SECONDS = 5
+REPLICA_CHECK_SECONDS = 5
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+# a pin written there is invisible to the other processes
+PROCESS_LOCAL_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+# alias the current request reads from; None reads from the primary
+_reading = contextvars.ContextVar('replica_alias', default=None)
+
+# alias -> (monotonic time of the check, usable)
+_health = {}
+_health_lock = threading.Lock()
+_turn = itertools.count()
+
+
+def setting(name, default):
+    return getattr(settings, name, default)
+
+
+def replica_lag(alias):
+    """Seconds the replica ``alias`` is behind, or None when it is not replicating."""
+    connection = connections[alias]
+    if connection.vendor != 'mysql':
+        # nothing to ask (local SQLite copies in development)
+        return 0
+    with connection.cursor() as cursor:
+        try:
+            cursor.execute('SHOW REPLICA STATUS')
+        except DatabaseError:
+            # MySQL before 8.0.22
+            cursor.execute('SHOW SLAVE STATUS')
+        row = cursor.fetchone()
+        columns = [column[0] for column in cursor.description or ()]
+    if row is None:
+        return None
+    status = dict(zip(columns, row))
+    return status.get('Seconds_Behind_Source', status.get('Seconds_Behind_Master'))
+
+
+def check(alias):
+    """Whether ``alias`` can serve reads now."""
+    try:
+        lag = replica_lag(alias)
+    except (ConnectionDoesNotExist, DatabaseError) as e:
+        logger.warning('Replica %s is unreachable: %s', alias, e)
+        return False
+    if lag is None or lag > setting('REPLICA_MAX_LAG_SECONDS', REPLICA_MAX_LAG_SECONDS):
+        logger.warning('Replica %s skipped, lag %s', alias, lag)
+        return False
+    return True
+
+
+def usable(alias):
+    now = time.monotonic()
+    with _health_lock:
+        checked = _health.get(alias)
+    if checked is not None and now - checked[0] < setting('REPLICA_CHECK_SECONDS', REPLICA_CHECK_SECONDS):
+        return checked[1]
+    ok = check(alias)
+    with _health_lock:
+        _health[alias] = (now, ok)
+    return ok
+
+
+def choose_replica():
+    """A healthy replica alias in turn, or None."""
+    aliases = [alias for alias in setting('DATABASE_REPLICAS', []) if usable(alias)]
+    if not aliases:
+        return None
+    return aliases[next(_turn) % len(aliases)]
+
+
+def _pin_key(request):
+    authorization = request.headers.get('Authorization')
+    if not authorization:
+        return None
+    return 'replica-pin:' + hashlib.sha1(authorization.encode('utf-8')).hexdigest()
+
+
+def _pins():
+    return caches[setting('REPLICA_PIN_CACHE', REPLICA_PIN_CACHE)]
+
+
+def check_pin_cache():
+    """Raise ImproperlyConfigured unless the pin cache is shared between processes."""
+    alias = setting('REPLICA_PIN_CACHE', REPLICA_PIN_CACHE)
+    backend = settings.CACHES.get(alias, {}).get('BACKEND')
+    if backend is None or backend in PROCESS_LOCAL_CACHES:
+        raise ImproperlyConfigured(
+            f'DATABASE_REPLICAS needs REPLICA_PIN_CACHE ({alias!r}) to be a cache shared by every '
+            f'API process, not {backend or "a missing alias"}; writes would not pin reads to the primary.'
+        )
+
+
+def is_pinned(request):
+    key = _pin_key(request)
+    return key is not None and _pins().get(key) is not None
+
+
+def pin(request):
+    if not setting('DATABASE_REPLICAS', []):
+        return
+    key = _pin_key(request)
+    if key is not None:
+        _pins().set(key, 1, setting('REPLICA_PIN_SECONDS', REPLICA_PIN_SECONDS))
+
+
+def replica_for(request):
+    """The replica alias ``request`` should read from, or None for the primary."""
+    if request.method not in SAFE_METHODS or not setting('DATABASE_REPLICAS', []):
+        return None
+    try:
+        name = resolve(request.path_info).url_name
+    except Resolver404:
+        return None
+    if name not in setting('REPLICA_ROUTES', REPLICA_ROUTES) or is_pinned(request):
+        return None
+    return choose_replica()
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        alias = _reading.get()
+        if alias is None or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return None
+        if model._meta.app_label == 'django_cache':
+            # DatabaseCache rows (replica pins among them) are read where they were written
+            return None
+        return alias
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # replicas hold the same rows as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in setting('DATABASE_REPLICAS', [])
+
+
+class ReplicaMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if setting('DATABASE_REPLICAS', []):
+            check_pin_cache()
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        # set, not reset: streamed bodies (exports) still read after this returns
+        _reading.set(replica_for(request))
+        response = self.get_response(request)
+        self.finish(request, response)
+        return response
+
+    async def __acall__(self, request):
+        # a due lag check queries the replica
+        _reading.set(await sync_to_async(replica_for)(request))
+        response = await self.get_response(request)
+        self.finish(request, response)
+        return response
+
+    def finish(self, request, response):
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            pin(request)
@@ -0,0 +1,247 @@
+# backend/assetmanagement/rollups.py
+"""Dashboard rollups: asset counts and totals kept current on every write.
+
+Each Asset contributes one unit to the ``total``, ``status``, ``department``
+(current department) and ``category`` rows. Saves and deletes apply the
+difference between the old and new contribution with ``F()`` increments,
+so concurrent writers never overwrite each other's counts. The old
+contribution is read with ``select_for_update`` inside the save's or
+delete's transaction (``SyncedModel`` opens one), so two concurrent writes
+of one asset take turns and the second sees the first's result; partial
+saves (``update_fields``) take the fields they do not write from that row
+too. Writes that bypass model signals (``bulk_create``,
+``QuerySet.update``) must call ``apply_deltas`` themselves, under the same
+lock (see the batch transfer view). Deleting a category or department is
+one: the ``SET_NULL`` on its assets is a bulk UPDATE, so its receivers
+move those assets to the ``''`` key first.
+
+Anything that still slips past (raw SQL, a bulk path without its
+``apply_deltas``) leaves drift that no later delta corrects.
+``manage.py rebuild_rollups --verify`` reports it and fails, e.g. from a
+nightly job; ``manage.py rebuild_rollups`` recomputes every row from the
+Asset table in one transaction. It locks the rollup rows before counting,
+so asset writes in flight commit first and later ones wait for it (it
+holds them up for the length of the recount).
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.apps import apps as global_apps
+from django.db import transaction
+from django.db.models import Count, F, Sum, Value
+from django.db.models.functions import Coalesce
+from django.db.models.signals import pre_delete, pre_save, post_save, post_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import Asset, AssetRollup, Brand, Category, Department
+
+TRACKED_FIELDS = (
+    'status', 'current_department_id', 'category_id', 'purchase_price', 'current_value'
+)
+COUNTED_MODELS = ('department', 'category', 'brand')
+
+
+def asset_keys(values):
+    department_id = values['current_department_id']
+    category_id = values['category_id']
+    return [
+        ('total', 'assets'),
+        ('status', values['status']),
+        ('department', '' if department_id is None else str(department_id)),
+        ('category', '' if category_id is None else str(category_id)),
+    ]
+
+
+def add_asset(deltas, values, sign=1):
+    """Add (sign=1) or remove (sign=-1) one asset's contribution to ``deltas``."""
+    price = Decimal(values['purchase_price'] or 0)
+    value = values['current_value'] or 0
+    for key in asset_keys(values):
+        delta = deltas[key]
+        delta[0] += sign
+        delta[1] += sign * price
+        delta[2] += sign * value
+    return deltas
+
+
+def new_deltas():
+    return defaultdict(lambda: [0, Decimal('0'), 0])
+
+
+def asset_values(instance):
+    return {field: getattr(instance, field) for field in TRACKED_FIELDS}
+
+
+def apply_deltas(deltas):
+    """Apply {(dimension, key): [count, purchase_price, current_value]} atomically."""
+    now = timezone.now()
+    with transaction.atomic():
+        # fixed order so concurrent transactions lock rows the same way
+        for (dimension, key), (count, price, value) in sorted(deltas.items()):
+            if not (count or price or value):
+                continue
+            changes = {
+                'count': F('count') + count,
+                'total_purchase_price': F('total_purchase_price') + price,
+                'total_current_value': F('total_current_value') + value,
+                'updated_at': now,
+            }
+            rows = AssetRollup.objects.filter(dimension=dimension, key=key)
+            if not rows.update(**changes):
+                AssetRollup.objects.get_or_create(dimension=dimension, key=key)
+                rows.update(**changes)
+
+
+# --------------------
+# Signal receivers
+# --------------------
+
+def locked_values(pk):
+    """The stored tracked fields of asset ``pk``, row locked until the transaction ends."""
+    return Asset.objects.select_for_update().filter(pk=pk).values(*TRACKED_FIELDS).first()
+
+
+@receiver(pre_save, sender=Asset)
+def remember_asset_rollup_state(sender, instance, **kwargs):
+    instance._rollup_old = None
+    if not instance._state.adding and instance.pk is not None:
+        instance._rollup_old = locked_values(instance.pk)
+
+
+@receiver(post_save, sender=Asset)
+def update_asset_rollups(sender, instance, update_fields=None, **kwargs):
+    deltas = new_deltas()
+    old = getattr(instance, '_rollup_old', None)
+    new = asset_values(instance)
+    if old is not None:
+        add_asset(deltas, old, -1)
+        if update_fields is not None:
+            # columns the save did not write keep their stored values
+            written = {name.removesuffix('_id') for name in update_fields}
+            new = {field: new[field] if field.removesuffix('_id') in written else old[field] for field in new}
+    add_asset(deltas, new)
+    apply_deltas(deltas)
+
+
+@receiver(pre_delete, sender=Asset)
+def remember_deleted_asset_state(sender, instance, **kwargs):
+    # the collector's transaction is open: remove what is stored, not a stale copy
+    instance._rollup_old = locked_values(instance.pk)
+
+
+@receiver(post_delete, sender=Asset)
+def remove_asset_rollups(sender, instance, **kwargs):
+    old = getattr(instance, '_rollup_old', None) or asset_values(instance)
+    apply_deltas(add_asset(new_deltas(), old, -1))
+
+
+ORPHANED_FIELDS = {Category: 'category_id', Department: 'current_department_id'}
+
+
+@receiver(pre_delete, sender=Category)
+@receiver(pre_delete, sender=Department)
+def move_orphaned_assets(sender, instance, **kwargs):
+    # the collector nulls these FKs with one UPDATE and no asset signals
+    field = ORPHANED_FIELDS[sender]
+    assets = Asset.objects.select_for_update().filter(**{field: instance.pk})
+    if sender is Department:
+        # the assets it owns are deleted with it and remove their own contribution
+        assets = assets.exclude(department_id=instance.pk)
+    deltas = new_deltas()
+    for old in assets.values(*TRACKED_FIELDS):
+        add_asset(deltas, old, -1)
+        add_asset(deltas, {**old, field: None})
+    apply_deltas(deltas)
+
+
+def _count_model_row(sender, sign):
+    deltas = new_deltas()
+    deltas[('model', sender._meta.model_name)][0] = sign
+    apply_deltas(deltas)
+
+
+@receiver(post_save, sender=Department)
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=Brand)
+def count_created_rows(sender, instance, created, **kwargs):
+    if created:
+        _count_model_row(sender, 1)
+
+
+@receiver(post_delete, sender=Department)
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=Brand)
+def count_deleted_rows(sender, instance, **kwargs):
+    _count_model_row(sender, -1)
+
+
+# --------------------
+# Rebuild / verify
+# --------------------
+
+def compute(apps=global_apps):
+    """Rollups recomputed from scratch with a handful of GROUP BY queries."""
+    asset_model = apps.get_model('assetmanagement', 'Asset')
+    totals = {
+        'count': Count('id'),
+        'price': Coalesce(Sum('purchase_price'), Value(Decimal('0'))),
+        'value': Coalesce(Sum('current_value'), Value(0)),
+    }
+    result = {}
+    groups = [
+        ('total', None),
+        ('status', 'status'),
+        ('department', 'current_department_id'),
+        ('category', 'category_id'),
+    ]
+    for dimension, field in groups:
+        if field is None:
+            row = asset_model.objects.aggregate(**totals)
+            if row['count']:
+                result[(dimension, 'assets')] = (row['count'], row['price'], row['value'])
+            continue
+        for row in asset_model.objects.order_by().values(field).annotate(**totals):
+            key = '' if row[field] is None else str(row[field])
+            result[(dimension, key)] = (row['count'], Decimal(row['price']), row['value'])
+    for name in COUNTED_MODELS:
+        model = apps.get_model('assetmanagement', name)
+        result[('model', name)] = (model.objects.count(), Decimal('0'), 0)
+    return result
+
+
+def stored(apps=global_apps):
+    rollup_model = apps.get_model('assetmanagement', 'AssetRollup')
+    return {
+        (r.dimension, r.key): (r.count, r.total_purchase_price, r.total_current_value)
+        for r in rollup_model.objects.all()
+    }
+
+
+def verify(apps=global_apps):
+    """List of (dimension, key, stored, expected) for every drifted row."""
+    expected, actual = compute(apps), stored(apps)
+    empty = (0, Decimal('0'), 0)
+    drift = []
+    for key in sorted(set(expected) | set(actual)):
+        want, have = expected.get(key, empty), actual.get(key, empty)
+        if tuple(want) != tuple(have):
+            drift.append((key[0], key[1], have, want))
+    return drift
+
+
+def rebuild(apps=global_apps):
+    rollup_model = apps.get_model('assetmanagement', 'AssetRollup')
+    with transaction.atomic():
+        # writers update these rows in the transaction of their asset change
+        list(rollup_model.objects.select_for_update().values_list('pk'))
+        rows = compute(apps)
+        rollup_model.objects.all().delete()
+        rollup_model.objects.bulk_create([
+            rollup_model(
+                dimension=dimension, key=key, count=count,
+                total_purchase_price=price, total_current_value=value,
+            )
+            for (dimension, key), (count, price, value) in rows.items()
+        ])
+    return len(rows)
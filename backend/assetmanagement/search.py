@@ -0,0 +1,212 @@
+# backend/assetmanagement/search.py
+"""Indexed asset search.
+
+Every asset has one ``AssetSearchDocument`` holding its normalized search
+text. On MySQL that column carries a FULLTEXT index with the ngram parser
+(works for Persian, which has no reliable word stemming) and queries run
+``MATCH ... AGAINST`` in boolean mode. Elsewhere (SQLite test runs) the
+text is also split into ``AssetSearchToken`` rows and queries become
+indexed ``token LIKE 'term%'`` prefix lookups. Both paths rank results.
+"""
+import re
+from functools import reduce
+from operator import or_
+
+from django.apps import apps as global_apps
+from django.db import connections, router, transaction
+from django.db.models import (
+    Case, F, FloatField, Func, IntegerField, Lookup, Max, OuterRef, Q, Subquery, Sum, Value, When,
+)
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from .models import Asset, AssetSearchDocument, AssetSearchToken
+
+# field -> weight used to rank token matches
+SEARCH_FIELDS = {
+    'name': 5,
+    'code': 5,
+    'asset_code': 4,
+    'serial_number': 4,
+    'brand': 2,
+    'model': 2,
+    'description': 1,
+}
+MAX_TOKEN_LENGTH = 50
+
+_ARABIC_TO_PERSIAN = str.maketrans({
+    'ي': 'ی', 'ى': 'ی', 'ك': 'ک', 'ة': 'ه', 'ۀ': 'ه', 'أ': 'ا', 'إ': 'ا', 'آ': 'ا',
+    '\u200c': ' ',  # zero-width non-joiner splits words for indexing
+    **{chr(0x06F0 + i): str(i) for i in range(10)},  # Persian digits
+    **{chr(0x0660 + i): str(i) for i in range(10)},  # Arabic-Indic digits
+})
+_DIACRITICS = re.compile('[\u064B-\u065F\u0670\u0640]')  # harakat, superscript alef, tatweel
+_WORD = re.compile(r'\w+')
+
+
+def normalize(text):
+    text = (text or '').translate(_ARABIC_TO_PERSIAN)
+    return _DIACRITICS.sub('', text).casefold()
+
+
+def tokenize(text):
+    return [t[:MAX_TOKEN_LENGTH] for t in _WORD.findall(normalize(text))]
+
+
+def uses_fulltext(using='default'):
+    return connections[using].vendor == 'mysql'
+
+
+def document_for(values):
+    return ' '.join(normalize(values.get(field)) for field in SEARCH_FIELDS if values.get(field))
+
+
+def tokens_for(values):
+    weights = {}
+    for field, weight in SEARCH_FIELDS.items():
+        value = values.get(field) or ''
+        terms = tokenize(value)
+        if field != 'description' and len(terms) > 1:
+            # whole identifiers such as "HP-2040" also match as one token
+            terms.append(normalize(value).replace(' ', '')[:MAX_TOKEN_LENGTH])
+        for term in terms:
+            weights[term] = max(weights.get(term, 0), weight)
+    return weights
+
+
+# --------------------
+# Indexing
+# --------------------
+
+def index_asset(asset, apps=global_apps):
+    document_model = apps.get_model('assetmanagement', 'AssetSearchDocument')
+    token_model = apps.get_model('assetmanagement', 'AssetSearchToken')
+    values = {field: getattr(asset, field) for field in SEARCH_FIELDS}
+    text = document_for(values)
+    using = router.db_for_write(document_model)
+    with transaction.atomic(using=using):
+        doc, created = document_model.objects.get_or_create(
+            asset_id=asset.pk, defaults={'document': text}
+        )
+        if not created:
+            if doc.document == text:
+                return
+            doc.document = text
+            doc.save(update_fields=['document'])
+        if uses_fulltext(using):
+            return
+        token_model.objects.filter(asset_id=asset.pk).delete()
+        token_model.objects.bulk_create([
+            token_model(asset_id=asset.pk, token=token, weight=weight)
+            for token, weight in tokens_for(values).items()
+        ])
+
+
+def index_assets(assets):
+    """Index freshly inserted assets in bulk (``bulk_create`` skips signals)."""
+    documents, tokens = [], []
+    fulltext = uses_fulltext(router.db_for_write(AssetSearchDocument))
+    for asset in assets:
+        values = {field: getattr(asset, field) for field in SEARCH_FIELDS}
+        documents.append(AssetSearchDocument(asset_id=asset.pk, document=document_for(values)))
+        if not fulltext:
+            tokens.extend(
+                AssetSearchToken(asset_id=asset.pk, token=token, weight=weight)
+                for token, weight in tokens_for(values).items()
+            )
+    AssetSearchDocument.objects.bulk_create(documents)
+    AssetSearchToken.objects.bulk_create(tokens, batch_size=5000)
+
+
+def reindex(apps=global_apps, batch_size=1000):
+    """Rebuild the whole index; returns the number of assets indexed."""
+    asset_model = apps.get_model('assetmanagement', 'Asset')
+    apps.get_model('assetmanagement', 'AssetSearchDocument').objects.all().delete()
+    apps.get_model('assetmanagement', 'AssetSearchToken').objects.all().delete()
+    count = 0
+    for asset in asset_model.objects.only(*SEARCH_FIELDS).iterator(chunk_size=batch_size):
+        index_asset(asset, apps)
+        count += 1
+    return count
+
+
+@receiver(post_save, sender=Asset)
+def update_search_index(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and not set(update_fields) & set(SEARCH_FIELDS):
+        return
+    index_asset(instance)
+
+
+# --------------------
+# Querying
+# --------------------
+
+def search_assets(queryset, query):
+    """Filter ``queryset`` to assets matching every term of ``query`` (as a
+    prefix), annotated with ``search_rank`` and ordered best match first."""
+    terms = list(dict.fromkeys(tokenize(query)))
+    if not terms:
+        return queryset.none()
+    if uses_fulltext(queryset.db):
+        queryset = _fulltext_search(queryset, terms)
+    else:
+        queryset = _token_search(queryset, terms)
+    return queryset.order_by('-search_rank', '-created_at', 'id')
+
+
+class _Match(Func):
+    """``MATCH (column) AGAINST (query IN BOOLEAN MODE)``: the relevance."""
+    output_field = FloatField()
+
+    def __init__(self, column, query):
+        super().__init__(column, Value(query))
+
+    def as_sql(self, compiler, connection, **extra_context):
+        column, column_params = compiler.compile(self.source_expressions[0])
+        query, query_params = compiler.compile(self.source_expressions[1])
+        return f'MATCH ({column}) AGAINST ({query} IN BOOLEAN MODE)', (*column_params, *query_params)
+
+
+class _Matches(Lookup):
+    """The same MATCH as a bare WHERE predicate.
+
+    A boolean expression in ``filter()`` is rendered ``... = True`` on MySQL,
+    which compares the float relevance with 1 and keeps the FULLTEXT index
+    out of the plan; lookups are emitted as they are.
+    """
+    lookup_name = 'fulltext_matches'
+    prepare_rhs = False
+
+    def as_sql(self, compiler, connection):
+        column, column_params = self.process_lhs(compiler, connection)
+        query, query_params = self.process_rhs(compiler, connection)
+        return f'MATCH ({column}) AGAINST ({query} IN BOOLEAN MODE)', (*column_params, *query_params)
+
+
+def _fulltext_search(queryset, terms):
+    # MATCH in the WHERE clause lets MySQL pick the rows from the FULLTEXT
+    # index and join the assets by primary key; the ranking MATCH reuses it
+    boolean_query = ' '.join(f'+{term}*' for term in terms)
+    document = F('search_document__document')
+    return (
+        queryset.filter(_Matches(document, boolean_query))
+        .annotate(search_rank=_Match(document, boolean_query))
+    )
+
+
+def _token_search(queryset, terms):
+    matched = reduce(lambda a, b: a + b, [
+        Max(Case(When(token__startswith=term, then=Value(1)), default=Value(0)))
+        for term in terms
+    ])
+    # assets with a token for every term, found through the token index
+    matches = (
+        AssetSearchToken.objects
+        .filter(reduce(or_, [Q(token__startswith=term) for term in terms]))
+        .order_by()
+        .values('asset')
+        .annotate(matched=matched, rank=Sum('weight'))
+        .filter(matched=len(terms))
+    )
+    rank = Subquery(matches.filter(asset=OuterRef('pk')).values('rank'), output_field=IntegerField())
+    return queryset.filter(pk__in=matches.values('asset')).annotate(search_rank=rank)
@@ -1,8 +1,10 @@
-from django.db.models import Sum
+from django.db import transaction
 from rest_framework import serializers
 from django.contrib.auth import authenticate
+from .fieldsets import SparseFieldsMixin
+from .media import variant_urls
 from .models import (
-    User, Department, Category, Asset, AssetTransfer, Brand,UseCase
+    User, Department, Category, Asset, AssetTransfer, Brand,UseCase, built_variants
 )
 
 class UserSerializer(serializers.ModelSerializer):
@@ -32,7 +34,7 @@ class LoginSerializer(serializers.Serializer):
         return data
 
 
-class DepartmentSerializer(serializers.ModelSerializer):
+class DepartmentSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     manager_name = serializers.CharField(
         source='manager.get_full_name', read_only=True
     )
@@ -43,17 +45,26 @@ class DepartmentSerializer(serializers.ModelSerializer):
             'id', 'name', 'code', 'manager','type',
             'manager_name', 'description', 'created_at'
         ]
+        expandable_fields = {'manager': 'UserSerializer'}
+        field_sources = {'manager_name': ['manager__first_name', 'manager__last_name']}
 
 
 class CategorySerializer(serializers.ModelSerializer):
     class Meta:
         model = Category
-        fields = ['id', 'name', 'code', 'description']
+        fields = [
+            'id', 'name', 'code', 'description',
+            'depreciation_method', 'useful_life_years', 'salvage_percent', 'declining_rate',
+        ]
 
 
-class AssetSerializer(serializers.ModelSerializer):
-    total_transfer_cost = serializers.SerializerMethodField()
+class AssetSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    image_variants = serializers.SerializerMethodField()
     current_value = serializers.IntegerField(read_only=True)
+    # a JSON number, as it was when computed per request
+    total_transfer_cost = serializers.DecimalField(
+        max_digits=14, decimal_places=2, read_only=True, coerce_to_string=False
+    )
     category_name = serializers.CharField(
         source='category.name', read_only=True
     )
@@ -80,22 +91,34 @@ class AssetSerializer(serializers.ModelSerializer):
             'image', 'category_name', 'department_name',
             'current_department_name', 'created_by',
             'created_by_name', 'created_at', 'updated_at',
-            'total_transfer_cost', 'current_department_type','usecase', 'usecase_id'
+            'total_transfer_cost', 'current_department_type','usecase', 'usecase_id',
+            'image_variants', 'transfer_count', 'last_transfer_at',
 
         ]
         read_only_fields = ['code', 'created_by', 'created_at', 'updated_at']
+        expandable_fields = {
+            'category': 'CategorySerializer',
+            'department': 'DepartmentSerializer',
+            'current_department': 'DepartmentSerializer',
+            'usecase': 'UseCaseSerializer',
+            'created_by': 'UserSerializer',
+        }
+        field_sources = {
+            'created_by_name': ['created_by__first_name', 'created_by__last_name'],
+            'image_variants': ['image'],
+        }
+        field_annotations = {'image_variants': {'image_variants_built': built_variants}}
 
     def create(self, validated_data):
         # auto-set the creator
         validated_data['created_by'] = self.context['request'].user
         return super().create(validated_data)
 
-    def get_total_transfer_cost(self, obj):
-        transfers = obj.assettransfer_set.aggregate(total=Sum('price'))
-        return transfers['total'] or 0
+    def get_image_variants(self, obj):
+        return variant_urls(obj.image, self.context.get('request'), getattr(obj, 'image_variants_built', None))
 
 
-class AssetTransferSerializer(serializers.ModelSerializer):
+class AssetTransferSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     asset_name = serializers.CharField(
         source='asset.name', read_only=True
     )
@@ -111,6 +134,7 @@ class AssetTransferSerializer(serializers.ModelSerializer):
     transferred_by_name = serializers.CharField(
         source='transferred_by.get_full_name', read_only=True
     )
+    image_variants = serializers.SerializerMethodField()
 
     class Meta:
         model = AssetTransfer
@@ -128,8 +152,23 @@ class AssetTransferSerializer(serializers.ModelSerializer):
             'transferred_by',
             'transferred_by_name',
             'price',
-            'image'
+            'image',
+            'image_variants',
         ]
+        expandable_fields = {
+            'asset': 'AssetSerializer',
+            'from_department': 'DepartmentSerializer',
+            'to_department': 'DepartmentSerializer',
+            'transferred_by': 'UserSerializer',
+        }
+        field_sources = {
+            'transferred_by_name': ['transferred_by__first_name', 'transferred_by__last_name'],
+            'image_variants': ['image'],
+        }
+        field_annotations = {'image_variants': {'image_variants_built': built_variants}}
+
+    def get_image_variants(self, obj):
+        return variant_urls(obj.image, self.context.get('request'), getattr(obj, 'image_variants_built', None))
 
 class AssetTransferCreateSerializer(serializers.ModelSerializer):
     class Meta:
@@ -137,15 +176,38 @@ class AssetTransferCreateSerializer(serializers.ModelSerializer):
         fields = ['asset', 'to_department', 'notes', 'price', 'image']
 
     def create(self, validated_data):
-        asse = validated_data['asset']
-        validated_data['from_department'] = asse.current_department
-        validated_data['transferred_by'] = self.context['request'].user
-        transfer = super().create(validated_data)
-        # update the asset's department
-        asse.current_department = validated_data['to_department']
-        asse.save()
+        with transaction.atomic():
+            # re-read under a row lock so concurrent transfers see each other
+            asse = Asset.objects.select_for_update().get(pk=validated_data['asset'].pk)
+            validated_data['asset'] = asse
+            validated_data['from_department'] = asse.current_department
+            validated_data['transferred_by'] = self.context['request'].user
+            transfer = super().create(validated_data)
+            # update the asset's department
+            asse.current_department = validated_data['to_department']
+            asse.save()
         return transfer
 
+class BatchTransferSerializer(serializers.Serializer):
+    """Input of POST /transfers/batch/: explicit asset ids or an asset-list filter."""
+    assets = serializers.ListField(child=serializers.IntegerField(), required=False, allow_empty=False)
+    filter = serializers.DictField(child=serializers.CharField(), required=False, allow_empty=False)
+    to_department = serializers.PrimaryKeyRelatedField(queryset=Department.objects.all())
+    notes = serializers.CharField(required=False, allow_blank=True, default='')
+    price = serializers.DecimalField(max_digits=12, decimal_places=2, required=False, allow_null=True)
+    image = serializers.ImageField(required=False)
+
+    def validate(self, data):
+        if ('assets' in data) == ('filter' in data):
+            raise serializers.ValidationError("Provide either 'assets' or 'filter'.")
+        if 'filter' in data and not set(data['filter']) & {'search', 'department', 'category'}:
+            # an empty filter would move every asset
+            raise serializers.ValidationError(
+                {'filter': "Use at least one of 'search', 'department' or 'category'."}
+            )
+        return data
+
+
 class BrandSerializer(serializers.ModelSerializer):
     class Meta:
         model = Brand
@@ -0,0 +1,80 @@
+# backend/assetmanagement/storage.py
+"""Content-addressed file storage for uploaded images.
+
+An upload is hashed (SHA-256) while it is streamed to a temporary file and
+then stored once as ``blobs/<aa>/<bb>/<digest><ext>``. Uploading the same
+bytes again returns the existing name without writing anything, so an
+invoice attached to a hundred transfers occupies disk once. Which rows
+still use a blob is tracked by ``MediaBlob`` reference counts (media.py).
+"""
+import hashlib
+import os
+import tempfile
+
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+BLOB_DIR = 'blobs'
+
+
+def blob_name(digest, extension=''):
+    return f'{BLOB_DIR}/{digest[:2]}/{digest[2:4]}/{digest}{extension.lower()}'
+
+
+def file_digest(fileobj, chunk_size=64 * 1024):
+    digest = hashlib.sha256()
+    for chunk in iter(lambda: fileobj.read(chunk_size), b''):
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    def get_available_name(self, name, max_length=None):
+        # the final name comes from the content, chosen in _save()
+        return name
+
+    def _save(self, name, content):
+        extension = os.path.splitext(name)[1]
+        tmp_dir = self.path(os.path.join(BLOB_DIR, 'tmp'))
+        os.makedirs(tmp_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=tmp_dir)
+        digest = hashlib.sha256()
+        try:
+            with os.fdopen(fd, 'wb') as out:
+                for chunk in content.chunks():
+                    digest.update(chunk)
+                    out.write(chunk)
+            final = blob_name(digest.hexdigest(), extension)
+            final_path = self.path(final)
+            if os.path.exists(final_path):
+                os.remove(tmp_path)
+            else:
+                os.makedirs(os.path.dirname(final_path), exist_ok=True)
+                os.replace(tmp_path, final_path)
+                if self.file_permissions_mode is not None:
+                    os.chmod(final_path, self.file_permissions_mode)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return final
+
+    def store_existing(self, name):
+        """Move a legacy file into its blob path; returns the blob name."""
+        with self.open(name, 'rb') as f:
+            final = blob_name(file_digest(f), os.path.splitext(name)[1])
+        final_path = self.path(final)
+        if os.path.exists(final_path):
+            os.remove(self.path(name))
+        else:
+            os.makedirs(os.path.dirname(final_path), exist_ok=True)
+            os.replace(self.path(name), final_path)
+        return final
+
+
+content_addressed_storage = ContentAddressedStorage()
+
+
+def image_storage():
+    return content_addressed_storage
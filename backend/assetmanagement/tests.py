@@ -1,3 +1,1398 @@
-from django.test import TestCase
+import asyncio
+import json
+import shutil
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from io import BytesIO, StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.core.serializers.json import DjangoJSONEncoder
+from django.core.files.storage import default_storage
+from django.db import connection, connections, router
+from django.db.backends.signals import connection_created
+from django.db.models import Lookup
+from django.db.models.signals import post_save
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from openpyxl import Workbook
+from PIL import Image as PILImage
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework_simplejwt.tokens import AccessToken
+
+from . import (
+    archive, async_views, caching, changelog, codes, conditional, counters, depreciation, events, exports, fastread,
+    media, metrics, replicas, rollups, search,
+)
+from .models import (
+    User, Department, Category, Asset, ArchivedTransfer, AssetTransfer, AssetRollup, AssetSearchDocument, Brand,
+    ChangeLogEntry, CodeSequence, MediaBlob, UseCase,
+)
+from .serializers import AssetSerializer, AssetTransferSerializer
+
+
+# Max SQL queries a single request to each endpoint may run, whatever the
+# page size or row count. Raise a budget only together with the change that
+# needs it.
+QUERY_BUDGETS = {
+    'asset-list': 4,       # ETag probe + reference versions + COUNT + page
+    'asset-detail': 2,     # ETag probe + row
+    'transfer-list': 2,    # COUNT + page
+    'asset-timeline': 2,   # asset + transfers
+}
+
+
+def make_fixture(assets=10, transfers_per_asset=2):
+    user = User.objects.create_user(
+        username='tester', password='pw', first_name='Test', last_name='User', role='admin'
+    )
+    it = Department.objects.create(name='IT', code='IT')
+    hr = Department.objects.create(name='HR', code='HR')
+    cat = Category.objects.create(name='Laptop', code='LAPT')
+    for i in range(assets):
+        asset = Asset.objects.create(
+            name=f'Asset {i}', category=cat, department=it, created_by=user,
+            purchase_date=date(2024, 1, 1), purchase_price=Decimal('100.00'),
+        )
+        for j in range(transfers_per_asset):
+            AssetTransfer.objects.create(
+                asset=asset, from_department=it, to_department=hr,
+                transferred_by=user, price=Decimal('10.50'),
+            )
+    return user
+
+
+class QueryBudgetTestCase(TestCase):
+    def setUp(self):
+        self.user = make_fixture()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def assertWithinBudget(self, url_name, path):
+        budget = QUERY_BUDGETS[url_name]
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(path)
+        self.assertEqual(response.status_code, 200)
+        self.assertLessEqual(
+            len(ctx.captured_queries), budget,
+            f"{url_name} ran {len(ctx.captured_queries)} queries (budget {budget}):\n"
+            + "\n".join(q['sql'] for q in ctx.captured_queries),
+        )
+        return response
+
+    def test_asset_list_within_budget(self):
+        self.assertWithinBudget('asset-list', reverse('asset-list') + '?page_size=6')
+        self.assertWithinBudget('asset-list', reverse('asset-list') + '?search=Asset')
+
+    def test_asset_detail_within_budget(self):
+        asset = Asset.objects.first()
+        response = self.assertWithinBudget('asset-detail', reverse('asset-detail', args=[asset.pk]))
+        self.assertEqual(Decimal(str(response.data['total_transfer_cost'])), Decimal('21.00'))
+        self.assertEqual(response.data['created_by_name'], 'Test User')
+
+    def test_transfer_list_within_budget(self):
+        self.assertWithinBudget('transfer-list', reverse('transfer-list'))
+
+    def test_asset_timeline_within_budget(self):
+        asset = Asset.objects.first()
+        response = self.assertWithinBudget('asset-timeline', reverse('asset-timeline', args=[asset.pk]))
+        self.assertEqual(response.data['transfer_count'], 2)
+        dates = [row['transfer_date'] for row in response.data['transfers']]
+        self.assertEqual(dates, sorted(dates))
+        self.assertEqual(response.data['transfers'][0]['to_department_name'], 'HR')
+        missing = self.client.get(reverse('asset-timeline', args=[999999]))
+        self.assertEqual(missing.status_code, 404)
+
+    def test_annotated_total_matches_aggregate(self):
+        response = self.client.get(reverse('asset-list'))
+        for row in response.data['results']:
+            self.assertEqual(Decimal(str(row['total_transfer_cost'])), Decimal('21.00'))
+
+    def test_total_transfer_cost_is_a_json_number(self):
+        idle = Asset.objects.create(
+            name='Idle', category=Category.objects.get(), department=Department.objects.get(code='IT'),
+            created_by=User.objects.get(), purchase_date=date(2024, 1, 1), purchase_price=Decimal('1.00'),
+        )
+        rows = json.loads(self.client.get(reverse('asset-list')).content)['results']
+        self.assertEqual({row['total_transfer_cost'] for row in rows if row['id'] != idle.pk}, {21.0})
+        # 0, not "0.00": the asset list shows a placeholder for falsy totals
+        detail = json.loads(self.client.get(reverse('asset-detail', args=[idle.pk])).content)
+        self.assertIsInstance(detail['total_transfer_cost'], float)
+        self.assertEqual(detail['total_transfer_cost'], 0)
+
+
+class SparseFieldsetTestCase(TestCase):
+    def setUp(self):
+        self.user = make_fixture(assets=3, transfers_per_asset=1)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def get(self, path):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(path)
+        self.assertEqual(response.status_code, 200)
+        return response, ctx.captured_queries[-1]['sql']
+
+    def test_fields_prune_columns_and_joins(self):
+        response, sql = self.get(reverse('asset-list') + '?fields=id,name,code')
+        self.assertEqual(set(response.data['results'][0]), {'id', 'name', 'code'})
+        self.assertNotIn('JOIN', sql)
+        self.assertNotIn('"description"', sql)
+
+        response, sql = self.get(reverse('asset-list') + '?fields=id,category_name,created_by_name')
+        self.assertEqual(response.data['results'][0]['created_by_name'], 'Test User')
+        self.assertEqual(sql.count('JOIN'), 2)
+
+        response, _ = self.get(reverse('asset-list') + '?omit=description,image_variants')
+        self.assertNotIn('description', response.data['results'][0])
+        self.assertIn('total_transfer_cost', response.data['results'][0])
+
+    def test_expand_related_objects(self):
+        response, _ = self.get(reverse('asset-list') + '?fields=id,current_department&expand=current_department')
+        self.assertEqual(response.data['results'][0]['current_department']['name'], 'IT')
+        path = reverse('transfer-list') + '?expand=asset,to_department&omit=image_variants'
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(path)
+        self.assertLessEqual(len(ctx.captured_queries), QUERY_BUDGETS['transfer-list'])
+        row = response.data['results'][0]
+        self.assertEqual(row['asset']['category_name'], 'Laptop')
+        self.assertEqual(row['to_department']['code'], 'HR')
+
+        response, _ = self.get(reverse('department-list') + '?fields=id,name')
+        self.assertEqual(set(response.data['results'][0]), {'id', 'name'})
+
+    def test_cursor_pages_and_writes_ignore_fieldsets(self):
+        response, _ = self.get(reverse('asset-list') + '?pagination=cursor&page_size=2&fields=id')
+        self.assertEqual(len(self.client.get(response.data['next']).data['results']), 1)
+
+        asset = Asset.objects.first()
+        response = self.client.patch(
+            reverse('asset-detail', args=[asset.pk]) + '?fields=id', {'name': 'Renamed'}, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['name'], 'Renamed')
+        self.assertIn('category_name', response.data)
+
+
+class FastReadTestCase(TestCase):
+    def setUp(self):
+        self.user = make_fixture(assets=3, transfers_per_asset=2)
+        asset = Asset.objects.order_by('pk').first()
+        Asset.objects.filter(pk=asset.pk).update(category=None, image='assets/photo.jpg', status='disposed')
+        AssetTransfer.objects.filter(asset=asset).update(image='transfers/receipt.jpg', price=None)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_rows_render_like_the_serializers(self):
+        request = Request(APIRequestFactory().get('/api/assets/'))
+        renderer = JSONRenderer()
+        for serializer_class, queryset in [
+            (AssetSerializer, Asset.objects.for_read().order_by('pk')),
+            (AssetTransferSerializer, AssetTransfer.objects.with_related().order_by('pk')),
+        ]:
+            context = {'request': request}
+            reader = fastread.reader_for(serializer_class(context=context))
+            self.assertIsNotNone(reader)
+            self.assertEqual(
+                renderer.render(reader.render(reader.values(queryset))),
+                renderer.render(serializer_class(queryset, many=True, context=context).data),
+            )
+
+    def test_list_views_use_values_rows(self):
+        with CaptureQueriesContext(connection) as ctx:
+            rows = self.client.get(reverse('asset-list') + '?pagination=cursor&page_size=3').data['results']
+        self.assertNotIn('category_name', next(r for r in rows if r['category'] is None))
+        self.assertNotIn('JOIN "assetmanagement_usecase"', ctx.captured_queries[-1]['sql'])
+
+        # expanded relations are nested serializers: served by DRF as before
+        self.assertIsNone(fastread.reader_for(AssetSerializer(
+            context={'request': Request(APIRequestFactory().get('/api/assets/?expand=category'))}
+        )))
+        response = self.client.get(reverse('transfer-list') + '?expand=to_department')
+        self.assertEqual(response.data['results'][0]['to_department']['code'], 'HR')
+
+    def test_benchmark_checks_identical_output(self):
+        out = StringIO()
+        call_command('benchmark_serialization', '--rows=5', '--repeat=1', stdout=out)
+        self.assertIn('rows/s', out.getvalue())
+        self.assertIn('identical JSON', out.getvalue())
+
+
+class ConditionalRequestTestCase(TestCase):
+    def setUp(self):
+        self.user = make_fixture(assets=3, transfers_per_asset=1)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.asset = Asset.objects.order_by('pk').first()
+        self.url = reverse('asset-detail', args=[self.asset.pk])
+
+    def test_unchanged_asset_is_not_modified(self):
+        response = self.client.get(self.url)
+        etag = response['ETag']
+        self.assertIn('Last-Modified', response)
+        self.assertIn('no-cache', response['Cache-Control'])
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+        self.assertEqual(len(ctx.captured_queries), 1)
+
+        # a sparse representation has its own tag
+        self.assertNotEqual(self.client.get(self.url + '?fields=id')['ETag'], etag)
+        # counters change without updated_at, category names through CacheVersion
+        AssetTransfer.objects.create(
+            asset=self.asset, from_department=self.asset.department,
+            to_department=self.asset.department, transferred_by=self.user,
+        )
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+        etag = self.client.get(self.url)['ETag']
+        Category.objects.update(name='Notebook')
+        Category.objects.get().save()
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_list_validators_follow_the_filter(self):
+        url = reverse('asset-list') + '?search=Asset'
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.assertNotEqual(self.client.get(reverse('asset-list'))['ETag'], etag)
+
+        self.client.patch(self.url, {'description': 'changed'}, format='json')
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_writes_honour_if_match(self):
+        etag = self.client.get(self.url)['ETag']
+        response = self.client.patch(self.url, {'name': 'First'}, format='json', HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+        # a second writer still holding the old tag loses
+        response = self.client.patch(self.url, {'name': 'Second'}, format='json', HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, 412)
+        self.assertEqual(self.client.delete(self.url, HTTP_IF_MATCH=etag).status_code, 412)
+        self.asset.refresh_from_db()
+        self.assertEqual(self.asset.name, 'First')
+
+        missing = self.client.get(reverse('asset-detail', args=[999999]), HTTP_IF_NONE_MATCH='"x"')
+        self.assertEqual(missing.status_code, 404)
+
+    def test_if_match_checks_and_writes_in_one_transaction(self):
+        etag = self.client.get(self.url)['ETag']
+        depth = len(connection.atomic_blocks)
+        seen = []
+        lock_asset = conditional.lock_asset
+
+        def locked(pk):
+            lock_asset(pk)
+            seen.append(('lock', len(connection.atomic_blocks)))
+
+        def saved(**kwargs):
+            seen.append(('save', len(connection.atomic_blocks)))
+
+        post_save.connect(saved, sender=Asset)
+        try:
+            with mock.patch.object(conditional, 'lock_asset', side_effect=locked):
+                response = self.client.patch(self.url, {'name': 'Locked'}, format='json', HTTP_IF_MATCH=etag)
+                self.client.get(self.url)
+        finally:
+            post_save.disconnect(saved, sender=Asset)
+        self.assertEqual(response.status_code, 200)
+        # the lock is taken in a transaction of the request and held through the save
+        self.assertEqual(seen[0], ('lock', depth + 1))
+        saves = [level for step, level in seen if step == 'save']
+        self.assertTrue(saves and all(level > depth for level in saves))
+        # the after-write validators lock again in the same transaction; reads never lock
+        self.assertEqual([step for step in seen if step[0] == 'lock'], [('lock', depth + 1)] * 2)
+
+
+class SyncFeedTestCase(TestCase):
+    def setUp(self):
+        self.user = make_fixture(assets=3, transfers_per_asset=1)
+        self.hr = Department.objects.get(code='HR')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.token = self.client.get(reverse('sync')).data['token']
+
+    def sync(self, token, **params):
+        response = self.client.get(reverse('sync'), {'since': token, **params})
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    @override_settings(SYNC_REDELIVERY_SECONDS=0)
+    def test_reports_saves_and_deletes_since_the_token(self):
+        self.assertEqual(self.sync(self.token)['changes'], {})
+        first, second, _ = Asset.objects.order_by('pk')
+        first.name = 'Renamed'
+        first.save()
+        deleted_pk = second.pk
+        second.delete()
+        brand = Brand.objects.create(name='Acme')
+
+        page = self.sync(self.token)
+        self.assertEqual([row['name'] for row in page['changes']['asset']['saved']], ['Renamed'])
+        self.assertEqual(page['changes']['asset']['deleted'], [deleted_pk])
+        self.assertEqual(page['changes']['brand']['saved'][0]['id'], brand.pk)
+        # the transfers of the deleted asset went with it
+        self.assertEqual(len(page['changes']['transfer']['deleted']), 1)
+        self.assertEqual(self.sync(page['token'])['changes'], {})
+
+    @override_settings(SYNC_REDELIVERY_SECONDS=0)
+    def test_transfers_report_their_assets_on_every_path(self):
+        first, second, third = Asset.objects.order_by('pk')
+        self.client.put(reverse('asset-transfer', args=[first.pk]), {'department': self.hr.pk}, format='json')
+        self.client.post(reverse('transfer-batch'),
+                         {'assets': [second.pk], 'to_department': self.hr.pk, 'price': '2.00'}, format='json')
+
+        page = self.sync(self.token)
+        saved = {row['id']: row for row in page['changes']['asset']['saved']}
+        self.assertEqual(sorted(saved), [first.pk, second.pk])
+        self.assertEqual(saved[second.pk]['transfer_count'], 2)
+        self.assertEqual(len(page['changes']['transfer']['saved']), 2)
+
+    @override_settings(SYNC_REDELIVERY_SECONDS=0)
+    def test_pages_follow_the_limit(self):
+        for asset in Asset.objects.all():
+            asset.save()
+        page = self.sync(self.token, limit=2)
+        self.assertTrue(page['more'])
+        self.assertEqual(len(page['changes']['asset']['saved']), 2)
+        rest = self.sync(page['token'], limit=2)
+        self.assertFalse(rest['more'])
+        self.assertEqual(len(rest['changes']['asset']['saved']), 1)
+
+    def test_redelivers_entries_that_commit_late(self):
+        ChangeLogEntry.objects.update(changed_at=timezone.now() - timedelta(hours=1))
+        first, second, third = Asset.objects.order_by('pk')
+        newest = changelog.newest_id()
+        # a transaction holding newest + 1 and newest + 2 has not committed yet
+        ChangeLogEntry.objects.create(pk=newest + 3, model='asset', object_id=third.pk)
+        page = self.sync(self.token)
+        self.assertEqual([row['id'] for row in page['changes']['asset']['saved']], [third.pk])
+        since, gaps = changelog.parse_token(page['token'])
+        self.assertEqual((since, sorted(gaps)), (newest + 3, [newest + 1, newest + 2]))
+
+        ChangeLogEntry.objects.create(pk=newest + 1, model='asset', object_id=first.pk)
+        late = self.sync(page['token'])
+        self.assertEqual([row['id'] for row in late['changes']['asset']['saved']], [first.pk])
+        self.assertEqual(sorted(changelog.parse_token(late['token'])[1]), [newest + 2])
+        # nothing already delivered comes again
+        self.assertEqual(self.sync(late['token'])['changes'], {})
+
+        # gaps nobody fills (rolled back) are dropped once they expire
+        expired = changelog.format_token(since, {newest + 2: int(time.time()) - 1})
+        self.assertEqual(self.sync(expired)['token'], str(since))
+        # a fresh token watches the gap as well
+        self.assertEqual(sorted(changelog.parse_token(self.client.get(reverse('sync')).data['token'])[1]),
+                         [newest + 2])
+        with self.settings(SYNC_REDELIVERY_SECONDS=0):
+            self.assertEqual(self.client.get(reverse('sync')).data['token'], str(newest + 3))
+
+    def test_pages_never_resend_earlier_pages(self):
+        for asset in Asset.objects.all():
+            asset.save()
+        token, seen = self.token, []
+        while True:
+            page = self.sync(token, limit=1)
+            seen += [row['id'] for row in page['changes'].get('asset', {}).get('saved', [])]
+            token = page['token']
+            if not page['more']:
+                break
+        self.assertEqual(sorted(seen), sorted(Asset.objects.values_list('pk', flat=True)))
+
+    def test_expired_or_bad_tokens(self):
+        ChangeLogEntry.objects.update(changed_at=timezone.now() - timedelta(days=40))
+        Brand.objects.create(name='Acme')
+        self.assertGreater(changelog.prune(30), 0)
+        response = self.client.get(reverse('sync'), {'since': 1})
+        self.assertEqual(response.status_code, 410)
+        self.assertEqual(self.client.get(reverse('sync'), {'since': 'x'}).status_code, 400)
+        self.assertIn('brand', self.sync(self.token)['changes'])
+
+
+class KeysetPaginationTestCase(TestCase):
+    def setUp(self):
+        self.user = make_fixture(assets=13, transfers_per_asset=1)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def walk(self, url):
+        seen, pages = [], 0
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertIsNone(response.data['count'])
+            seen += [row['id'] for row in response.data['results']]
+            url, pages = response.data['next'], pages + 1
+        return seen, pages
+
+    def test_walks_assets_without_count(self):
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(reverse('asset-list') + '?pagination=cursor&page_size=5')
+        self.assertFalse(any('COUNT(' in q['sql'] for q in ctx.captured_queries))
+
+        ids, pages = self.walk(reverse('asset-list') + '?pagination=cursor&page_size=5')
+        expected = list(Asset.objects.order_by('-created_at', 'id').values_list('id', flat=True))
+        self.assertEqual(ids, expected)
+        self.assertEqual(pages, 3)
+
+    def test_previous_link_returns_prior_page(self):
+        first = self.client.get(reverse('transfer-list') + '?pagination=cursor&page_size=4')
+        second = self.client.get(first.data['next'])
+        back = self.client.get(second.data['previous'])
+        self.assertEqual(
+            [r['id'] for r in back.data['results']],
+            [r['id'] for r in first.data['results']],
+        )
+
+    def test_exact_count_and_bad_cursor(self):
+        response = self.client.get(reverse('asset-list') + '?pagination=cursor&count=exact')
+        self.assertEqual(response.data['count'], 13)
+        response = self.client.get(reverse('asset-list') + '?cursor=not-a-cursor')
+        self.assertEqual(response.status_code, 404)
+
+    def test_ties_on_timestamp_are_broken_by_id(self):
+        Asset.objects.update(created_at=Asset.objects.first().created_at)
+        ids, _ = self.walk(reverse('asset-list') + '?pagination=cursor&page_size=4')
+        self.assertEqual(ids, sorted(ids))
+        self.assertEqual(len(ids), 13)
+
+
+class DashboardRollupTestCase(TestCase):
+    def setUp(self):
+        self.user = make_fixture(assets=4, transfers_per_asset=0)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_rollups_follow_saves_transfers_and_deletes(self):
+        hr = Department.objects.get(code='HR')
+        asset = Asset.objects.first()
+        self.client.put(reverse('asset-transfer', args=[asset.pk]), {'department': hr.pk}, format='json')
+        other = Asset.objects.exclude(pk=asset.pk).first()
+        other.status = 'disposed'
+        other.save()
+        Asset.objects.last().delete()
+        self.assertEqual(rollups.verify(), [])
+
+        with CaptureQueriesContext(connection) as ctx:
+            data = self.client.get(reverse('dashboard_stats')).json()
+        self.assertLessEqual(len(ctx.captured_queries), 3)
+        self.assertEqual(data['total_assets'], 3)
+        self.assertEqual(data['active_assets'], 2)
+        self.assertEqual(data['assets_by_department'], {'IT': 2, 'HR': 1})
+        self.assertEqual(data['total_departments'], 2)
+
+    def test_stale_instances_do_not_drift(self):
+        hr = Department.objects.get(code='HR')
+        first, second = Asset.objects.get(pk=Asset.objects.first().pk), Asset.objects.first()
+        first.current_department = hr
+        first.save()
+        # second still holds the old department in memory
+        second.status = 'disposed'
+        second.save(update_fields=['status'])
+        self.assertEqual(Asset.objects.get(pk=first.pk).current_department, hr)
+        self.assertEqual(rollups.verify(), [])
+
+        stale = Asset.objects.last()
+        fresh = Asset.objects.get(pk=stale.pk)
+        fresh.status = 'inactive'
+        fresh.save()
+        stale.delete()
+        self.assertEqual(rollups.verify(), [])
+
+    def test_deleting_a_category_or_department_keeps_rollups_and_feed(self):
+        hr = Department.objects.get(code='HR')
+        moved = list(Asset.objects.order_by('pk')[:2])
+        for asset in moved:
+            asset.current_department = hr
+            asset.save()
+        ChangeLogEntry.objects.all().delete()
+        # the collector nulls the FKs with a bulk UPDATE
+        Category.objects.get(code='LAPT').delete()
+        hr.delete()
+        self.assertEqual(rollups.verify(), [])
+        self.assertEqual(AssetRollup.objects.get(dimension='category', key='').count, 4)
+        self.assertEqual(AssetRollup.objects.get(dimension='department', key='').count, 2)
+        logged = ChangeLogEntry.objects.filter(model='asset').values_list('object_id', flat=True)
+        self.assertEqual(set(logged), set(Asset.objects.values_list('pk', flat=True)))
+
+        # a department deleted with assets it owns and holds
+        Department.objects.get(code='IT').delete()
+        self.assertEqual(rollups.verify(), [])
+
+    def test_rebuild_command_repairs_drift(self):
+        AssetRollup.objects.filter(dimension='total').update(count=99)
+        with self.assertRaises(CommandError):
+            call_command('rebuild_rollups', '--verify', stdout=StringIO())
+        call_command('rebuild_rollups', stdout=StringIO())
+        self.assertEqual(rollups.verify(), [])
+
+
+class DepartmentAssetsTestCase(TestCase):
+    def setUp(self):
+        self.user = make_fixture(assets=5, transfers_per_asset=0)
+        self.hr = Department.objects.get(code='HR')
+        for asset in Asset.objects.order_by('id')[:2]:
+            asset.current_department = self.hr
+            asset.save()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def fetch(self, query=''):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse('department-assets') + query)
+            body = json.loads(b''.join(response.streaming_content))
+        self.assertEqual(len(ctx.captured_queries), 1)
+        return body
+
+    def test_groups_assets_in_one_query(self):
+        body = self.fetch()
+        self.assertEqual([d['department_name'] for d in body], ['IT', 'HR'])
+        self.assertEqual([len(d['assets']) for d in body], [3, 2])
+        self.assertEqual(set(body[0]['assets'][0]), {'asset_id', 'name', 'code', 'current_value'})
+        self.assertEqual(self.fetch('?search=zzz'), [])
+
+    def test_per_department_pagination(self):
+        body = self.fetch('?per_department=2&offset=1')
+        self.assertEqual([d['asset_count'] for d in body], [3, 2])
+        self.assertEqual([len(d['assets']) for d in body], [2, 1])
+        body = self.fetch(f'?per_department=2&department={self.hr.pk}')
+        self.assertEqual(len(body), 1)
+
+
+class AssetSearchTestCase(TestCase):
+    def setUp(self):
+        self.user = make_fixture(assets=0)
+        dept = Department.objects.get(code='IT')
+        common = dict(department=dept, created_by=self.user, purchase_date=date(2024, 1, 1),
+                      purchase_price=Decimal('1.00'))
+        self.printer = Asset.objects.create(name='پرینتر لیزری', brand='HP', serial_number='SN-4410', **common)
+        self.laptop = Asset.objects.create(name='Laptop', description='backup printer cable', **common)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def search(self, query):
+        response = self.client.get(reverse('asset-list'), {'search': query})
+        return [row['id'] for row in response.data['results']]
+
+    def test_prefix_and_persian_normalization(self):
+        self.assertEqual(self.search('پرین'), [self.printer.pk])
+        # Arabic yeh/kaf typed on an Arabic keyboard still match
+        self.assertEqual(self.search('ليزري'), [self.printer.pk])
+        self.assertEqual(self.search('sn-44'), [self.printer.pk])
+        self.assertEqual(self.search(self.laptop.code.lower()), [self.laptop.pk])
+        self.assertEqual(self.search('hp lap'), [])
+
+    def test_ranks_name_matches_first_and_follows_edits(self):
+        self.printer.name = 'Printer'
+        self.printer.save()
+        self.assertEqual(self.search('print'), [self.printer.pk, self.laptop.pk])
+        self.laptop.description = ''
+        self.laptop.save()
+        self.assertEqual(self.search('print'), [self.printer.pk])
+
+    def test_works_inside_subqueries(self):
+        # batch transfers select assets with pk__in=<search queryset>
+        response = self.client.post(reverse('transfer-batch'), {
+            'filter': {'search': 'backup'}, 'to_department': Department.objects.get(code='HR').pk,
+        }, format='json')
+        self.assertEqual(response.data['moved_assets'], [self.laptop.pk])
+
+    def test_fulltext_matches_in_the_where_clause(self):
+        with mock.patch.object(search, 'uses_fulltext', return_value=True):
+            queryset = search.search_assets(Asset.objects.all(), 'پرین hp')
+            inner = Asset.objects.filter(pk__in=queryset.values('pk'))
+            sql, params = queryset.query.sql_with_params()
+            str(inner.query)
+        match = 'MATCH ("assetmanagement_assetsearchdocument"."document") AGAINST (%s IN BOOLEAN MODE)'
+        # a bare predicate: MySQL renders boolean expressions (not lookups) as "... = True"
+        self.assertEqual(sql[sql.index(' WHERE '):sql.index(' ORDER BY ')], f' WHERE {match}')
+        self.assertIsInstance(queryset.query.where.children[0], Lookup)
+        self.assertIn(f'{match} AS "search_rank"', sql)
+        self.assertEqual(params.count('+پرین* +hp*'), 2)
+        self.assertNotIn('SELECT MATCH', sql)
+
+
+class AssetImportTestCase(TestCase):
+    CSV = (
+        'name,department,category,status,purchase_date,purchase_price,serial_number\n'
+        'Printer A,IT,LAPT,active,2024-02-01,1200.50,SN-1\n'
+        'Printer B,it,,inactive,2024-02-02,300,SN-2\n'
+        ',IT,LAPT,active,2024-02-03,10,SN-3\n'
+        'Scanner,XX,LAPT,broken,02/04/2024,abc,SN-4\n'
+        'Scanner 2,HR,,,2024-02-05,"1,000",SN-5\n'
+    )
+
+    def setUp(self):
+        self.user = make_fixture(assets=0)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def upload(self, query=''):
+        f = SimpleUploadedFile('assets.csv', self.CSV.encode('utf-8'), content_type='text/csv')
+        return self.client.post(reverse('asset-import') + query, {'file': f}, format='multipart')
+
+    def test_imports_valid_rows_and_reports_errors(self):
+        response = self.upload('?batch_size=2')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['created'], 3)
+        self.assertEqual(response.data['failed'], 2)
+        self.assertEqual([e['row'] for e in response.data['errors']], [4, 5])
+        self.assertEqual(
+            set(response.data['errors'][1]['errors']),
+            {'department', 'status', 'purchase_date', 'purchase_price'},
+        )
+        codes = list(Asset.objects.values_list('code', flat=True))
+        self.assertEqual(len(set(codes)), 3)
+        scanner = Asset.objects.get(name='Scanner 2')
+        self.assertEqual(scanner.current_department.code, 'HR')
+        self.assertEqual(scanner.purchase_price, Decimal('1000'))
+        # bulk inserts are still searchable and counted
+        self.assertEqual(rollups.verify(), [])
+        self.assertEqual(len(self.client.get(reverse('asset-list'), {'search': 'sn-1'}).data['results']), 1)
+
+    def test_imports_xlsx(self):
+        workbook = Workbook()
+        sheet = workbook.active
+        sheet.append(['Name', 'Department', 'Purchase_Date', 'Purchase_Price', 'Serial_Number'])
+        sheet.append(['Router', 'IT', datetime(2024, 3, 1), 99.5, 'R-1'])
+        sheet.append(['Switch', 'HR', '2024-03-02', 12, None])
+        sheet.append([None, None, None, None, None])
+        sheet.append(['Bad', 'IT', 'soon', 1, None])
+        content = BytesIO()
+        workbook.save(content)
+        f = SimpleUploadedFile('assets.xlsx', content.getvalue())
+        response = self.client.post(reverse('asset-import'), {'file': f}, format='multipart')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual((response.data['created'], response.data['failed']), (2, 1))
+        self.assertEqual(response.data['errors'][0]['row'], 5)
+        router_asset = Asset.objects.get(name='Router')
+        self.assertEqual(router_asset.purchase_date, date(2024, 3, 1))
+        self.assertEqual(router_asset.purchase_price, Decimal('99.50'))
+        self.assertEqual(router_asset.serial_number, 'R-1')
+
+    def test_unreadable_files_are_rejected_whole(self):
+        # Windows-1256 (Persian Excel's default); the bad bytes come after the first batch
+        content = self.CSV + 'پرینتر,IT,LAPT,active,2024-02-06,10,SN-6\n'
+        f = SimpleUploadedFile('assets.csv', content.encode('cp1256', errors='replace'), content_type='text/csv')
+        response = self.client.post(reverse('asset-import') + '?batch_size=1', {'file': f}, format='multipart')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('UTF-8', response.data['error'])
+        self.assertFalse(Asset.objects.exists())
+
+        f = SimpleUploadedFile('assets.xlsx', self.CSV.encode('utf-8'))
+        response = self.client.post(reverse('asset-import'), {'file': f}, format='multipart')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('XLSX', response.data['error'])
+
+    def test_dry_run_writes_nothing(self):
+        response = self.upload('?dry_run=1')
+        self.assertEqual(response.data['created'], 3)
+        self.assertFalse(Asset.objects.exists())
+
+
+class BatchTransferTestCase(TestCase):
+    def setUp(self):
+        self.user = make_fixture(assets=5, transfers_per_asset=0)
+        self.it = Department.objects.get(code='IT')
+        self.hr = Department.objects.get(code='HR')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_moves_listed_assets_and_reports_failures(self):
+        ids = list(Asset.objects.order_by('id').values_list('id', flat=True))
+        Asset.objects.filter(pk=ids[0]).update(current_department=self.hr)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post(reverse('transfer-batch'), {
+                'assets': ids[:4] + [999999], 'to_department': self.hr.pk, 'price': '5.00',
+            }, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['moved_assets'], ids[1:4])
+        self.assertEqual(sorted(f['asset'] for f in response.data['failed']), [ids[0], 999999])
+        sql = [q['sql'] for q in ctx.captured_queries]
+        self.assertEqual(sum(q.startswith('INSERT INTO "assetmanagement_assettransfer"') for q in sql), 1)
+        self.assertEqual(sum(q.startswith('UPDATE "assetmanagement_asset" ') for q in sql), 1)
+
+        transfers = AssetTransfer.objects.filter(asset_id__in=ids[1:4])
+        self.assertEqual(transfers.count(), 3)
+        self.assertTrue(all(t.from_department_id == self.it.pk for t in transfers))
+        self.assertEqual(Asset.objects.filter(current_department=self.hr).count(), 4)
+
+    def test_moves_by_filter_and_keeps_rollups(self):
+        rollups.rebuild()
+        response = self.client.post(reverse('transfer-batch'), {
+            'filter': {'department': self.it.pk}, 'to_department': self.hr.pk,
+        }, format='json')
+        self.assertEqual(response.data['moved'], 5)
+        self.assertEqual(rollups.verify(), [])
+
+    @override_settings(SYNC_REDELIVERY_SECONDS=0)
+    def test_finds_transfer_ids_when_the_insert_returns_none(self):
+        bulk_create = AssetTransfer.objects.bulk_create
+
+        def without_ids(objs, *args, **kwargs):
+            # what MySQL gives back
+            created = bulk_create(objs, *args, **kwargs)
+            for transfer in created:
+                transfer.pk = None
+            return created
+
+        AssetTransfer.objects.create(
+            asset=Asset.objects.first(), from_department=self.it, to_department=self.hr, transferred_by=self.user,
+        )
+        token = self.client.get(reverse('sync')).data['token']
+        with mock.patch.object(AssetTransfer.objects, 'bulk_create', side_effect=without_ids), \
+                mock.patch.object(events, 'transfers_created') as published:
+            response = self.client.post(reverse('transfer-batch'), {
+                'filter': {'department': self.it.pk}, 'to_department': self.hr.pk,
+            }, format='json')
+        self.assertEqual(response.data['moved'], 5)
+        batch = set(AssetTransfer.objects.filter(notes='', price=None).order_by('-pk').values_list('pk', flat=True)[:5])
+        self.assertEqual(set(published.call_args.args[0]), batch)
+        saved = self.client.get(reverse('sync'), {'since': token}).data['changes']['transfer']['saved']
+        self.assertEqual({row['id'] for row in saved}, batch)
+
+    def test_rejects_ambiguous_or_empty_selection(self):
+        for payload in ({'to_department': self.hr.pk},
+                        {'to_department': self.hr.pk, 'filter': {'foo': '1'}}):
+            response = self.client.post(reverse('transfer-batch'), payload, format='json')
+            self.assertEqual(response.status_code, 400)
+
+
+class TransferCounterTestCase(TestCase):
+    def setUp(self):
+        self.user = make_fixture(assets=3, transfers_per_asset=2)
+        self.it = Department.objects.get(code='IT')
+        self.hr = Department.objects.get(code='HR')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_counters_follow_every_write_path(self):
+        first, second, third = Asset.objects.order_by('id')
+        self.assertEqual(first.transfer_count, 2)
+        self.assertEqual(first.total_transfer_cost, Decimal('21.00'))
+
+        response = self.client.put(reverse('asset-transfer', args=[first.pk]),
+                                   {'department': self.hr.pk, 'price': '4.00'}, format='json')
+        self.assertEqual(response.data['transfer_count'], 3)
+        self.client.post(reverse('transfer-list'),
+                         {'asset': second.pk, 'to_department': self.hr.pk, 'price': '1.00'}, format='json')
+        self.client.post(reverse('transfer-batch'),
+                         {'assets': [third.pk], 'to_department': self.hr.pk, 'price': '2.00'}, format='json')
+
+        for asset, count, cost in ((first, 3, '25.00'), (second, 3, '22.00'), (third, 3, '23.00')):
+            asset.refresh_from_db()
+            self.assertEqual((asset.transfer_count, asset.total_transfer_cost), (count, Decimal(cost)))
+        latest = AssetTransfer.objects.filter(asset=first).latest('transfer_date')
+        self.assertEqual(first.last_transfer_at, latest.transfer_date)
+
+        latest.delete()
+        first.refresh_from_db()
+        self.assertEqual((first.transfer_count, first.total_transfer_cost), (2, Decimal('21.00')))
+        previous = AssetTransfer.objects.filter(asset=first).latest('transfer_date')
+        self.assertEqual(first.last_transfer_at, previous.transfer_date)
+
+        # a stale instance saved after a transfer keeps the stored counters
+        stale = Asset.objects.get(pk=second.pk)
+        AssetTransfer.objects.create(asset=second, from_department=self.hr, to_department=self.it,
+                                     transferred_by=self.user, price=Decimal('1.00'))
+        stale.name = 'Renamed'
+        stale.save()
+        self.assertEqual(Asset.objects.get(pk=second.pk).transfer_count, 4)
+
+        ordered = self.client.get(reverse('asset-list') + '?ordering=-transfer_count').data['results']
+        self.assertEqual(ordered[0]['id'], second.pk)
+
+    def test_reconcile_repairs_drift(self):
+        Asset.objects.update(transfer_count=0, total_transfer_cost=0)
+        with self.assertRaises(CommandError):
+            call_command('reconcile_transfer_counters', '--verify', stdout=StringIO())
+        call_command('reconcile_transfer_counters', stdout=StringIO())
+        self.assertEqual(counters.verify(), [])
+        self.assertEqual(Asset.objects.first().transfer_count, 2)
+
+
+class MetricsTestCase(TestCase):
+    def setUp(self):
+        self.user = make_fixture(assets=3, transfers_per_asset=1)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        metrics.registry.reset()
+
+    def test_requests_are_exported_per_url_name(self):
+        self.client.get(reverse('asset-list'))
+        self.client.get(reverse('asset-list'))
+        body = self.client.get(reverse('metrics')).content.decode()
+        self.assertIn('http_requests_total{view="asset-list",method="GET",status="200"} 2', body)
+        self.assertIn('http_request_db_queries_count{view="asset-list",method="GET"} 2', body)
+        self.assertIn('http_request_serializer_duration_seconds_sum{view="asset-list"', body)
+        self.assertNotIn('view="metrics"', body)
+
+    @override_settings(METRICS_TOKEN='s3cret')
+    def test_token_required_when_configured(self):
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 401)
+        response = self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer s3cret')
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(SLOW_REQUEST_THRESHOLD_MS=0)
+    def test_slow_requests_log_duplicated_sql(self):
+        with self.assertLogs('assetmanagement.metrics', 'WARNING') as logs:
+            self.client.get(reverse('asset-list'))
+        self.assertIn('Slow request GET /api/assets/ (asset-list)', logs.output[0])
+
+        stats = metrics.RequestStats()
+        stats.statements = [f'SELECT * FROM "brand" WHERE "id" = {i}' for i in range(5)] + ['SELECT 1']
+        self.assertEqual(stats.duplicated_statements(), [('SELECT * FROM "brand" WHERE "id" = ?', 5)])
+
+
+class LoadDataTestCase(TestCase):
+    def test_generator_is_reproducible_and_consistent(self):
+        options = ['--users=3', '--departments=4', '--categories=2', '--brands=2', '--usecases=2',
+                   '--assets=30', '--batch-size=7']
+        call_command('generate_load_data', *options, stdout=StringIO())
+        first = list(Asset.objects.order_by('pk').values_list('name', 'purchase_price', 'transfer_count'))
+        self.assertEqual(len(first), 30)
+        self.assertEqual(counters.verify(), [])
+        self.assertEqual(rollups.verify(), [])
+        self.assertEqual(AssetSearchDocument.objects.count(), 30)
+
+        # reference rows are reused; the same seed gives the same assets again
+        call_command('generate_load_data', *options, stdout=StringIO())
+        self.assertEqual(Department.objects.count(), 4)
+        second = list(Asset.objects.order_by('pk').values_list('name', 'purchase_price', 'transfer_count'))[30:]
+        self.assertEqual(first, second)
+
+    def test_benchmark_writes_results(self):
+        output = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, output, ignore_errors=True)
+        call_command('benchmark_endpoints', '--scale=20', '--generate', '--repeat=1',
+                     f'--output={output}', '--label=run', stdout=StringIO())
+        with open(f'{output}/run.json') as f:
+            results = json.load(f)['results']['20']
+        self.assertEqual(results['asset-list']['status'], 200)
+        self.assertIn('asset-detail', results)
+        self.assertNotIn('login', results)
+
+
+class AsyncReadTestCase(TestCase):
+    def setUp(self):
+        self.user = make_fixture(assets=3, transfers_per_asset=2)
+        self.client = APIClient()
+
+    def test_recent_transfers_keeps_the_drf_contract(self):
+        self.assertEqual(self.client.get(reverse('transfer-recent')).status_code, 401)
+        self.client.force_authenticate(self.user)
+        data = self.client.get(reverse('transfer-recent') + '?limit=4').json()
+        expected = AssetTransferSerializer(
+            AssetTransfer.objects.with_related().order_by('-transfer_date')[:4], many=True
+        ).data
+        self.assertEqual(data, json.loads(json.dumps(expected, cls=DjangoJSONEncoder)))
+
+
+class EventStreamTestCase(TestCase):
+    def setUp(self):
+        self.user = make_fixture(assets=2, transfers_per_asset=0)
+        self.it = Department.objects.get(code='IT')
+        self.hr = Department.objects.get(code='HR')
+        self.loop = asyncio.new_event_loop()
+        self.bus = events._bus = events.LocalBus()
+
+    def tearDown(self):
+        events._bus = None
+        self.loop.close()
+
+    def subscribe(self, departments=None):
+        async def subscribe():
+            return self.bus.subscribe(departments)
+        return self.loop.run_until_complete(subscribe())
+
+    def next_event(self, subscription):
+        return self.loop.run_until_complete(subscription.get(0.5))
+
+    def test_transfers_reach_subscribers_of_their_departments(self):
+        it_only, hr_only, other = self.subscribe([self.it.pk]), self.subscribe([self.hr.pk]), self.subscribe([999])
+        asset = Asset.objects.first()
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            transfer = AssetTransfer.objects.create(
+                asset=asset, from_department=self.it, to_department=self.hr, transferred_by=self.user,
+            )
+            asset.status = 'maintenance'
+            asset.save()
+        self.assertEqual(len(callbacks), 2)
+
+        event = self.next_event(hr_only)
+        self.assertEqual(event.name, 'transfer')
+        self.assertEqual(json.loads(event.frame.decode().split('data: ')[1])['id'], transfer.pk)
+        # the asset itself stays in IT
+        self.assertIsNone(self.next_event(hr_only))
+        self.assertEqual([self.next_event(it_only).name for _ in range(2)], ['transfer', 'asset.status'])
+        self.assertIsNone(self.next_event(other))
+
+    def test_slow_subscriber_is_reset_and_dropped(self):
+        subscription = self.subscribe()
+        with override_settings(EVENT_QUEUE_SIZE=2):
+            slow = self.subscribe()
+        for i in range(3):
+            self.bus.publish(events.Event('asset.status', [self.it.pk], {'id': i}))
+        self.assertEqual(self.next_event(slow), events.RESET)
+        self.assertNotIn(slow, self.bus.subscribers)
+        self.assertIn(subscription, self.bus.subscribers)
+
+    def test_stream_takes_a_ticket_not_the_access_token(self):
+        client = APIClient()
+        token = AccessToken.for_user(self.user)
+        self.assertEqual(client.get(reverse('events')).status_code, 401)
+        self.assertEqual(client.get(reverse('events'), {'access_token': str(token)}).status_code, 401)
+        self.assertEqual(client.get(reverse('events'), {'ticket': str(token)}).status_code, 401)
+        self.assertEqual(client.post(reverse('event-ticket')).status_code, 401)
+
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        ticket = client.post(reverse('event-ticket')).json()['ticket']
+        self.assertEqual(events.read_ticket(ticket), (self.user.pk, token['exp']))
+        # the ticket is not an access token either
+        self.assertEqual(APIClient().get(reverse('asset-list'), HTTP_AUTHORIZATION=f'Bearer {ticket}').status_code, 401)
+        response = APIClient().get(reverse('events'), {'ticket': ticket, 'department': 'x'})
+        self.assertEqual(response.status_code, 400)
+        with override_settings(EVENT_TICKET_SECONDS=-1):
+            self.assertIsNone(events.read_ticket(ticket))
+
+    def test_stream_ends_when_the_access_token_expires(self):
+        subscription = self.subscribe()
+        stream = events.frames(subscription, heartbeat=0.05, until=time.time() + 0.2)
+
+        async def read_all():
+            return [frame async for frame in stream]
+
+        frames = self.loop.run_until_complete(read_all())
+        self.assertTrue(frames[0].startswith(b'retry:'))
+        self.assertEqual(frames[-1], events.EXPIRED)
+        self.assertIn(events.HEARTBEAT, frames)
+        self.assertNotIn(subscription, self.bus.subscribers)
+
+
+@override_settings(DATABASE_REPLICAS=['replica1', 'replica2'])
+class ReplicaRoutingTestCase(SimpleTestCase):
+    def setUp(self):
+        # pins need a cache every process sees; files stand in for Redis here
+        pin_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, pin_dir, ignore_errors=True)
+        override = override_settings(CACHES={
+            **settings.CACHES,
+            'replica-pins': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': pin_dir},
+        })
+        override.enable()
+        self.addCleanup(override.disable)
+        replicas._health.clear()
+        self.factory = RequestFactory()
+
+    def mark(self, **usable):
+        for alias, ok in usable.items():
+            replicas._health[alias] = (time.monotonic(), ok)
+
+    def read_alias(self, method, path, token='a', status=200):
+        seen = []
+
+        def view(request):
+            seen.append(router.db_for_read(Asset))
+            return HttpResponse(status=status)
+        request = self.factory.generic(method, path, HTTP_AUTHORIZATION=f'Bearer {token}')
+        replicas.ReplicaMiddleware(view)(request)
+        return seen[0] or 'default'
+
+    def test_list_reads_rotate_over_healthy_replicas(self):
+        self.mark(replica1=True, replica2=True)
+        seen = {self.read_alias('GET', reverse('asset-list')) for _ in range(4)}
+        self.assertEqual(seen, {'replica1', 'replica2'})
+        self.assertEqual(self.read_alias('GET', reverse('sync')), 'default')
+        self.assertEqual(self.read_alias('PATCH', reverse('asset-detail', args=[1])), 'default')
+
+    def test_writes_pin_the_token_to_the_primary(self):
+        self.mark(replica1=True, replica2=True)
+        self.read_alias('POST', reverse('transfer-batch'), status=400)
+        self.assertNotEqual(self.read_alias('GET', reverse('asset-list')), 'default')
+        self.read_alias('PUT', reverse('asset-transfer', args=[1]))
+        self.assertEqual(self.read_alias('GET', reverse('asset-list')), 'default')
+        self.assertNotEqual(self.read_alias('GET', reverse('asset-list'), token='b'), 'default')
+
+    def test_refuses_a_per_process_pin_cache(self):
+        pins = {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}
+        with self.settings(CACHES={**settings.CACHES, 'replica-pins': pins}):
+            with self.assertRaises(ImproperlyConfigured):
+                replicas.ReplicaMiddleware(lambda request: HttpResponse())
+            with self.settings(DATABASE_REPLICAS=[]):
+                replicas.ReplicaMiddleware(lambda request: HttpResponse())
+        with self.settings(REPLICA_PIN_CACHE='missing'), self.assertRaises(ImproperlyConfigured):
+            replicas.ReplicaMiddleware(lambda request: HttpResponse())
+
+    def test_database_cache_reads_stay_on_the_primary(self):
+        self.mark(replica1=True, replica2=True)
+        seen = []
+
+        def view(request):
+            seen.append(router.db_for_read(Asset))
+            seen.append(router.db_for_read(caches['replica-pins'].cache_model_class))
+            return HttpResponse()
+        with self.settings(CACHES={**settings.CACHES, 'replica-pins': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache', 'LOCATION': 'replica_pins',
+        }}):
+            replicas.ReplicaMiddleware(view)(self.factory.get(reverse('asset-list')))
+        self.assertIn(seen[0], ('replica1', 'replica2'))
+        self.assertEqual(seen[1], 'default')
+
+    def test_lagging_or_missing_replicas_are_skipped(self):
+        self.mark(replica1=False, replica2=True)
+        self.assertEqual({self.read_alias('GET', reverse('department-assets')) for _ in range(3)}, {'replica2'})
+        self.mark(replica2=False)
+        self.assertEqual(self.read_alias('GET', reverse('department-assets')), 'default')
+        # an alias missing from DATABASES counts as unreachable
+        replicas._health.clear()
+        with self.assertLogs('assetmanagement.replicas', 'WARNING'):
+            self.assertEqual(self.read_alias('GET', reverse('asset-list')), 'default')
+
+
+class AsyncGatherTestCase(TransactionTestCase):
+    def test_dashboard_queries_run_on_their_own_connections(self):
+        user = make_fixture(assets=2, transfers_per_asset=1)
+        rollups.rebuild()
+        client = APIClient()
+        client.force_authenticate(user)
+        response = client.get(reverse('dashboard_stats'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['total_assets'], 2)
+        self.assertEqual(len(response.json()['recent_transfers']), 2)
+
+    def test_pool_threads_reuse_their_connections(self):
+        user = make_fixture(assets=1, transfers_per_asset=0)
+        client = APIClient()
+        client.force_authenticate(user)
+        opened = []
+
+        def created(sender, connection, **kwargs):
+            opened.append(connection)
+
+        connection_created.connect(created)
+        try:
+            with mock.patch.dict(connections.settings['default'], CONN_MAX_AGE=60):
+                for _ in range(3):
+                    self.assertEqual(client.get(reverse('dashboard_stats')).status_code, 200)
+        finally:
+            connection_created.disconnect(created)
+        # three queries a request: at most one connection per pool thread, not nine
+        self.assertLessEqual(len(opened), async_views.ASYNC_GATHER_WORKERS)
+
+
+class DepreciationTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='dep', password='pw', role='admin')
+        self.dept = Department.objects.create(name='IT', code='IT')
+        self.straight = Category.objects.create(
+            name='Laptop', code='LAPT', useful_life_years=8, salvage_percent=Decimal('10'),
+        )
+        self.declining = Category.objects.create(
+            name='Vehicle', code='VEHI', depreciation_method='declining_balance',
+            useful_life_years=5, declining_rate=Decimal('0.5'),
+        )
+
+    def make_asset(self, category, **kwargs):
+        values = {'name': 'Item', 'purchase_date': date(2020, 1, 1), 'purchase_price': Decimal('1000.00')}
+        values.update(kwargs)
+        return Asset.objects.create(category=category, department=self.dept, created_by=self.user, **values)
+
+    def test_methods_and_rollups(self):
+        halfway = self.make_asset(self.straight)
+        written_off = self.make_asset(self.straight, purchase_date=date(2010, 1, 1))
+        declining = self.make_asset(self.declining, purchase_price=Decimal('1600.00'))
+        disposed = self.make_asset(self.straight, status='disposed')
+        uncategorized = self.make_asset(None)
+
+        run = depreciation.revalue(as_of=date(2024, 1, 1))
+        values = dict(Asset.objects.values_list('pk', 'current_value'))
+        self.assertEqual(values[halfway.pk], 550)        # 1000 - 900 * 4/8 (four years)
+        self.assertEqual(values[written_off.pk], 100)    # floored at 10% salvage
+        self.assertEqual(values[declining.pk], 100)      # 1600 * 0.5 ** 4
+        self.assertEqual(values[disposed.pk], 0)
+        self.assertEqual(values[uncategorized.pk], 1000)
+        self.assertEqual((run.assets_seen, run.assets_changed), (5, 5))
+        self.assertEqual(rollups.verify(), [])
+
+        # nothing moves on the same date
+        self.assertEqual(depreciation.revalue(as_of=date(2024, 1, 1)).assets_changed, 0)
+
+    def test_incremental_run_only_reads_edited_assets(self):
+        edited = self.make_asset(self.straight)
+        self.make_asset(self.straight)
+        self.make_asset(self.declining)
+        depreciation.revalue(as_of=date(2024, 1, 1))
+
+        edited.purchase_price = Decimal('2000.00')
+        edited.save()
+        run = depreciation.revalue(as_of=date(2024, 1, 1), incremental=True)
+        self.assertEqual((run.assets_seen, run.assets_changed), (1, 1))
+        edited.refresh_from_db()
+        self.assertEqual(edited.current_value, 1100)
+
+        self.declining.declining_rate = Decimal('0.25')
+        self.declining.save()
+        run = depreciation.revalue(as_of=date(2024, 1, 1), incremental=True)
+        self.assertEqual((run.assets_seen, run.assets_changed), (1, 1))
+        self.assertEqual(rollups.verify(), [])
+
+    def test_command_validates_and_reports(self):
+        self.make_asset(self.straight)
+        out = StringIO()
+        call_command('revalue_assets', '--as-of=2024-01-01', '--chunk-size=1', stdout=out)
+        self.assertIn('Revalued 1 assets as of 2024-01-01: 1 changed', out.getvalue())
+        with self.assertRaises(CommandError):
+            call_command('revalue_assets', '--as-of=yesterday', stdout=StringIO())
+
+
+class CodeAllocationTestCase(TestCase):
+    def test_codes_are_sequential_and_never_reused(self):
+        first = UseCase.objects.create(name='A')
+        second = UseCase.objects.create(name='B')
+        self.assertEqual([first.code, second.code], ['UC0001', 'UC0002'])
+        second.delete()
+        self.assertEqual(UseCase.objects.create(name='C').code, 'UC0003')
+        self.assertEqual(Brand.objects.create(name='HP').code, 'BR0001')
+
+    def test_first_allocation_continues_after_existing_codes(self):
+        Brand.objects.bulk_create([Brand(name='Old', code='BR0041')])
+        self.assertEqual(Brand.objects.create(name='New').code, 'BR0042')
+
+    def test_block_allocation(self):
+        self.assertEqual(codes.code_block('asset', 3), ['AS-000001', 'AS-000002', 'AS-000003'])
+        self.assertEqual(codes.next_code('asset'), 'AS-000004')
+        self.assertEqual(CodeSequence.objects.get(name='asset').last_value, 4)
+
+
+class TransferArchiveTestCase(TestCase):
+    def setUp(self):
+        self.user = make_fixture(assets=2, transfers_per_asset=2)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.old, self.new = Asset.objects.order_by('pk')
+        AssetTransfer.objects.filter(asset=self.old).update(transfer_date=timezone.now() - timedelta(days=800))
+        counters.reconcile()
+        self.timeline = self.client.get(reverse('asset-timeline', args=[self.old.pk])).json()
+
+    def test_moves_old_transfers_in_batches(self):
+        out = StringIO()
+        call_command('archive_transfers', '--dry-run', stdout=out)
+        self.assertIn('2 transfers', out.getvalue())
+        entries = ChangeLogEntry.objects.count()
+
+        call_command('archive_transfers', '--batch-size=1', stdout=out)
+        self.assertEqual(ArchivedTransfer.objects.filter(asset=self.old).count(), 2)
+        self.assertEqual(set(AssetTransfer.objects.values_list('asset_id', flat=True)), {self.new.pk})
+        # archived transfers still count, and are not deletions for sync clients
+        self.assertEqual(counters.verify(), [])
+        self.assertEqual(ChangeLogEntry.objects.count(), entries)
+        self.assertEqual(self.client.get(reverse('transfer-list')).data['count'], 2)
+
+    def test_history_reads_both_tables(self):
+        AssetTransfer.objects.create(
+            asset=self.old, from_department=self.old.department, to_department=self.old.department,
+            transferred_by=self.user,
+        )
+        archive.archive(days=365)
+        with CaptureQueriesContext(connection) as ctx:
+            timeline = self.client.get(reverse('asset-timeline', args=[self.old.pk])).json()
+        self.assertLessEqual(len(ctx.captured_queries), QUERY_BUDGETS['asset-timeline'])
+        self.assertEqual(timeline['transfers'][:2], self.timeline['transfers'])
+        self.assertEqual(timeline['transfer_count'], 3)
+
+        response = self.client.get(reverse('transfer-export'), {'output': 'jsonl', 'asset': self.old.pk})
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+        self.assertEqual(len(rows), 3)
+
+
+class ExportTestCase(TestCase):
+    def setUp(self):
+        self.user = make_fixture(assets=5, transfers_per_asset=2)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_streams_assets_as_csv_in_chunks(self):
+        queryset = Asset.objects.all()
+        rows = list(exports.export_rows(queryset, exports.ASSET_COLUMNS, chunk_size=2))
+        self.assertEqual([r[0] for r in rows], sorted(queryset.values_list('id', flat=True)))
+
+        response = self.client.get(reverse('asset-export'), {'category': Category.objects.get().pk})
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        lines = b''.join(response.streaming_content).decode('utf-8-sig').splitlines()
+        self.assertEqual(lines[0].split(',')[:3], ['id', 'code', 'name'])
+        self.assertEqual(len(lines), 6)
+        self.assertIn('Test User', lines[1])
+
+    def test_streams_transfers_as_jsonl(self):
+        asset = Asset.objects.first()
+        response = self.client.get(reverse('transfer-export'), {'output': 'jsonl', 'asset': asset.pk})
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[0]['from_department'], 'IT')
+        self.assertEqual(rows[0]['price'], '10.50')
+        self.assertEqual(self.client.get(reverse('transfer-export'), {'output': 'xml'}).status_code, 400)
+
+    def test_command_exports_archived_transfers(self):
+        asset = Asset.objects.first()
+        AssetTransfer.objects.filter(asset=asset).update(transfer_date=timezone.now() - timedelta(days=800))
+        self.assertEqual(archive.archive(), 2)
+
+        def exported(*args):
+            out = StringIO()
+            call_command('export_data', 'transfers', '--output', 'jsonl', *args, stdout=out)
+            return [json.loads(line) for line in out.getvalue().splitlines()]
+
+        rows = exported()
+        self.assertEqual(len(rows), 10)
+        # the archive comes first, like the API export
+        self.assertEqual({row['asset_id'] for row in rows[:2]}, {asset.pk})
+        self.assertEqual(len(exported('--asset', str(asset.pk))), 2)
+        self.assertEqual(len(exported('--no-archived')), 8)
+
+
+class ReferenceCacheTestCase(TestCase):
+    def setUp(self):
+        self.user = make_fixture(assets=0)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        caching.get_cache().clear()
+
+    def test_etag_304_and_version_bump(self):
+        url = reverse('brand-list')
+        Brand.objects.create(name='HP')
+        first = self.client.get(url)
+        etag = first['ETag']
+
+        with CaptureQueriesContext(connection) as ctx:
+            cached = self.client.get(url)
+        self.assertEqual(cached.data, first.data)
+        self.assertEqual(len(ctx.captured_queries), 1)  # version lookup only
+
+        not_modified = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(not_modified.content, b'')
+
+        Brand.objects.create(name='Dell')
+        fresh = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(fresh.status_code, 200)
+        self.assertEqual(len(fresh.data), 2)
+        self.assertNotEqual(fresh['ETag'], etag)
+
+    def test_paginated_views_cache_each_page(self):
+        url = reverse('department-list')
+        self.assertEqual(self.client.get(url).data['count'], 2)
+        Department.objects.create(name='OPS', code='OPS')
+        self.assertEqual(self.client.get(url).data['count'], 3)
+        stats = self.client.get(reverse('cache-stats')).data
+        self.assertGreaterEqual(stats['department']['miss'], 2)
+
+    def test_only_manager_changes_bump_departments(self):
+        it = Department.objects.get(code='IT')
+        other = User.objects.create_user(username='other', password='pw')
+        version = caching.get_version('department')
+        self.user.last_login = timezone.now()
+        self.user.save(update_fields=['last_login'])
+        self.user.save()
+        other.first_name = 'Renamed'
+        other.save()
+        self.assertEqual(caching.get_version('department'), version)
+
+        it.manager = self.user
+        it.save()
+        version = caching.get_version('department')
+        self.user.set_password('new')
+        self.user.save()
+        self.assertEqual(caching.get_version('department'), version)
+        self.user.last_name = 'Manager'
+        self.user.save(update_fields=['last_name'])
+        self.assertEqual(caching.get_version('department'), version + 1)
+        rows = {row['id']: row for row in self.client.get(reverse('department-list')).data['results']}
+        self.assertEqual(rows[it.pk]['manager_name'], 'Test Manager')
+
+
+def make_image(name='invoice.png', size=(2000, 1500)):
+    buffer = BytesIO()
+    PILImage.new('RGB', size, 'navy').save(buffer, 'PNG')
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/png')
+
+
+class MediaPipelineTestCase(TransactionTestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=self.media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.user = make_fixture(assets=1, transfers_per_asset=0)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_variants_built_after_upload_and_deleted_with_row(self):
+        asset = Asset.objects.get()
+        hr = Department.objects.get(code='HR')
+        self.client.put(reverse('asset-transfer', args=[asset.pk]),
+                        {'department': hr.pk, 'image': make_image()}, format='multipart')
+        media.wait()
+
+        transfer = AssetTransfer.objects.get()
+        thumb = media.variant_name(transfer.image.name, 'thumb')
+        self.assertTrue(default_storage.exists(thumb))
+        with default_storage.open(thumb) as f:
+            self.assertLessEqual(max(PILImage.open(f).size), 240)
+        self.assertEqual(MediaBlob.objects.get(name=transfer.image.name).variants, 'thumb web')
+        # URLs come from the recorded variants, never from storage lookups
+        with mock.patch.object(default_storage, 'exists', side_effect=AssertionError('storage probed')):
+            row = self.client.get(reverse('transfer-list')).data['results'][0]
+            self.assertTrue(row['image_variants']['thumb'].endswith(thumb))
+            expanded = self.client.get(reverse('transfer-list'), {'expand': 'asset'}).data['results'][0]
+            self.assertEqual(expanded['image_variants'], row['image_variants'])
+            timeline = self.client.get(reverse('asset-timeline', args=[asset.pk])).json()
+            self.assertTrue(timeline['transfers'][0]['image_variants']['thumb'].endswith(thumb))
+
+        # until they are recorded the original is served
+        MediaBlob.objects.update(variants='')
+        row = self.client.get(reverse('transfer-list')).data['results'][0]
+        self.assertTrue(row['image_variants']['thumb'].endswith(transfer.image.name))
+
+        transfer.delete()
+        media.wait()
+        self.assertFalse(default_storage.exists(transfer.image.name))
+        self.assertFalse(default_storage.exists(thumb))
+
+    def test_identical_uploads_share_one_file_until_last_reference(self):
+        asset = Asset.objects.get()
+        hr = Department.objects.get(code='HR')
+        it = Department.objects.get(code='IT')
+        image = make_image().read()
+        for department in (hr, it):
+            self.client.put(reverse('asset-transfer', args=[asset.pk]),
+                            {'department': department.pk,
+                             'image': SimpleUploadedFile('invoice.png', image, 'image/png')},
+                            format='multipart')
+        media.wait()
+
+        first, second = AssetTransfer.objects.order_by('pk')
+        self.assertEqual(first.image.name, second.image.name)
+        self.assertTrue(first.image.name.startswith('blobs/'))
+        self.assertEqual(MediaBlob.objects.get(name=first.image.name).ref_count, 2)
+
+        first.delete()
+        media.wait()
+        self.assertTrue(default_storage.exists(second.image.name))
+        self.assertEqual(MediaBlob.objects.get(name=second.image.name).ref_count, 1)
+
+        second.delete()
+        media.wait()
+        self.assertFalse(default_storage.exists(second.image.name))
+        self.assertFalse(MediaBlob.objects.exists())
@@ -1,7 +1,7 @@
 # backend/assetmanagement/urls.py
 
 from django.urls import path
-from . import views
+from . import async_views, views
 from .views import DepartmentListCreateView, DepartmentDetailView, CategoryListCreateView, CategoryDetailView
 from rest_framework.routers import DefaultRouter
 urlpatterns = [
@@ -11,7 +11,7 @@ urlpatterns = [
     path('auth/profile/', views.profile_view, name='profile'),
 
     # Dashboard
-    path('dashboard/stats/', views.dashboard_stats, name='dashboard_stats'),
+    path('dashboard/stats/', async_views.dashboard_stats, name='dashboard_stats'),
 
     # Departments
     path('departments/', views.DepartmentListCreateView.as_view(), name='department-list'),
@@ -21,12 +21,18 @@ urlpatterns = [
 
     # assets
     path('assets/', views.AssetListCreateView.as_view(), name='asset-list'),
+    path('assets/import/', views.asset_import_view, name='asset-import'),
+    path('assets/export/', views.asset_export_view, name='asset-export'),
     path('assets/<int:pk>/', views.AssetDetailView.as_view(), name='asset-detail'),
     path('assets/<int:pk>/transfer/', views.asset_transfer_view, name='asset-transfer'),  # ✅ New route
+    path('assets/<int:pk>/timeline/', views.asset_timeline_view, name='asset-timeline'),
 
 
     # Transfers
     path('transfers/', views.AssetTransferListCreateView.as_view(), name='transfer-list'),
+    path('transfers/recent/', async_views.recent_transfers, name='transfer-recent'),
+    path('transfers/batch/', views.batch_transfer_view, name='transfer-batch'),
+    path('transfers/export/', views.transfer_export_view, name='transfer-export'),
 
     # Admin
     path('admin/users/', views.UserListCreateView.as_view(), name='user-list'),
@@ -43,4 +49,11 @@ urlpatterns = [
 
     path('usecases/', views.usecase_list, name='usecase-list'),
     path('usecases/<int:pk>/', views.usecase_detail, name='usecase-detail'),
+
+    path('sync/', views.sync_view, name='sync'),
+    path('events/', async_views.event_stream, name='events'),
+    path('events/ticket/', async_views.event_ticket, name='event-ticket'),
+
+    path('cache/stats/', views.cache_stats_view, name='cache-stats'),
+    path('metrics/', views.metrics_view, name='metrics'),
 ]
@@ -1,21 +1,43 @@
 # backend/propertycontrol/views.py
+import hmac
+import json
+import logging
+from functools import partial
+from itertools import chain
 
 from rest_framework.exceptions import ValidationError
 from rest_framework import generics, status, permissions, viewsets
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, permission_classes, parser_classes
 from rest_framework.response import Response
 from rest_framework_simplejwt.tokens import RefreshToken
+from django.conf import settings
 from django.contrib.auth import authenticate
-from django.db.models import Q
+from django.db import transaction
+from django.db.models import Count, F, Max, Window
+from django.db.models.functions import RowNumber
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.views.decorators.http import require_GET
 from rest_framework.parsers import MultiPartParser, FormParser
 
-from .models import User, Department, Category, Asset, AssetTransfer, Brand, UseCase
+from . import archive, changelog, conditional, counters, events, exports, fastread, media, metrics, rollups
+from .caching import VersionedCacheMixin, cached_response, stats as cache_stats
+from .importer import AssetImporter, ImportFormatError, DEFAULT_BATCH_SIZE, read_rows
+from .fastread import FastListMixin
+from .fieldsets import SparseQuerysetMixin
+from .filters import filter_assets, filter_transfers
+from .pagination import KeysetPaginationMixin, AssetKeysetPagination, TransferKeysetPagination
+from .models import User, Department, Category, Asset, ArchivedTransfer, AssetTransfer, Brand, UseCase
 from .serializers import (
     UserSerializer, LoginSerializer, DepartmentSerializer,
     CategorySerializer, AssetSerializer, AssetTransferSerializer,
-    AssetTransferCreateSerializer, BrandSerializer, UseCaseSerializer
+    AssetTransferCreateSerializer, BatchTransferSerializer, BrandSerializer, UseCaseSerializer
 )
 
+logger = logging.getLogger(__name__)
+
+BATCH_TRANSFER_LIMIT = 5000
+
 
 class IsAdminUser(permissions.BasePermission):
     def has_permission(self, request, view):
@@ -63,30 +85,33 @@ def profile_view(request):
 # Departments
 # --------------------
 
-class DepartmentListCreateView(generics.ListCreateAPIView):
-    queryset = Department.objects.all()
+class DepartmentListCreateView(SparseQuerysetMixin, VersionedCacheMixin, generics.ListCreateAPIView):
+    queryset = Department.objects.select_related('manager')
     serializer_class = DepartmentSerializer
     permission_classes = [permissions.IsAuthenticated]
+    cache_name = 'department'
 
 
 # --------------------
 # Categories
 # --------------------
 
-class CategoryListCreateView(generics.ListCreateAPIView):
+class CategoryListCreateView(VersionedCacheMixin, generics.ListCreateAPIView):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
     permission_classes = [permissions.IsAuthenticated]
+    cache_name = 'category'
 
 
 # --------------------
 # Assets
 # --------------------
 
-class AssetListCreateView(generics.ListCreateAPIView):
-    queryset = Asset.objects.all()
+class AssetListCreateView(FastListMixin, SparseQuerysetMixin, KeysetPaginationMixin, generics.ListCreateAPIView):
+    queryset = Asset.objects.for_read()
     serializer_class = AssetSerializer
     permission_classes = [permissions.IsAuthenticated]
+    keyset_pagination_class = AssetKeysetPagination
 
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
@@ -96,39 +121,71 @@ class AssetListCreateView(generics.ListCreateAPIView):
             headers = self.get_success_headers(serializer.data)
             return Response(serializer.data, status=status.HTTP_201_CREATED, headers=headers)
         except ValidationError as e:
-            print("🔴 Asset validation error:", e.detail)
+            logger.info("Asset validation error: %s", e.detail)
             return Response(e.detail, status=status.HTTP_400_BAD_REQUEST)
 
     def perform_create(self, serializer):
         serializer.save(created_by=self.request.user)
 
     def get_queryset(self):
-        queryset = Asset.objects.all()
-        search = self.request.query_params.get('search', None)
-        department = self.request.query_params.get('department', None)
-        category = self.request.query_params.get('category', None)
-
-        if search:
-            queryset = queryset.filter(
-                Q(name__icontains=search) |
-                Q(code__icontains=search) |
-                Q(description__icontains=search)
-            )
+        return filter_assets(super().get_queryset(), self.request.query_params)
+
+    def get(self, request, *args, **kwargs):
+        if self.use_keyset_pagination():
+            # the probe scans every filtered row; cursor pages exist to avoid that
+            return super().get(request, *args, **kwargs)
+        queryset = filter_assets(Asset.objects.all(), request.query_params)
+        validators = partial(conditional.asset_list_validators, request, queryset)
+        return conditional.respond(request, validators, super().get, *args, **kwargs)
+
+
+# Bulk import via POST /assets/import/ (multipart, field "file")
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+@parser_classes([MultiPartParser, FormParser])
+def asset_import_view(request):
+    upload = request.FILES.get('file')
+    if upload is None:
+        return Response({"error": "A CSV or XLSX file is required."}, status=status.HTTP_400_BAD_REQUEST)
 
-        if department:
-            queryset = queryset.filter(current_department__id=department)
+    try:
+        batch_size = int(request.query_params.get('batch_size', DEFAULT_BATCH_SIZE))
+    except ValueError:
+        batch_size = DEFAULT_BATCH_SIZE
+    dry_run = request.query_params.get('dry_run') in ('1', 'true')
 
-        if category:
-            queryset = queryset.filter(category__id=category)
+    importer = AssetImporter(request.user, batch_size=min(batch_size, 5000), dry_run=dry_run)
+    try:
+        report = importer.run(read_rows(upload, upload.name))
+    except ImportFormatError as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-        return queryset
+    code = status.HTTP_200_OK if dry_run or not report['created'] else status.HTTP_201_CREATED
+    return Response(report, status=code)
 
 
-class AssetDetailView(generics.RetrieveUpdateDestroyAPIView):
-    queryset = Asset.objects.all()
+class AssetDetailView(SparseQuerysetMixin, generics.RetrieveUpdateDestroyAPIView):
+    queryset = Asset.objects.for_read()
     serializer_class = AssetSerializer
     permission_classes = [permissions.IsAuthenticated]
 
+    # ETag / Last-Modified on reads, If-Match on writes (see conditional.py)
+    def conditional(self, handler, request, *args, **kwargs):
+        validators = partial(conditional.asset_validators, request, kwargs['pk'])
+        return conditional.respond(request, validators, handler, *args, **kwargs)
+
+    def get(self, request, *args, **kwargs):
+        return self.conditional(super().get, request, *args, **kwargs)
+
+    def put(self, request, *args, **kwargs):
+        return self.conditional(super().put, request, *args, **kwargs)
+
+    def patch(self, request, *args, **kwargs):
+        return self.conditional(super().patch, request, *args, **kwargs)
+
+    def delete(self, request, *args, **kwargs):
+        return self.conditional(super().delete, request, *args, **kwargs)
+
 
 # ✅ Asset Transfer via PUT /assets/<pk>/transfer/
 @api_view(['PUT'])
@@ -139,50 +196,86 @@ def asset_transfer_view(request, pk):
         # DRF does NOT automatically attach .FILES for function-based views, but running _load_post_and_files helps.
         request._load_post_and_files()
 
-    try:
-        asset = Asset.objects.get(pk=pk)
-    except Asset.DoesNotExist:
-        return Response({"error": "Asset not found."}, status=status.HTTP_404_NOT_FOUND)
-
-    new_department_id = request.data.get("department")
-    if not new_department_id:
-        return Response({"error": "Department ID is required."}, status=status.HTTP_400_BAD_REQUEST)
+    # lock the asset so concurrent transfers serialize and rollups stay exact
+    with transaction.atomic():
+        try:
+            asset = Asset.objects.select_for_update().get(pk=pk)
+        except Asset.DoesNotExist:
+            return Response({"error": "Asset not found."}, status=status.HTTP_404_NOT_FOUND)
 
-    try:
-        new_department = Department.objects.get(pk=new_department_id)
-    except Department.DoesNotExist:
-        return Response({"error": "Target department does not exist."}, status=status.HTTP_404_NOT_FOUND)
-
-    # New: Get price/image from request
-    price = request.data.get("price")  # may be string, cast/validate as needed
-    image = request.FILES.get("image")  # file object or None
-
-    # New: Get notes too (optional)
-    notes = request.data.get("notes", "")
-
-    AssetTransfer.objects.create(
-        asset=asset,
-        from_department=asset.current_department,
-        to_department=new_department,
-        transferred_by=request.user,
-        price=price if price is not None and price != "" else None,
-        image=image if image is not None else None,
-        notes=notes,
-    )
+        new_department_id = request.data.get("department")
+        if not new_department_id:
+            return Response({"error": "Department ID is required."}, status=status.HTTP_400_BAD_REQUEST)
 
-    asset.current_department = new_department
-    asset.save()
+        try:
+            new_department = Department.objects.get(pk=new_department_id)
+        except Department.DoesNotExist:
+            return Response({"error": "Target department does not exist."}, status=status.HTTP_404_NOT_FOUND)
+
+        # New: Get price/image from request
+        price = request.data.get("price")  # may be string, cast/validate as needed
+        image = request.FILES.get("image")  # file object or None
+
+        # New: Get notes too (optional)
+        notes = request.data.get("notes", "")
+
+        AssetTransfer.objects.create(
+            asset=asset,
+            from_department=asset.current_department,
+            to_department=new_department,
+            transferred_by=request.user,
+            price=price if price is not None and price != "" else None,
+            image=image if image is not None else None,
+            notes=notes,
+        )
+
+        asset.current_department = new_department
+        asset.save()
+        asset.refresh_from_db(fields=Asset.COUNTER_FIELDS)
 
     return Response(AssetSerializer(asset).data, status=status.HTTP_200_OK)
 
 
+# Transfer history of one asset via GET /assets/<pk>/timeline/
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def asset_timeline_view(request, pk):
+    asset = Asset.objects.filter(pk=pk).values('pk', 'code', 'name', 'department_id', 'created_at').first()
+    if asset is None:
+        return Response({"error": "Asset not found."}, status=status.HTTP_404_NOT_FOUND)
+
+    # hot and archived transfers in one UNION ALL, each side walking its
+    # (asset, transfer_date, id) index; names come from the same query
+    serializer = AssetTransferSerializer(context={'request': request})
+    reader = fastread.reader_for(serializer)
+    if reader is not None:
+        data = reader.render(archive.history_values(reader, asset_id=pk))
+    else:
+        transfers = chain(
+            ArchivedTransfer.objects.with_related().filter(asset_id=pk),
+            AssetTransfer.objects.with_related().filter(asset_id=pk),
+        )
+        transfers = sorted(transfers, key=lambda t: (t.transfer_date, t.pk))
+        data = AssetTransferSerializer(transfers, many=True, context={'request': request}).data
+    return Response({
+        "asset": asset['pk'],
+        "code": asset['code'],
+        "name": asset['name'],
+        "department": asset['department_id'],
+        "created_at": asset['created_at'],
+        "transfer_count": len(data),
+        "transfers": data,
+    })
+
+
 # --------------------
 # Transfers
 # --------------------
 
-class AssetTransferListCreateView(generics.ListCreateAPIView):
-    queryset = AssetTransfer.objects.all()
+class AssetTransferListCreateView(FastListMixin, SparseQuerysetMixin, KeysetPaginationMixin, generics.ListCreateAPIView):
+    queryset = AssetTransfer.objects.with_related()
     permission_classes = [permissions.IsAuthenticated]
+    keyset_pagination_class = TransferKeysetPagination
 
     def get_serializer_class(self):
         if self.request.method == 'POST':
@@ -190,55 +283,156 @@ class AssetTransferListCreateView(generics.ListCreateAPIView):
         return AssetTransferSerializer
 
     def get_queryset(self):
-        queryset =AssetTransfer.objects.all()
-        asset_id = self.request.query_params.get('asset', None)
+        return filter_transfers(super().get_queryset(), self.request.query_params)
+
 
-        if asset_id:
-            queryset = queryset.filter(asset__id=asset_id)
+# Batch transfer via POST /transfers/batch/
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+def batch_transfer_view(request):
+    serializer = BatchTransferSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    data = serializer.validated_data
+    target = data['to_department']
+
+    if 'assets' in data:
+        requested = list(dict.fromkeys(data['assets']))
+        assets = Asset.objects.filter(pk__in=requested)
+    else:
+        requested = None
+        assets = filter_assets(Asset.objects.all(), data['filter'])
+
+    failed = []
+    with transaction.atomic():
+        # lock in id order so overlapping batches cannot deadlock
+        rows = list(
+            Asset.objects.select_for_update()
+            .filter(pk__in=assets.values('pk'))
+            .order_by('pk')
+            .values('pk', *rollups.TRACKED_FIELDS)[:BATCH_TRANSFER_LIMIT + 1]
+        )
+        if len(rows) > BATCH_TRANSFER_LIMIT:
+            return Response(
+                {"error": f"At most {BATCH_TRANSFER_LIMIT} assets can be moved at once."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
 
-        return queryset
+        if requested is not None:
+            found = {row['pk'] for row in rows}
+            failed += [{"asset": pk, "error": "Asset not found."} for pk in requested if pk not in found]
+
+        moving = []
+        for row in rows:
+            if row['current_department_id'] == target.pk:
+                failed.append({"asset": row['pk'], "error": "Asset is already in the target department."})
+            elif row['current_department_id'] is None:
+                failed.append({"asset": row['pk'], "error": "Asset has no current department."})
+            else:
+                moving.append(row)
+
+        if moving:
+            image = ''
+            if data.get('image'):
+                # one stored file shared by every transfer of the batch
+                field = AssetTransfer._meta.get_field('image')
+                image = field.storage.save(field.generate_filename(None, data['image'].name), data['image'])
+                if media.add_reference(image, len(moving)) == len(moving):
+                    media.schedule_variants(image)
+            transfers = AssetTransfer.objects.bulk_create([
+                AssetTransfer(
+                    asset_id=row['pk'],
+                    from_department_id=row['current_department_id'],
+                    to_department=target,
+                    transferred_by=request.user,
+                    price=data.get('price'),
+                    notes=data.get('notes', ''),
+                    image=image or None,
+                )
+                for row in moving
+            ])
+            # bulk_create skips signals: move the assets and bump their counters in one UPDATE
+            moved = [row['pk'] for row in moving]
+            counters.record_transfers(
+                moved, data.get('price'), transfers[0].transfer_date,
+                current_department=target, updated_at=timezone.now(),
+            )
+            if transfers[0].pk is None:
+                # MySQL does not return the ids of bulk inserted rows, and each row
+                # got its own transfer_date. Every transfer path locks its asset
+                # first, so the newest transfer of each locked asset is the one
+                # inserted above.
+                transfer_ids = list(
+                    AssetTransfer.objects.filter(asset_id__in=moved, transfer_date__gte=transfers[0].transfer_date)
+                    .values('asset_id').annotate(newest=Max('pk')).values_list('newest', flat=True)
+                )
+            else:
+                transfer_ids = [transfer.pk for transfer in transfers]
+            changelog.record('transfer', transfer_ids)
+            changelog.record('asset', moved)
+            events.transfers_created(transfer_ids)
+
+            # QuerySet.update skips signals: move the rollup counts here
+            deltas = rollups.new_deltas()
+            for row in moving:
+                rollups.add_asset(deltas, row, -1)
+                rollups.add_asset(deltas, dict(row, current_department_id=target.pk))
+            rollups.apply_deltas(deltas)
+
+    return Response({
+        "to_department": target.pk,
+        "moved": len(moving),
+        "moved_assets": [row['pk'] for row in moving],
+        "failed": failed,
+    }, status=status.HTTP_200_OK)
 
 
+# --------------------
+# Sync
+# --------------------
+
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
-def recent_transfers(request):
-    limit = request.query_params.get('limit', 5)
+def sync_view(request):
+    # without ?since= only the current token is returned, to pair with a full load
+    since = request.query_params.get('since')
+    if since is None:
+        return Response({"token": changelog.current_token()})
     try:
-        limit = int(limit)
-    except (ValueError, TypeError):
-        limit = 5
-
-    transfers = AssetTransfer.objects.order_by('-transfer_date')[:limit]
-    serializer = AssetTransferSerializer(transfers, many=True)
-    return Response(serializer.data)
+        limit = int(request.query_params.get('limit', changelog.SYNC_PAGE_SIZE))
+    except ValueError:
+        return Response({"error": "limit must be an integer."}, status=status.HTTP_400_BAD_REQUEST)
+    if limit < 1:
+        return Response({"error": "limit must be positive."}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        page = changelog.changes_since(
+            since, min(limit, changelog.SYNC_MAX_PAGE_SIZE), context={'request': request}
+        )
+    except ValueError:
+        return Response({"error": "since must be a token returned by this endpoint."},
+                        status=status.HTTP_400_BAD_REQUEST)
+    except changelog.TokenExpired:
+        return Response({"error": "Sync token expired, reload everything."}, status=status.HTTP_410_GONE)
+    return Response(page)
 
 
 # --------------------
-# Dashboard
+# Monitoring
 # --------------------
 
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
-def dashboard_stats(request):
-    stats = {
-        'total_assets': Asset.objects.count(),
-        'active_assets': Asset.objects.filter(status='active').count(),
-        'total_departments': Department.objects.count(),
-        'total_categories': Category.objects.count(),
-        'recent_transfers': AssetTransferSerializer(
-            AssetTransfer.objects.order_by('-transfer_date')[:5],
-            many=True
-        ).data,
-        'assets_by_department': {},
-        "total_brands": Brand.objects.count(),
-    }
-
-    for dept in Department.objects.all():
-        stats['assets_by_department'][dept.name] = Asset.objects.filter(
-            current_department=dept
-        ).count()
-
-    return Response(stats)
+def cache_stats_view(request):
+    # per-process hit/miss/304 counts of the reference-data cache
+    return Response(cache_stats.snapshot())
+
+
+# Prometheus scrape target; a plain Django view so JWT auth does not reject the scrape token
+@require_GET
+def metrics_view(request):
+    token = getattr(settings, 'METRICS_TOKEN', None)
+    if token and not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+        return HttpResponse(status=status.HTTP_401_UNAUTHORIZED)
+    return HttpResponse(metrics.registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
 
 
 # --------------------
@@ -256,13 +450,14 @@ class UserListCreateView(generics.ListCreateAPIView):
         return [permissions.IsAuthenticated()]
 
 
-class DepartmentListCreateView(generics.ListCreateAPIView):
-    queryset = Department.objects.all()
+class DepartmentListCreateView(SparseQuerysetMixin, VersionedCacheMixin, generics.ListCreateAPIView):
+    queryset = Department.objects.select_related('manager')
     serializer_class = DepartmentSerializer
     permission_classes = [permissions.IsAuthenticated]
+    cache_name = 'department'
 
 
-class DepartmentDetailView(generics.RetrieveUpdateDestroyAPIView):
+class DepartmentDetailView(SparseQuerysetMixin, generics.RetrieveUpdateDestroyAPIView):
     queryset = Department.objects.all()
     serializer_class = DepartmentSerializer
     permission_classes = [permissions.IsAuthenticated]
@@ -278,44 +473,124 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
+# --------------------
+# Exports
+# --------------------
+
+def _export(request, kind, queryset, archived=None):
+    output = request.query_params.get('output', 'csv')
+    if output not in exports.FORMATS:
+        return Response({"error": "output must be 'csv' or 'jsonl'."}, status=status.HTTP_400_BAD_REQUEST)
+    content_type, extension = exports.FORMATS[output]
+    response = StreamingHttpResponse(exports.stream(kind, queryset, output, archived), content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{kind}.{extension}"'
+    return response
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def asset_export_view(request):
+    return _export(request, 'assets', filter_assets(Asset.objects.all(), request.query_params))
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def transfer_export_view(request):
+    # the full history: archived transfers first
+    return _export(
+        request, 'transfers',
+        filter_transfers(AssetTransfer.objects.all(), request.query_params),
+        filter_transfers(ArchivedTransfer.objects.all(), request.query_params),
+    )
+
+
+DEPARTMENT_ASSETS_CHUNK_SIZE = 2000
+
+
+def _int_param(request, name, default=None):
+    try:
+        value = int(request.query_params.get(name, default))
+    except (TypeError, ValueError):
+        return default
+    return value if value >= 0 else default
+
+
+def _dump(value):
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':'))
+
+
+def _stream_department_assets(rows, paginated):
+    # rows arrive ordered by department, so each group is closed as soon as
+    # the department id changes; only one row is held in memory at a time
+    yield '['
+    current = None
+    for row in rows:
+        dept_id, dept_name, asset_id, name, code, value = row[:6]
+        if dept_id != current:
+            if current is not None:
+                yield ']},'
+            header = {"department_id": dept_id, "department_name": dept_name}
+            if paginated:
+                header["asset_count"] = row[6]
+            yield _dump(header)[:-1] + ',"assets":['
+            current = dept_id
+        else:
+            yield ','
+        yield _dump({"asset_id": asset_id, "name": name, "code": code, "current_value": value})
+    if current is not None:
+        yield ']}'
+    yield ']'
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def department_assets(request):
+    """Assets grouped by current department, streamed as one JSON array.
+
+    Optional ``?per_department=N&offset=K`` returns only assets K+1..K+N of
+    each department (plus its ``asset_count``); add ``?department=<id>`` to
+    page through a single department.
+    """
     search = request.query_params.get('search', '')
-    from .models import Department, Asset
+    department = _int_param(request, 'department')
+    limit = _int_param(request, 'per_department')
+    offset = _int_param(request, 'offset', 0)
 
-    departments = Department.objects.all()
+    assets = Asset.objects.filter(current_department__isnull=False)
     if search:
-        departments = departments.filter(name__icontains=search)
-
-    result = []
-    for dept in departments:
-        assets = Asset.objects.filter(current_department=dept)
-        asset_data = [
-            {
-                "asset_id": a.id,
-                "name": a.name,
-                "code": a.asset_code,
-                "current_value": a.current_value,
-            }
-            for a in assets
-        ]
-        if asset_data:
-            result.append({
-                "department_id": dept.id,
-                "department_name": dept.name,
-                "assets": asset_data
-            })
-    return Response(result)
+        assets = assets.filter(current_department__name__icontains=search)
+    if department is not None:
+        assets = assets.filter(current_department_id=department)
+
+    fields = ['current_department_id', 'current_department__name', 'id', 'name', 'asset_code', 'current_value']
+    if limit:
+        by_department = {'partition_by': F('current_department_id')}
+        assets = assets.annotate(
+            position=Window(RowNumber(), order_by=F('id').asc(), **by_department),
+            asset_count=Window(Count('id'), **by_department),
+        ).filter(position__gt=offset, position__lte=offset + limit)
+        fields.append('asset_count')
+
+    rows = (
+        assets.order_by('current_department_id', 'id')
+        .values_list(*fields)
+        .iterator(chunk_size=DEPARTMENT_ASSETS_CHUNK_SIZE)
+    )
+    return StreamingHttpResponse(
+        _stream_department_assets(rows, paginated=bool(limit)),
+        content_type='application/json',
+    )
 
 
 @api_view(['GET', 'POST'])
 @permission_classes([IsAuthenticated])
 def brand_list(request):
     if request.method == 'GET':
-        brands = Brand.objects.all()
-        serializer = BrandSerializer(brands, many=True)
-        return Response(serializer.data)
+        def build():
+            brands = Brand.objects.all()
+            serializer = BrandSerializer(brands, many=True)
+            return Response(serializer.data)
+        return cached_response(request, 'brand', build)
 
     if request.method == 'POST':
         serializer = BrandSerializer(data=request.data)
@@ -352,9 +627,11 @@ def brand_detail(request, pk):
 @permission_classes([IsAuthenticated])
 def usecase_list(request):
     if request.method == 'GET':
-        usecases = UseCase.objects.all()
-        serializer = UseCaseSerializer(usecases, many=True)
-        return Response(serializer.data)
+        def build():
+            usecases = UseCase.objects.all()
+            serializer = UseCaseSerializer(usecases, many=True)
+            return Response(serializer.data)
+        return cached_response(request, 'usecase', build)
     if request.method == 'POST':
         serializer = UseCaseSerializer(data=request.data)
         if serializer.is_valid():
@@ -22,6 +22,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'assetmanagement.metrics.MetricsMiddleware',
+    'assetmanagement.replicas.ReplicaMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -58,9 +60,32 @@ DATABASES = {
         'PASSWORD': 'Aa@123456',
         'HOST': 'localhost',
         'PORT': '3306',
+        # kept open between requests, also by the async views' query pool
+        'CONN_MAX_AGE': 60,
+        'CONN_HEALTH_CHECKS': True,
     }
 }
 
+# Read replicas for list, export and dashboard reads (assetmanagement/replicas.py),
+# e.g. DB_REPLICA_HOSTS="db-replica1,db-replica2:3307"; they share the primary's
+# credentials and keep their connections open between requests.
+DATABASE_REPLICAS = []
+for number, address in enumerate(filter(None, os.environ.get('DB_REPLICA_HOSTS', '').split(',')), 1):
+    host, _, port = address.strip().partition(':')
+    DATABASES[f'replica{number}'] = {
+        **DATABASES['default'],
+        'HOST': host,
+        'PORT': port or DATABASES['default']['PORT'],
+        'CONN_MAX_AGE': 60,
+        'CONN_HEALTH_CHECKS': True,
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(f'replica{number}')
+DATABASE_ROUTERS = ['assetmanagement.replicas.ReplicaRouter']
+# after a write, the same token reads from the primary for this long
+REPLICA_PIN_SECONDS = 10
+REPLICA_MAX_LAG_SECONDS = 5
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
         'rest_framework_simplejwt.authentication.JWTAuthentication',
@@ -72,7 +97,34 @@ REST_FRAMEWORK = {
     'PAGE_SIZE': 6,  # Default if not passed, but it's always best to pass from frontend
 }
 
+# Reference data (departments, categories, brands, usecases) is cached under
+# per-model version keys. LocMem/FileBased for one node; point 'reference'
+# at Redis or Memcached when several hosts serve the API.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'reference': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'reference-data',
+    },
+    # read-your-writes pins of replicas.py, seen by every process: a table on
+    # the primary (manage.py createcachetable), or a shared Redis/Memcached
+    'replica-pins': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'replica_pins',
+    },
+}
+REFERENCE_CACHE_ALIAS = 'reference'
+REPLICA_PIN_CACHE = 'replica-pins'
+
+# Request metrics scraped from /api/metrics/ (send "Authorization: Bearer
+# <METRICS_TOKEN>" when set); requests slower than the threshold are logged.
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+SLOW_REQUEST_THRESHOLD_MS = 500
+
 from datetime import timedelta
+from corsheaders.defaults import default_headers
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=60),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=7),
@@ -86,6 +138,9 @@ CORS_ALLOWED_ORIGINS = [
     "http://localhost:5176",  # آدرس dev فرانت
     "https://yourdomain.com",  # آدرس واقعی frontend در تولید
 ]
+# conditional requests on assets (assetmanagement/conditional.py)
+CORS_EXPOSE_HEADERS = ['ETag', 'Last-Modified']
+CORS_ALLOW_HEADERS = (*default_headers, 'if-match', 'if-none-match')
 ROOT_URLCONF = 'config.urls'
 
 AUTH_USER_MODEL = 'assetmanagement.User'
@@ -6,6 +6,10 @@ import { useAuthStore } from "@/stores/auth";
 
 const API_BASE = import.meta.env.VITE_API_BASE || "http://localhost:8000";
 
+// Last ETag seen per URL; writes send it back as If-Match so a stale
+// form cannot overwrite someone else's change (the API answers 412)
+const etags = new Map();
+
 // Reusable JSON-based API request
 export async function apiRequest(url, method = "GET", data = null) {
   const token = localStorage.getItem("access_token");
@@ -14,6 +18,9 @@ export async function apiRequest(url, method = "GET", data = null) {
     "Content-Type": "application/json",
     Authorization: `Bearer ${token}`,
   };
+  if (method !== "GET" && etags.has(url)) {
+    headers["If-Match"] = etags.get(url);
+  }
 
   const config = {
     method,
@@ -26,16 +33,118 @@ export async function apiRequest(url, method = "GET", data = null) {
 
   const response = await fetch(`${API_BASE}${url}`, config);
 
+  if (response.status === 412) {
+    etags.delete(url);
+    throw new Error("This item was changed by someone else. Reload it and try again.");
+  }
   if (!response.ok) {
-    throw new Error(`HTTP error! status: ${response.status}`);
+    const error = new Error(`HTTP error! status: ${response.status}`);
+    error.status = response.status;
+    throw error;
   }
 
+  const etag = response.headers.get("ETag");
+  if (etag) etags.set(url, etag);
+  else if (method === "DELETE") etags.delete(url);
+
   if (response.status === 204) return; // اگر کد 204 بود (هیچ محتوایی)
   const text = await response.text();
   if (!text) return; // اگر body خالیه، return کن
   return JSON.parse(text);
 }
 
+// Delta sync: the rows changed since `token`, following every page of
+// /api/sync/. Resolves to null when the token expired (410) and the
+// caller must reload in full.
+export async function fetchChanges(token) {
+  const changes = {};
+  let more = true;
+  while (more) {
+    let page;
+    try {
+      page = await apiRequest(`/api/sync/?since=${token}`);
+    } catch (err) {
+      if (err.status === 410) return null;
+      throw err;
+    }
+    // later pages win: id -> row, or null for a tombstone
+    for (const [key, { saved, deleted }] of Object.entries(page.changes)) {
+      const latest = (changes[key] ??= new Map());
+      for (const row of saved) latest.set(row.id, row);
+      for (const id of deleted) latest.set(id, null);
+    }
+    token = page.token;
+    more = page.more;
+  }
+  return { token, changes };
+}
+
+// Apply one model's changes (from fetchChanges) to a loaded list. Only
+// rows already in the list are replaced, so filtered pages keep their
+// filter; pass addNew=true for complete lists (departments, categories).
+export function applyChanges(rows, latest, addNew = false) {
+  if (!latest) return rows;
+  const result = rows
+    .filter((row) => latest.get(row.id) !== null)
+    .map((row) => latest.get(row.id) ?? row);
+  if (addNew) {
+    const known = new Set(rows.map((row) => row.id));
+    for (const [id, row] of latest) {
+      if (row !== null && !known.has(id)) result.push(row);
+    }
+  }
+  return result;
+}
+
+// Server push: subscribe to /api/events/ ("transfer", "asset.status")
+// with { eventName: handler(data) }; handlers.ready runs on every
+// (re)connect, the place to catch up on what was missed. Returns a
+// handle; call .close() on unmount.
+//
+// The stream URL carries a short-lived ticket, never the access token,
+// so each connect fetches a fresh one. The server ends the stream with
+// "expired" when the access token does, and EventSource's own retries
+// would reuse a stale ticket: both reconnect here instead.
+export function openEventStream(handlers, departments = []) {
+  const handle = {
+    source: null,
+    retry: null,
+    closed: false,
+    close: () => {
+      handle.closed = true;
+      clearTimeout(handle.retry);
+      handle.source?.close();
+    },
+  };
+  const reconnect = (delay) => {
+    handle.source?.close();
+    clearTimeout(handle.retry);
+    if (!handle.closed) handle.retry = setTimeout(connect, delay);
+  };
+  const connect = async () => {
+    let ticket;
+    try {
+      ({ ticket } = await apiRequest("/api/events/ticket/", "POST"));
+    } catch (err) {
+      // signed out or offline: try again later
+      return reconnect(30000);
+    }
+    if (handle.closed) return;
+    const params = new URLSearchParams({ ticket });
+    if (departments.length) params.set("department", departments.join(","));
+    handle.source = new EventSource(`${API_BASE}/api/events/?${params}`);
+    for (const [name, handler] of Object.entries(handlers)) {
+      handle.source.addEventListener(name, (event) => handler(JSON.parse(event.data)));
+    }
+    // dropped for falling behind, or the access token ran out: ready catches up
+    handle.source.addEventListener("reset", () => reconnect(0));
+    handle.source.addEventListener("expired", () => reconnect(0));
+    handle.source.onerror = () => reconnect(5000);
+  };
+  connect();
+  return handle;
+}
+
 // For JSON-based asset transfer
 async function transferAsset(assetId, departmentId) {
   const payload = { department: departmentId };
@@ -65,21 +174,36 @@ async function transferAssetWithFormData(assetId, formData) {
   return await response.json();
 }
 
+// Pull the opaque cursor token out of a next/previous link
+function cursorFromLink(link) {
+  if (!link) return null;
+  return new URL(link).searchParams.get("cursor");
+}
+
 export const useAssetsStore = defineStore("assets", () => {
   const count = ref(0);
   const next = ref(null);
   const previous = ref(null);
+  const nextCursor = ref(null);
+  const previousCursor = ref(null);
   const error = ref(null);
 
   const assets = ref([]);
   const departments = ref([]);
   const categories = ref([]);
   const loading = ref(false);
+  // change token of the loaded data, and how to load it again in full
+  const syncToken = ref(null);
+  let reload = null;
 
   const fetchAssets = async (params = {}) => {
     loading.value = true;
     error.value = null;
     try {
+      // take the token before the first load (changes made during it come
+      // again); after that syncAssets keeps it current
+      if (syncToken.value === null) syncToken.value = (await apiRequest("/api/sync/")).token;
+      reload = () => fetchAssets(params);
       const queryParams = new URLSearchParams(params);
       const data = await apiRequest(`/api/assets/?${queryParams}`);
       assets.value = data.results || data;
@@ -95,6 +219,50 @@ export const useAssetsStore = defineStore("assets", () => {
     }
   };
 
+  // Keyset (cursor) mode: constant time per page, no COUNT(*) on the server.
+  // countMode: "none" (default), "approx" or "exact"
+  const fetchAssetsCursor = async (params = {}, cursor = null, countMode = "none") => {
+    loading.value = true;
+    error.value = null;
+    try {
+      if (syncToken.value === null) syncToken.value = (await apiRequest("/api/sync/")).token;
+      reload = () => fetchAssetsCursor(params, cursor, countMode);
+      const queryParams = new URLSearchParams({ ...params, pagination: "cursor" });
+      if (cursor) queryParams.set("cursor", cursor);
+      if (countMode !== "none") queryParams.set("count", countMode);
+      const data = await apiRequest(`/api/assets/?${queryParams}`);
+      assets.value = data.results;
+      count.value = data.count;
+      next.value = data.next;
+      previous.value = data.previous;
+      nextCursor.value = cursorFromLink(data.next);
+      previousCursor.value = cursorFromLink(data.previous);
+      return data;
+    } catch (err) {
+      error.value = "Error fetching assets";
+      throw err;
+    } finally {
+      loading.value = false;
+    }
+  };
+
+  // Bring the loaded assets, departments and categories up to date with
+  // only the rows changed since the last load or sync
+  const syncAssets = async () => {
+    if (syncToken.value === null) return reload ? reload() : fetchAssets();
+    const result = await fetchChanges(syncToken.value);
+    if (result === null) {
+      syncToken.value = null;
+      return reload();
+    }
+    const { token, changes } = result;
+    assets.value = applyChanges(assets.value, changes.asset);
+    departments.value = applyChanges(departments.value, changes.department, true);
+    categories.value = applyChanges(categories.value, changes.category, true);
+    syncToken.value = token;
+    return changes;
+  };
+
   const getAsset = async (id) => {
     try {
       return await apiRequest(`/api/assets/${id}/`);
@@ -169,11 +337,16 @@ export const useAssetsStore = defineStore("assets", () => {
     departments,
     categories,
     loading,
+    syncToken,
     count,
     next,
     previous,
+    nextCursor,
+    previousCursor,
     error,
     fetchAssets,
+    fetchAssetsCursor,
+    syncAssets,
     getAsset,
     addAsset,
     updateAsset,
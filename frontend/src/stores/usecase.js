@@ -2,6 +2,7 @@
 
 import { defineStore } from "pinia";
 import { ref } from "vue";
+import { apiRequest, applyChanges, fetchChanges } from "@/stores/assets";
 
 const API_BASE = import.meta.env.VITE_API_BASE || "http://localhost:8000";
 
@@ -9,11 +10,14 @@ export const useUsecaseStore = defineStore("usecase", () => {
   const usecases = ref([]);
   const loading = ref(false);
   const error = ref(null);
+  const syncToken = ref(null);
 
   async function fetchUsecases() {
     loading.value = true;
     error.value = null;
     try {
+      // syncUsecases keeps the token current after the first load
+      if (syncToken.value === null) syncToken.value = (await apiRequest("/api/sync/")).token;
       const token = localStorage.getItem("access_token");
       const res = await fetch(`${API_BASE}/api/usecases/`, {
         headers: {
@@ -36,10 +40,24 @@ export const useUsecaseStore = defineStore("usecase", () => {
     }
   }
 
+  // Apply only the usecases changed since the last load or sync
+  async function syncUsecases() {
+    const result = syncToken.value === null ? null : await fetchChanges(syncToken.value);
+    if (result === null) {
+      syncToken.value = null;
+      return fetchUsecases();
+    }
+    usecases.value = applyChanges(usecases.value, result.changes.usecase, true);
+    syncToken.value = result.token;
+    return usecases.value;
+  }
+
   return {
     usecases,
     loading,
     error,
+    syncToken,
     fetchUsecases,
+    syncUsecases,
   };
 });